@@ -1,17 +1,29 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from . import search
+from .models import Comment, Follow, Group, Post, Profile
 
 EMPTY_VALUE = '-пусто-'
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'comments_count'
+    )
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = EMPTY_VALUE
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search.build_match(search_term) or not search.is_available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(
+            pk__in=search.matching(search_term, search.KIND_POST)
+        ), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -32,3 +44,21 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('author',)
     empty_value_display = EMPTY_VALUE
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search.build_match(search_term) or not search.is_available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(
+            pk__in=search.matching(search_term, search.KIND_COMMENT)
+        ), False
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count'
+    )
+    search_fields = ('user__username',)
+    empty_value_display = EMPTY_VALUE
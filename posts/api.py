@@ -0,0 +1,186 @@
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import urlencode
+from django.views.decorators.http import require_safe
+
+from . import versions
+from .models import Comment, Group, Post, User
+from .paginator import COMMENT_ORDERING, CursorPaginator
+
+CONTENT_TYPE = 'application/json'
+
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+def not_modified(request, etag):
+    """Ответ 304, если у клиента уже есть версия с этим ETag."""
+    return get_conditional_response(request, etag=etag)
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def serialize_post(row):
+    group = None
+    if row.group is not None:
+        group = {
+            'id': row.group.pk,
+            'slug': row.group.slug,
+            'title': row.group.title,
+        }
+    return {
+        'id': row.pk,
+        'text': row.text,
+        'pub_date': row.pub_date,
+        'author': {'id': row.author.pk, 'username': row.author.username},
+        'group': group,
+        'image': _media_url(row.image),
+        'thumbnail': row.thumbnail or None,
+        'comments_count': row.comments_count,
+        'url': reverse('api_post', args=[row.pk]),
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row.pk,
+        'post_id': row.post_id,
+        'text': row.text,
+        'created': row.created,
+        'author': {'id': row.author.pk, 'username': row.author.username},
+    }
+
+
+def stream_json(rows, serialize, **extra):
+    """
+    Кодирует ответ по одной строке, не собирая тело и список
+    словарей целиком; extra дописываются после results.
+    """
+    yield '{"results": ['
+    for index, row in enumerate(rows):
+        if index:
+            yield ','
+        yield encoder.encode(serialize(row))
+    yield ']'
+    for name, value in extra.items():
+        yield f', {json.dumps(name)}: {encoder.encode(value)}'
+    yield '}'
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    return f'{request.path}?{urlencode({"cursor": cursor})}'
+
+
+def paginated_response(request, paginator, serialize, feed, *scopes):
+    """
+    Страница в JSON с ETag из ключа самой новой строки окна и
+    поколений областей. Совпавший If-None-Match получает 304
+    до выборки строк.
+    """
+    cursor = request.GET.get('cursor')
+    etag = versions.etag(
+        feed, cursor or '', paginator.window_key(cursor),
+        *versions.get_versions(*scopes)
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    rows, next_cursor, previous_cursor = paginator.load(cursor)
+    response = StreamingHttpResponse(
+        stream_json(
+            rows,
+            serialize,
+            next=_page_url(request, next_cursor),
+            previous=_page_url(request, previous_cursor),
+        ),
+        content_type=CONTENT_TYPE
+    )
+    response['ETag'] = etag
+    return response
+
+
+def _feed_paginator(queryset):
+    return CursorPaginator(
+        queryset.for_feed(None).as_rows(), settings.ITEMS_ON_PAGE
+    )
+
+
+@require_safe
+def index(request):
+    return paginated_response(
+        request,
+        _feed_paginator(Post.objects.all()),
+        serialize_post,
+        'api_index',
+        versions.INDEX
+    )
+
+
+@require_safe
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return paginated_response(
+        request,
+        _feed_paginator(Post.objects.filter(group=group)),
+        serialize_post,
+        'api_group',
+        versions.group_scope(group.pk)
+    )
+
+
+@require_safe
+def profile(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return paginated_response(
+        request,
+        _feed_paginator(Post.objects.filter(author=author)),
+        serialize_post,
+        'api_profile',
+        versions.author_scope(author.pk)
+    )
+
+
+@require_safe
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    paginator = CursorPaginator(
+        Comment.objects.filter(post=post).as_rows(),
+        settings.COMMENTS_ON_PAGE,
+        ordering=COMMENT_ORDERING
+    )
+    return paginated_response(
+        request,
+        paginator,
+        serialize_comment,
+        f'api_comments:{post_id}',
+        versions.post_scope(post_id)
+    )
+
+
+@require_safe
+def post_detail(request, post_id):
+    etag = versions.etag(
+        'api_post', post_id,
+        *versions.get_versions(versions.post_scope(post_id))
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    row = get_object_or_404(
+        Post.objects.for_feed(None).as_rows(), pk=post_id
+    )
+    response = HttpResponse(
+        encoder.encode(serialize_post(row)), content_type=CONTENT_TYPE
+    )
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,315 @@
+import io
+import itertools
+import json
+import math
+import random
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Max
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import Mixer
+
+from . import urls
+from .models import Comment, Follow, Group, Post, Profile, User
+
+SEED_VOLUMES = {
+    'users': 100000,
+    'groups': 200,
+    'posts': 1000000,
+    'follows': 5000000,
+    'comments': 2000000,
+}
+SEED_BATCH_SIZE = 5000
+POPULARITY_EXPONENT = 1.1
+SEARCH_QUERY = 'the'
+URL_PARAMS = {
+    'search': {'q': SEARCH_QUERY},
+}
+READ_ONLY_URLS = (
+    'index', 'group_posts', 'group_trending', 'follow_index', 'search',
+    'trending', 'feed_index_rss', 'feed_index_atom', 'feed_group_rss',
+    'feed_group_atom', 'feed_profile_rss', 'feed_profile_atom',
+    'api_index', 'api_post', 'api_comments', 'api_group', 'api_profile',
+    'profile', 'post', 'post_comments',
+)
+# меняют данные или пишут файлы, замеряются только на временной базе
+MUTATING_URLS = (
+    'new_post', 'edit_post', 'add_comment', 'export_data',
+    'profile_follow', 'profile_unfollow',
+)
+PERCENTILES = (50, 95, 99)
+COMMANDS_AFTER_SEED = (
+    'recount_counters', 'rebuild_timelines', 'rebuild_search_index',
+)
+# замеры идут на отдельном кэше процесса: очистка не трогает
+# общий кэш сервера
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'yatube.metrics.InstrumentedCache',
+        'WRAPPED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+def scaled_volumes(scale):
+    """Объёмы наполнения, умноженные на scale, но не меньше двух строк."""
+    return {
+        name: max(2, int(volume * scale))
+        for name, volume in SEED_VOLUMES.items()
+    }
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _batches(total, size=SEED_BATCH_SIZE):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def seed(scale=1.0, random_seed=0, log=None):
+    """
+    Наполняет базу фабриками mixer и bulk_create, минуя сигналы,
+    затем пересчитывает счётчики, ленты и поисковый индекс штатными
+    командами. Популярность авторов распределена по закону Ципфа.
+    Возвращает число созданных строк по таблицам.
+    """
+    log = log or (lambda message: None)
+    volumes = scaled_volumes(scale)
+    rng = random.Random(random_seed)
+    mixer = Mixer(commit=False)
+    password = make_password(None)
+
+    first_user = _next_id(User)
+    for start, size in _batches(volumes['users']):
+        ids = range(first_user + start, first_user + start + size)
+        User.objects.bulk_create(mixer.cycle(size).blend(
+            User,
+            id=(pk for pk in ids),
+            username=(f'bench_{pk}' for pk in ids),
+            password=password,
+            is_staff=False,
+            is_superuser=False,
+            is_active=True
+        ))
+    user_ids = list(range(first_user, first_user + volumes['users']))
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in user_ids],
+        batch_size=SEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    log(f'Пользователей: {len(user_ids)}')
+
+    first_group = _next_id(Group)
+    group_ids = range(first_group, first_group + volumes['groups'])
+    Group.objects.bulk_create(mixer.cycle(len(group_ids)).blend(
+        Group,
+        id=(pk for pk in group_ids),
+        slug=(f'bench-{pk}' for pk in group_ids)
+    ))
+    log(f'Сообществ: {len(group_ids)}')
+
+    weights = list(itertools.accumulate(
+        1 / (rank ** POPULARITY_EXPONENT)
+        for rank in range(1, len(user_ids) + 1)
+    ))
+
+    def popular(count):
+        return rng.choices(user_ids, cum_weights=weights, k=count)
+
+    first_post = _next_id(Post)
+    for start, size in _batches(volumes['posts']):
+        Post.objects.bulk_create(mixer.cycle(size).blend(
+            Post,
+            id=(first_post + start + offset for offset in range(size)),
+            author_id=(author_id for author_id in popular(size)),
+            group_id=(
+                rng.choice(group_ids) if rng.random() < 0.5 else None
+                for _ in range(size)
+            ),
+            image='',
+            thumbnail='',
+            image_srcset='',
+            image_srcset_webp='',
+            comments_count=0
+        ))
+    post_ids = range(first_post, first_post + volumes['posts'])
+    log(f'Постов: {len(post_ids)}')
+
+    follows_per_user = math.ceil(volumes['follows'] / len(user_ids))
+    created = 0
+    batch = []
+    for user_id in user_ids:
+        authors = set(popular(follows_per_user))
+        authors.discard(user_id)
+        batch.extend(
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in authors
+        )
+        if len(batch) >= SEED_BATCH_SIZE:
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+        if created >= volumes['follows']:
+            break
+    Follow.objects.bulk_create(batch, ignore_conflicts=True)
+    log(f'Подписок: {Follow.objects.count()}')
+
+    for start, size in _batches(volumes['comments']):
+        Comment.objects.bulk_create(mixer.cycle(size).blend(
+            Comment,
+            post_id=(rng.choice(post_ids) for _ in range(size)),
+            author_id=(rng.choice(user_ids) for _ in range(size))
+        ))
+    log(f'Комментариев: {volumes["comments"]}')
+
+    for command in COMMANDS_AFTER_SEED:
+        output = io.StringIO()
+        call_command(command, stdout=output)
+        log(output.getvalue().strip())
+    return volumes
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def _fixtures():
+    """Самые тяжёлые объекты для подстановки в URL."""
+    author = User.objects.order_by('-profile__followers_count', 'pk').first()
+    viewer = User.objects.order_by('-profile__following_count', 'pk').first()
+    post = Post.objects.filter(author=author).order_by(
+        '-comments_count', 'pk'
+    ).first()
+    group = Group.objects.order_by('pk').first()
+    if post is None:
+        post = Post.objects.order_by('-comments_count', 'pk').first()
+        author = post.author
+    return viewer, {
+        'username': author.username,
+        'post_id': post.pk,
+        'slug': group.slug,
+    }
+
+
+def benchmark_urls(mutating=False):
+    """
+    Имена маршрутов из READ_ONLY_URLS и их параметры, с mutating —
+    ещё и из MUTATING_URLS.
+    """
+    names = READ_ONLY_URLS + (MUTATING_URLS if mutating else ())
+    for pattern in urls.urlpatterns:
+        if pattern.name in names:
+            yield pattern.name, list(pattern.pattern.converters)
+
+
+def measure(repeat=20, warm=False, log=None, mutating=False):
+    """
+    Прогоняет маршруты posts/urls.py от имени самого активного
+    подписчика: число запросов, перцентили времени и пик памяти.
+    Маршруты, меняющие данные, замеряются только с mutating.
+    Запросы идут через отдельный кэш в памяти процесса. По умолчанию
+    он очищается перед каждым запросом вне замера времени, чтобы
+    кэш фрагментов не скрывал лишние запросы.
+    """
+    log = log or (lambda message: None)
+    viewer, values = _fixtures()
+    client = Client()
+    client.force_login(viewer)
+    results = {}
+    hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+    with override_settings(DEBUG=False, ALLOWED_HOSTS=hosts,
+                           CACHES=BENCHMARK_CACHES):
+        for name, params in benchmark_urls(mutating):
+            path = reverse(name, kwargs={key: values[key] for key in params})
+            data = URL_PARAMS.get(name, {})
+
+            def prepare():
+                if not warm:
+                    cache.clear()
+
+            prepare()
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, data)
+            query_count = len(queries)
+            timings = []
+            for _ in range(repeat):
+                prepare()
+                started = time.perf_counter()
+                client.get(path, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            prepare()
+            tracemalloc.start()
+            client.get(path, data)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            result = {
+                'path': path,
+                'status': response.status_code,
+                'queries': query_count,
+                'peak_kb': round(peak / 1024, 1),
+            }
+            for percent in PERCENTILES:
+                result[f'p{percent}_ms'] = round(
+                    _percentile(timings, percent), 2
+                )
+            results[name] = result
+            log(
+                f'{name:<18} {result["status"]} '
+                f'запросов: {result["queries"]:<4} '
+                f'p95: {result["p95_ms"]} мс '
+                f'память: {result["peak_kb"]} КБ'
+            )
+    return results
+
+
+def compare(baseline, report, tolerance):
+    """
+    Сравнивает отчёт с эталоном. Число запросов не должно расти
+    вовсе, время p95 и пик памяти — не больше чем на долю tolerance.
+    Возвращает список описаний регрессий.
+    """
+    regressions = []
+    for name, base in baseline.get('urls', {}).items():
+        current = report['urls'].get(name)
+        if current is None:
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {current["queries"]} '
+                f'вместо {base["queries"]}'
+            )
+        for metric in ('p95_ms', 'peak_kb'):
+            limit = base[metric] * (1 + tolerance)
+            if current[metric] > limit:
+                regressions.append(
+                    f'{name}: {metric} {current[metric]} '
+                    f'больше допустимых {round(limit, 2)}'
+                )
+    return regressions
+
+
+def dump(report, path):
+    with open(path, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        report_file.write('\n')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as report_file:
+        return json.load(report_file)
@@ -0,0 +1,81 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, Profile
+
+PROFILE_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def count_subquery(model, field, outer='pk'):
+    """Коррелированный подзапрос COUNT(*) по внешнему ключу field."""
+    counted = (
+        model.objects
+        .filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def increment(queryset, **deltas):
+    """
+    Атомарно изменяет счётчики на заданные величины через F().
+    Возвращает количество обновлённых строк.
+    """
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def update_profile(user_id, **deltas):
+    """
+    Увеличивает счётчики профиля пользователя.
+    Если профиля ещё нет, он создаётся с точными значениями.
+    """
+    if increment(Profile.objects.filter(user_id=user_id), **deltas):
+        return
+    Profile.objects.get_or_create(user_id=user_id)
+    recount_profiles(Profile.objects.filter(user_id=user_id))
+
+
+def recount_posts(queryset):
+    """Пересчитывает comments_count для постов из queryset."""
+    posts = list(
+        queryset
+        .annotate(actual=count_subquery(Comment, 'post'))
+        .only('pk', 'comments_count')
+    )
+    changed = []
+    for post in posts:
+        if post.comments_count != post.actual:
+            post.comments_count = post.actual
+            changed.append(post)
+    Post.objects.bulk_update(changed, ['comments_count'])
+    return len(changed)
+
+
+def recount_profiles(queryset):
+    """Пересчитывает счётчики профилей из queryset."""
+    annotations = {
+        f'actual_{field}': count_subquery(model, lookup, outer='user_id')
+        for field, (model, lookup) in PROFILE_COUNTERS.items()
+    }
+    changed = []
+    for profile in queryset.annotate(**annotations):
+        dirty = False
+        for field in PROFILE_COUNTERS:
+            actual = getattr(profile, f'actual_{field}')
+            if getattr(profile, field) != actual:
+                setattr(profile, field, actual)
+                dirty = True
+        if dirty:
+            changed.append(profile)
+    Profile.objects.bulk_update(changed, list(PROFILE_COUNTERS))
+    return len(changed)
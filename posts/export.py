@@ -0,0 +1,115 @@
+"""
+Архив данных пользователя: posts.jsonl, comments.jsonl и картинки
+его постов в media/.
+
+Zip пишется в приёмник без перемотки (zipfile тогда ставит
+дескрипторы данных после каждого файла), а приёмник отдаётся
+порциями по мере записи. Строки читаются iterator(chunk_size),
+файлы — кусками по EXPORT_READ_SIZE, поэтому память не зависит
+от числа постов.
+"""
+import io
+import json
+import time
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+EXPORT_READ_SIZE = 64 * 1024
+MEDIA_DIR = 'media'
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'group__slug', 'image', 'comments_count',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'text', 'created')
+
+encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+class _Sink(io.RawIOBase):
+    """Приёмник без перемотки, который копит записанное до drain()."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _entry(name, compress_type=zipfile.ZIP_DEFLATED):
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def _media_name(name):
+    return f'{MEDIA_DIR}/{name}'
+
+
+def _post_record(values):
+    image = values.pop('image')
+    values['group'] = values.pop('group__slug')
+    values['image'] = _media_name(image) if image else None
+    return values
+
+
+def _rows(queryset, fields):
+    return queryset.order_by('pk').values(*fields).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def stream_archive(user):
+    """Порции байтов zip-архива с данными пользователя."""
+    return (chunk for chunk in _write_archive(user) if chunk)
+
+
+def _write_archive(user):
+    sink = _Sink()
+    posts = Post.objects.filter(author=user)
+    jsonl = (
+        ('posts.jsonl', (
+            _post_record(values) for values in _rows(posts, POST_FIELDS)
+        )),
+        ('comments.jsonl', _rows(
+            Comment.objects.filter(author=user), COMMENT_FIELDS
+        )),
+    )
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for name, records in jsonl:
+            with archive.open(_entry(name), 'w', force_zip64=True) as entry:
+                for record in records:
+                    entry.write(encoder.encode(record).encode())
+                    entry.write(b'\n')
+                    yield sink.drain()
+            yield sink.drain()
+
+        images = (
+            posts.exclude(image='').exclude(image__isnull=True)
+            .order_by('image').values_list('image', flat=True).distinct()
+        )
+        for image in images.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            try:
+                source = default_storage.open(image, 'rb')
+            except FileNotFoundError:
+                continue
+            info = _entry(_media_name(image), zipfile.ZIP_STORED)
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in source.chunks(EXPORT_READ_SIZE):
+                    entry.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,174 @@
+"""
+Ленты RSS и Atom для главной, сообществ и профилей.
+
+Готовый XML кэшируется под ключом из поколений областей
+syndication_scope, которые сдвигаются только при записи постов,
+поэтому лента перестраивается после нового поста, а не после
+каждого комментария. Те же поколения дают ETag и Last-Modified
+для условного GET. В ленте не больше SYNDICATION_ITEMS записей —
+один диапазон индекса по дате.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+from django.views.decorators.http import require_safe
+
+from . import versions
+from .models import Group, Post, User
+
+CACHE_KEY = 'syndication:{etag}'
+TITLE_WORDS = 10
+
+
+def _latest(queryset):
+    return queryset.for_feed(None).as_rows().order_by(
+        '-pub_date', '-id'
+    )[:settings.SYNDICATION_ITEMS]
+
+
+class IndexFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов Yatube.'
+
+    def link(self):
+        return reverse('index')
+
+    def items(self):
+        return _latest(Post.objects.all())
+
+    def item_title(self, item):
+        return Truncator(item.text).words(TITLE_WORDS)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('post', args=[item.author.username, item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+
+class GroupFeed(IndexFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(
+            Group.objects.only('slug', 'title', 'description'), slug=slug
+        )
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('group_posts', args=[group.slug])
+
+    def items(self, group):
+        return _latest(Post.objects.filter(group=group))
+
+
+class ProfileFeed(IndexFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(
+            User.objects.only('username', 'first_name', 'last_name'),
+            username=username
+        )
+
+    def title(self, author):
+        return f'Yatube: @{author.username}'
+
+    def description(self, author):
+        return f'Записи {author.get_full_name() or author.username}.'
+
+    def link(self, author):
+        return reverse('profile', args=[author.username])
+
+    def items(self, author):
+        return _latest(Post.objects.filter(author=author))
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class IndexAtomFeed(AtomFeedMixin, IndexFeed):
+    pass
+
+
+class GroupAtomFeed(AtomFeedMixin, GroupFeed):
+    pass
+
+
+class ProfileAtomFeed(AtomFeedMixin, ProfileFeed):
+    pass
+
+
+def _index_scopes():
+    return [versions.INDEX]
+
+
+def _group_scopes(slug):
+    return [versions.group_scope(get_object_or_404(
+        Group.objects.values_list('pk', flat=True), slug=slug
+    ))]
+
+
+def _profile_scopes(username):
+    return [versions.author_scope(get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username
+    ))]
+
+
+def cached_feed(feed, get_scopes):
+    """
+    Представление ленты feed с кэшем по поколениям областей
+    get_scopes(**kwargs) и условным GET.
+    """
+    @require_safe
+    def view(request, **kwargs):
+        scopes = [
+            versions.syndication_scope(scope)
+            for scope in get_scopes(**kwargs)
+        ]
+        stamps = versions.get_versions(*scopes)
+        etag = versions.etag(request.path, *stamps)
+        last_modified = int(max(stamps))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = CACHE_KEY.format(etag=etag.strip('"'))
+            cached = cache.get(key)
+            if cached is None:
+                rendered = feed(request, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=0)
+        return response
+    return view
+
+
+index_rss = cached_feed(IndexFeed(), _index_scopes)
+index_atom = cached_feed(IndexAtomFeed(), _index_scopes)
+group_rss = cached_feed(GroupFeed(), _group_scopes)
+group_atom = cached_feed(GroupAtomFeed(), _group_scopes)
+profile_rss = cached_feed(ProfileFeed(), _profile_scopes)
+profile_atom = cached_feed(ProfileAtomFeed(), _profile_scopes)
@@ -0,0 +1,135 @@
+"""
+Граф подписок в общем кэше.
+
+Для каждого пользователя хранятся отсортированные массивы id
+(array('I'), 4 байта на связь): на кого он подписан и кто подписан
+на него. Проверка связи — одно чтение кэша и двоичный поиск.
+Кэш общий для всех воркеров (см. CACHES), поэтому массивы не правятся
+на месте: чтение-изменение-запись из двух процессов теряло бы связи.
+При подписке и отписке массивы обеих сторон сбрасываются и собираются
+заново одним индексным запросом при следующем чтении.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from yatube.routers import reads_replica
+
+from .models import Follow
+
+GRAPH_KEY = 'graph:{kind}:{user_id}'
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+TYPECODE = 'I'
+
+
+def _key(kind, user_id):
+    return GRAPH_KEY.format(kind=kind, user_id=user_id)
+
+
+def _load(kind, user_id):
+    key = _key(kind, user_id)
+    ids = array(TYPECODE)
+    raw = cache.get(key)
+    if raw is not None:
+        ids.frombytes(raw)
+        return ids
+    if kind == FOLLOWING:
+        column, lookup = 'author_id', 'user_id'
+    else:
+        column, lookup = 'user_id', 'author_id'
+    ids.extend(
+        Follow.objects
+        .filter(**{lookup: user_id})
+        .order_by(column)
+        .values_list(column, flat=True)
+        .iterator()
+    )
+    if not reads_replica():
+        cache.set(key, ids.tobytes(), settings.GRAPH_CACHE_TIMEOUT)
+    return ids
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _load(FOLLOWING, user_id)
+
+
+def followers(user_id):
+    """Отсортированный массив id подписчиков user_id."""
+    return _load(FOLLOWERS, user_id)
+
+
+def is_following(user_id, author_id):
+    return _contains(following(user_id), author_id)
+
+
+def followed_among(user_id, author_ids):
+    """Какие из author_ids отслеживает user_id — одним чтением кэша."""
+    ids = following(user_id)
+    return {
+        author_id for author_id in author_ids if _contains(ids, author_id)
+    }
+
+
+def edge_changed(user_id, author_id):
+    """Сбрасывает массивы обеих сторон связи после подписки или отписки."""
+    invalidate([user_id], [author_id])
+
+
+def invalidate(user_ids=(), author_ids=()):
+    """Сбрасывает массивы графа после массовой записи в обход сигналов."""
+    cache.delete_many(
+        [_key(FOLLOWING, user_id) for user_id in user_ids]
+        + [_key(FOLLOWERS, author_id) for author_id in author_ids]
+    )
+
+
+def follow(user_id, author_id):
+    """
+    Идемпотентная подписка одним INSERT ... ON CONFLICT DO NOTHING.
+    Сигнал post_save отправляется, только если строка добавлена.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Follow._meta.db_table} (user_id, author_id) '
+            'VALUES (%s, %s) ON CONFLICT DO NOTHING',
+            [user_id, author_id]
+        )
+        created = cursor.rowcount > 0
+    if created:
+        post_save.send(
+            sender=Follow,
+            instance=Follow(user_id=user_id, author_id=author_id),
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=connection.alias
+        )
+    return created
+
+
+def unfollow(user_id, author_id):
+    """Идемпотентная отписка одним DELETE с post_delete при удалении."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Follow._meta.db_table} '
+            'WHERE user_id = %s AND author_id = %s',
+            [user_id, author_id]
+        )
+        deleted = cursor.rowcount > 0
+    if deleted:
+        post_delete.send(
+            sender=Follow,
+            instance=Follow(user_id=user_id, author_id=author_id),
+            using=connection.alias
+        )
+    return deleted
@@ -0,0 +1,355 @@
+"""
+Потоковый импорт постов, комментариев и подписок.
+
+Записи читаются из JSONL или CSV по одной и проверяются правилами
+PostForm и CommentForm. Имена пользователей и slug сообществ
+переводятся в id по словарям, загруженным один раз. Пачки
+вставляются bulk_create, каждая в своей транзакции, и в той же
+транзакции сдвигается ImportCheckpoint: прерванный импорт
+продолжается ровно с первой незаписанной записи. В памяти держатся
+только словари и одна пачка, сколько бы строк ни было во входе.
+
+bulk_create не отправляет сигналы, поэтому счётчики, ленты и
+поисковый индекс пересчитываются в транзакции пачки только для
+вставленных строк, а тренды после импорта вливает trending.update.
+"""
+import csv
+import itertools
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.forms import modelform_factory
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, graph, page_cache, search, timeline, versions
+from .forms import CommentForm, PostForm
+from .models import Comment, Follow, Group, ImportCheckpoint, Post, Profile
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+USER_NOT_FOUND = 'Пользователь не найден'
+GROUP_NOT_FOUND = 'Сообщество не найдено'
+POST_NOT_FOUND = 'Пост не найден'
+POST_EXISTS = 'Пост с таким id уже есть'
+BAD_DATE = 'Неверная дата'
+BAD_ID = 'Неверный id'
+BAD_JSON = 'Неверный JSON'
+NOT_OBJECT = 'Запись должна быть объектом'
+SELF_FOLLOW = 'Нельзя подписаться на себя'
+
+# PostForm без поля group: сообщество ищется по slug в словаре,
+# а не запросом ModelChoiceField на каждую запись
+PostTextForm = modelform_factory(Post, form=PostForm, fields=['text'])
+
+
+class RecordError(Exception):
+    """Запись не прошла проверку; errors — {поле: [сообщения]}."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def read_records(stream, data_format, skip=0):
+    """
+    Записи входа по одной, начиная с номера skip + 1.
+    Возвращает пары (номер записи, запись): словарь полей CSV
+    или строку JSONL, которую разбирает fields.
+    """
+    if data_format == 'csv':
+        rows = csv.DictReader(stream)
+        yield from itertools.islice(enumerate(rows, 1), skip, None)
+        return
+    lines = (line for line in stream if line.strip())
+    yield from itertools.islice(enumerate(lines, 1), skip, None)
+
+
+def fields(record):
+    """
+    Словарь полей записи. Битая строка JSONL или JSON не объект
+    отклоняют только свою запись.
+    """
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except json.JSONDecodeError:
+            raise RecordError({NON_FIELD_ERRORS: [BAD_JSON]})
+    if not isinstance(record, dict):
+        raise RecordError({NON_FIELD_ERRORS: [NOT_OBJECT]})
+    return record
+
+
+def _date(value):
+    if not value:
+        return timezone.now()
+    try:
+        date = parse_datetime(value)
+    except (TypeError, ValueError):
+        date = None
+    if date is None:
+        raise RecordError({'date': [BAD_DATE]})
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError({'id': [BAD_ID]})
+
+
+def _form_errors(form):
+    return {field: list(errors) for field, errors in form.errors.items()}
+
+
+class Importer:
+    """Преобразует записи одного вида в объекты и вставляет пачками."""
+    model = None
+    ignore_conflicts = False
+    # вливать ли после импорта новые записи в тренды
+    updates_trending = False
+
+    def __init__(self):
+        self.users = dict(User.objects.values_list('username', 'pk'))
+
+    def user_id(self, record, field):
+        username = record.get(field)
+        user_id = (
+            self.users.get(username) if isinstance(username, str) else None
+        )
+        if user_id is None:
+            raise RecordError({field: [USER_NOT_FOUND]})
+        return user_id
+
+    def build(self, record):
+        raise NotImplementedError
+
+    def check_batch(self, objects):
+        """Отсеивает объекты, которые нельзя вставить; ошибки по номерам."""
+        return objects, {}
+
+    def after_batch(self, objects):
+        pass
+
+    def insert(self, objects):
+        """
+        Вставляет пачку и возвращает queryset вставленных строк.
+        bulk_create в SQLite не возвращает id, поэтому строки ищутся
+        по id больше прежнего максимума; попавшие туда параллельные
+        вставки пересчитываются безвредно.
+        """
+        last = self.model.objects.aggregate(last=Max('pk'))['last'] or 0
+        given = [instance.pk for instance in objects
+                 if instance.pk is not None]
+        self.model.objects.bulk_create(
+            objects, ignore_conflicts=self.ignore_conflicts
+        )
+        return self.model.objects.filter(Q(pk__gt=last) | Q(pk__in=given))
+
+    def refresh(self, inserted):
+        """Пересчитывает счётчики, ленты и индекс для вставленных строк."""
+
+
+class PostImporter(Importer):
+    model = Post
+    updates_trending = True
+
+    def __init__(self):
+        super().__init__()
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+
+    def build(self, record):
+        form = PostTextForm(data={'text': record.get('text')})
+        if not form.is_valid():
+            raise RecordError(_form_errors(form))
+        post = form.save(commit=False)
+        post.author_id = self.user_id(record, 'author')
+        slug = record.get('group')
+        if slug:
+            post.group_id = (
+                self.groups.get(slug) if isinstance(slug, str) else None
+            )
+            if post.group_id is None:
+                raise RecordError({'group': [GROUP_NOT_FOUND]})
+        post.pub_date = _date(record.get('pub_date'))
+        if record.get('id'):
+            post.pk = _pk(record['id'])
+        return post
+
+    def check_batch(self, objects):
+        ids = [post.pk for _, post in objects if post.pk is not None]
+        if not ids:
+            return objects, {}
+        existing = set(
+            Post.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        return (
+            [(number, post) for number, post in objects
+             if post.pk not in existing],
+            {number: {'id': [POST_EXISTS]} for number, post in objects
+             if post.pk in existing}
+        )
+
+    def refresh(self, inserted):
+        posts = list(inserted.only('text', 'author', 'pub_date'))
+        counters.recount_profiles(Profile.objects.filter(
+            user_id__in={post.author_id for post in posts}
+        ))
+        for post in posts:
+            search.index(
+                search.KIND_POST, post.pk, post.text, post.pk, post.author_id
+            )
+            timeline.fan_out(post)
+
+    def after_batch(self, objects):
+        scopes = {versions.INDEX}
+        for post in objects:
+            scopes.add(versions.author_scope(post.author_id))
+            if post.group_id is not None:
+                scopes.add(versions.group_scope(post.group_id))
+            scopes.update(
+                versions.syndication_scopes(post.author_id, post.group_id)
+            )
+        versions.bump(*scopes)
+        page_cache.purge(
+            page_cache.FEED_INDEX,
+            *{page_cache.author_key(post.author_id) for post in objects},
+            *page_cache.group_keys(*{post.group_id for post in objects})
+        )
+
+
+class CommentImporter(Importer):
+    model = Comment
+    updates_trending = True
+
+    def build(self, record):
+        form = CommentForm(data={'text': record.get('text')})
+        if not form.is_valid():
+            raise RecordError(_form_errors(form))
+        comment = form.save(commit=False)
+        comment.author_id = self.user_id(record, 'author')
+        comment.post_id = _pk(record.get('post'))
+        comment.created = _date(record.get('created'))
+        return comment
+
+    def check_batch(self, objects):
+        existing = set(Post.objects.filter(
+            pk__in={comment.post_id for _, comment in objects}
+        ).values_list('pk', flat=True))
+        return (
+            [(number, comment) for number, comment in objects
+             if comment.post_id in existing],
+            {number: {'post': [POST_NOT_FOUND]}
+             for number, comment in objects
+             if comment.post_id not in existing}
+        )
+
+    def refresh(self, inserted):
+        comments = inserted.values_list('pk', 'text', 'post_id', 'author_id')
+        post_ids = set()
+        for pk, text, post_id, author_id in comments:
+            search.index(search.KIND_COMMENT, pk, text, post_id, author_id)
+            post_ids.add(post_id)
+        counters.recount_posts(Post.objects.filter(pk__in=post_ids))
+
+    def after_batch(self, objects):
+        post_ids = {comment.post_id for comment in objects}
+        versions.bump(*[versions.post_scope(pk) for pk in post_ids])
+        page_cache.purge(*[page_cache.post_key(pk) for pk in post_ids])
+
+
+class FollowImporter(Importer):
+    model = Follow
+    ignore_conflicts = True
+
+    def build(self, record):
+        follow = Follow(
+            user_id=self.user_id(record, 'user'),
+            author_id=self.user_id(record, 'author')
+        )
+        if follow.user_id == follow.author_id:
+            raise RecordError({'author': [SELF_FOLLOW]})
+        return follow
+
+    def refresh(self, inserted):
+        follows = list(inserted.values_list('user_id', 'author_id'))
+        counters.recount_profiles(Profile.objects.filter(
+            user_id__in={pk for follow in follows for pk in follow}
+        ))
+        for user_id, author_id in follows:
+            timeline.backfill(user_id, author_id)
+
+    def after_batch(self, objects):
+        user_ids = {follow.user_id for follow in objects}
+        author_ids = {follow.author_id for follow in objects}
+        graph.invalidate(user_ids, author_ids)
+        Profile.objects.filter(
+            user_id__in=user_ids | author_ids
+        ).update(suggestions_stale_since=timezone.now())
+        versions.bump(*(
+            [versions.viewer_scope(user_id) for user_id in user_ids]
+            + [versions.author_scope(pk) for pk in user_ids | author_ids]
+        ))
+        page_cache.purge(*[
+            page_cache.author_key(pk) for pk in user_ids | author_ids
+        ])
+
+
+IMPORTERS = {
+    'posts': PostImporter,
+    'comments': CommentImporter,
+    'follows': FollowImporter,
+}
+
+
+def checkpoint(source):
+    item, _ = ImportCheckpoint.objects.get_or_create(source=source)
+    return item
+
+
+def run(importer, records, source, batch_size, on_batch=None,
+        on_reject=None, refresh=True):
+    """
+    Импортирует записи пачками по batch_size. Каждая пачка, пересчёт
+    для неё (если refresh) и сдвиг точки source коммитятся вместе.
+    on_batch(точка) вызывается после каждой пачки, on_reject(номер,
+    ошибки) — для отклонённых записей. Возвращает итоговую точку.
+    """
+    on_batch = on_batch or (lambda item: None)
+    on_reject = on_reject or (lambda number, errors: None)
+    item = checkpoint(source)
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return item
+        objects, rejected = [], {}
+        for number, record in batch:
+            try:
+                objects.append((number, importer.build(fields(record))))
+            except RecordError as error:
+                rejected[number] = error.errors
+        objects, invalid = importer.check_batch(objects)
+        rejected.update(invalid)
+        instances = [instance for _, instance in objects]
+        with transaction.atomic():
+            inserted = importer.insert(instances)
+            if refresh and instances:
+                importer.refresh(inserted)
+            ImportCheckpoint.objects.filter(pk=item.pk).update(
+                position=batch[-1][0],
+                inserted=F('inserted') + len(instances),
+                rejected=F('rejected') + len(rejected)
+            )
+        importer.after_batch(instances)
+        item.refresh_from_db()
+        for number in sorted(rejected):
+            on_reject(number, rejected[number])
+        on_batch(item)
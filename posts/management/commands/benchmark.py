@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+from posts import benchmark
+
+DEFAULT_REPEAT = 20
+DEFAULT_TOLERANCE = 0.25
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу реалистичными объёмами и замеряет каждый URL '
+        'приложения posts: число запросов, время и пик памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help='Доля от полного объёма (100k пользователей, 1M постов, '
+                 '5M подписок, 2M комментариев).'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=DEFAULT_REPEAT,
+            help='Сколько раз замерять каждый URL.'
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Не очищать кэш между запросами.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора случайных данных.'
+        )
+        parser.add_argument(
+            '--in-place',
+            action='store_true',
+            help='Работать с настроенной базой, а не с временной тестовой. '
+                 'Маршруты, меняющие данные, при этом не замеряются.'
+        )
+        parser.add_argument(
+            '--no-seed',
+            action='store_true',
+            help='Не наполнять базу, замерять имеющиеся данные.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Куда записать JSON-отчёт.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON-отчёт, с которым сравнить результаты.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help='Допустимый рост времени p95 и памяти, доля от эталона.'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            baseline = benchmark.load(options['baseline'])
+        verbosity = options['verbosity']
+        old_config = None
+        if not options['in_place']:
+            old_config = setup_databases(verbosity, interactive=False)
+        try:
+            report = self.run(options)
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity)
+
+        if options['output']:
+            benchmark.dump(report, options['output'])
+            self.stdout.write(f'Отчёт записан в {options["output"]}')
+        if baseline is not None:
+            regressions = benchmark.compare(
+                baseline, report, options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write('Регрессий относительно эталона нет.')
+
+    def run(self, options):
+        volumes = None
+        if not options['no_seed']:
+            volumes = benchmark.seed(
+                options['scale'], options['seed'], log=self.stdout.write
+            )
+        urls = benchmark.measure(
+            options['repeat'],
+            options['warm'],
+            log=self.stdout.write,
+            mutating=not options['in_place']
+        )
+        return {
+            'meta': {
+                'scale': options['scale'],
+                'repeat': options['repeat'],
+                'warm': options['warm'],
+                'vendor': connection.vendor,
+                'volumes': volumes,
+            },
+            'urls': urls,
+        }
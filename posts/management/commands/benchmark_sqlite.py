@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from posts import sqlite_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения и записи стандартного '
+        'бэкенда SQLite и yatube.sqlite_backend под конкурентными потоками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Число конкурентных потоков.'
+        )
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=500,
+            help='Операций на поток.'
+        )
+        parser.add_argument(
+            '--write-share',
+            type=float,
+            default=0.2,
+            help='Доля операций записи.'
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=100,
+            help='Число постов, между которыми распределяются операции.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора операций.'
+        )
+
+    def handle(self, *args, **options):
+        header = (
+            f'{"бэкенд":<8} {"чтений/с":>10} {"записей/с":>10} '
+            f'{"ошибок":>8} {"секунд":>8}'
+        )
+        self.stdout.write(header)
+        for label in sqlite_benchmark.BACKENDS:
+            result = sqlite_benchmark.run(
+                label,
+                threads=options['threads'],
+                operations=options['operations'],
+                write_share=options['write_share'],
+                posts=options['posts'],
+                seed=options['seed']
+            )
+            self.stdout.write(
+                f'{label:<8} {result["reads_per_second"]:>10} '
+                f'{result["writes_per_second"]:>10} '
+                f'{result["errors"]:>8} {result["seconds"]:>8}'
+            )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import media
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы медиа, на которые не ссылается ни один пост.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=settings.MEDIA_GC_GRACE,
+            help='Не трогать файлы моложе стольких секунд.'
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Сначала пересчитать ссылки по постам.'
+        )
+
+    def handle(self, *args, grace, **options):
+        if options['recount']:
+            fixed = media.recount()
+            self.stdout.write(f'Исправлено счётчиков ссылок: {fixed}')
+        removed = media.collect_unreferenced(grace)
+        self.stdout.write(f'Удалено файлов: {removed}')
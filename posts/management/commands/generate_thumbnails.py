@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from posts import tasks, thumbnails
+from posts.management.utils import pk_batches
+from posts.models import Post
+
+DEFAULT_WORKERS = 4
+DEFAULT_CHUNK_SIZE = 16
+BATCHES_PER_WORKER = 8
+
+
+class Command(BaseCommand):
+    help = (
+        'Нормализует картинки постов и строит варианты для srcset '
+        'там, где их ещё нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Число процессов; 0 — строить в текущем процессе.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Сколько постов передавать процессу за раз.'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить и уже обработанные картинки.'
+        )
+
+    def handle(self, *args, workers, chunk_size, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(thumbnail='')
+        batch_size = chunk_size * max(workers, 1) * BATCHES_PER_WORKER
+        executor = tasks.get_executor(workers) if workers else None
+        done = 0
+        try:
+            for first, last in pk_batches(posts, batch_size):
+                post_ids = list(
+                    posts.filter(pk__range=(first, last))
+                    .values_list('pk', flat=True)
+                )
+                if executor is not None:
+                    results = executor.map(
+                        thumbnails.process_image, post_ids,
+                        chunksize=chunk_size
+                    )
+                else:
+                    results = map(thumbnails.process_image, post_ids)
+                for result in results:
+                    if result is not None:
+                        thumbnails.image_processed(result)
+                        done += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(f'Обработано картинок: {done}')
@@ -0,0 +1,117 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer, trending
+from posts.models import ImportCheckpoint
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_REPORT_EVERY = 10
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты, комментарии или подписки '
+        'из JSONL или CSV с продолжением после сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с записями.')
+        parser.add_argument(
+            '--kind',
+            choices=sorted(importer.IMPORTERS),
+            required=True,
+            help='Что импортировать.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=importer.FORMATS,
+            help='Формат входа; по умолчанию по расширению файла.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Сколько записей вставлять одной транзакцией.'
+        )
+        parser.add_argument(
+            '--report-every',
+            type=int,
+            default=DEFAULT_REPORT_EVERY,
+            help='Печатать скорость раз в столько пачек.'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать с первой записи, забыв сохранённую точку.'
+        )
+        parser.add_argument(
+            '--no-rebuild',
+            action='store_true',
+            help=(
+                'Не пересчитывать счётчики, ленты, индекс и тренды '
+                'для импортированных записей.'
+            )
+        )
+
+    def handle(self, *args, path, kind, batch_size, report_every, **options):
+        data_format = options['format'] or os.path.splitext(path)[1][1:]
+        if data_format not in importer.FORMATS:
+            raise CommandError(
+                f'Укажите --format: {", ".join(importer.FORMATS)}.'
+            )
+        source = f'{kind}:{os.path.abspath(path)}'
+        if options['restart']:
+            ImportCheckpoint.objects.filter(source=source).delete()
+        start = importer.checkpoint(source)
+        if start.position:
+            self.stdout.write(f'Продолжение с записи {start.position + 1}')
+        started = time.perf_counter()
+        batches = 0
+        reported = 0
+
+        def rate(item):
+            elapsed = time.perf_counter() - started
+            processed = item.position - start.position
+            return processed / elapsed if elapsed else 0.0
+
+        def on_batch(item):
+            nonlocal batches
+            batches += 1
+            if batches % report_every == 0:
+                self.stdout.write(
+                    f'Записей: {item.position}, вставлено: {item.inserted}, '
+                    f'отклонено: {item.rejected}, '
+                    f'{rate(item):.0f} записей/с'
+                )
+
+        def on_reject(number, errors):
+            nonlocal reported
+            reported += 1
+            if reported <= MAX_REPORTED_ERRORS:
+                self.stderr.write(f'Запись {number}: {errors}')
+
+        kind_importer = importer.IMPORTERS[kind]()
+        with open(path, encoding='utf-8', newline='') as stream:
+            item = importer.run(
+                kind_importer,
+                importer.read_records(stream, data_format, start.position),
+                source,
+                batch_size,
+                on_batch,
+                on_reject,
+                refresh=not options['no_rebuild']
+            )
+        self.stdout.write(
+            f'Готово. Записей: {item.position}, '
+            f'вставлено: {item.inserted}, отклонено: {item.rejected}, '
+            f'время: {time.perf_counter() - started:.1f} с, '
+            f'{rate(item):.0f} записей/с'
+        )
+        if options['no_rebuild'] or item.position == start.position:
+            return
+        if kind_importer.updates_trending:
+            updated = trending.update()
+            self.stdout.write(f'Пересчитано постов в трендах: {updated}')
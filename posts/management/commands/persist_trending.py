@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет рейтинги трендов по новым постам и комментариям '
+        'и сохраняет их в базу. Единственный, кто пишет рейтинги; '
+        'запускается периодически, например раз в минуту из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать рейтинги по всем постам и комментариям.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            events = trending.rebuild()
+            self.stdout.write(f'Учтено событий: {events}')
+            return
+        updated = trending.update()
+        self.stdout.write(f'Пересчитано постов: {updated}')
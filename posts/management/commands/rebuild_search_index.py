@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+from posts.models import Comment, Post
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Сколько строк читать и вставлять за раз.'
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        if not search.is_available():
+            raise CommandError('Полнотекстовый индекс требует SQLite FTS5.')
+        with transaction.atomic():
+            total = search.rebuild(
+                Post.objects.order_by(), Comment.objects.order_by(), chunk_size
+            )
+        self.stdout.write(f'Проиндексировано документов: {total}')
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.management.utils import pk_batches
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.TIMELINE_BATCH_SIZE,
+            help='Сколько подписок обрабатывать за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Предварительно удалить все записи лент.'
+        )
+
+    def handle(self, *args, batch_size, clear, **options):
+        if clear:
+            TimelineEntry.objects.all().delete()
+        processed = 0
+        for first, last in pk_batches(Follow.objects.all(), batch_size):
+            follows = Follow.objects.filter(
+                pk__range=(first, last)
+            ).values_list('user_id', 'author_id')
+            with transaction.atomic():
+                for user_id, author_id in follows:
+                    timeline.backfill(user_id, author_id)
+                    processed += 1
+        self.stdout.write(f'Обработано подписок: {processed}')
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import recommendations
+from posts.models import Profile
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» для '
+        'пользователей, чья окрестность в графе подписок изменилась.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Сколько пользователей считать одной матричной пачкой.'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=settings.SUGGESTIONS_COUNT,
+            help='Сколько рекомендаций хранить на пользователя.'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать всех пользователей, а не только изменённых.'
+        )
+
+    def handle(self, *args, batch_size, top, **options):
+        if options['all']:
+            Profile.objects.update(suggestions_stale_since=timezone.now())
+        user_ids = recommendations.stale_users()
+        if not user_ids:
+            self.stdout.write('Пересчёт не нужен.')
+            return
+        graph = recommendations.FollowGraph.load()
+        stored = 0
+        for start in range(0, len(user_ids), batch_size):
+            stored += recommendations.recompute(
+                graph, user_ids[start:start + batch_size], top
+            )
+        self.stdout.write(
+            f'Пользователей: {len(user_ids)}, рекомендаций: {stored}'
+        )
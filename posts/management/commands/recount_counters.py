@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+from posts.management.utils import pk_batches
+from posts.models import Post, Profile
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов и профилей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Сколько строк обрабатывать за одну транзакцию.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        missing = User.objects.filter(profile__isnull=True)
+        for first, last in pk_batches(missing, batch_size):
+            Profile.objects.bulk_create(
+                [
+                    Profile(user_id=pk)
+                    for pk in missing.filter(pk__range=(first, last))
+                    .values_list('pk', flat=True)
+                ],
+                ignore_conflicts=True
+            )
+
+        fixed_posts = 0
+        for first, last in pk_batches(Post.objects.all(), batch_size):
+            with transaction.atomic():
+                fixed_posts += counters.recount_posts(
+                    Post.objects.filter(pk__range=(first, last))
+                )
+
+        fixed_profiles = 0
+        for first, last in pk_batches(Profile.objects.all(), batch_size):
+            with transaction.atomic():
+                fixed_profiles += counters.recount_profiles(
+                    Profile.objects.filter(pk__range=(first, last))
+                )
+
+        self.stdout.write(
+            f'Исправлено постов: {fixed_posts}, '
+            f'профилей: {fixed_profiles}'
+        )
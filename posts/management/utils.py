@@ -0,0 +1,14 @@
+def pk_batches(queryset, batch_size):
+    """Нарезает queryset на диапазоны первичных ключей."""
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last_pk = pks[-1]
@@ -0,0 +1,117 @@
+"""
+Учёт ссылок на файлы ContentAddressedStorage и сборка мусора.
+
+Пост ссылается на файл своей картинки, нормализованная картинка —
+на свои варианты для srcset. Файл без ссылок удаляется после
+коммита транзакции, которая отпустила последнюю ссылку, а его
+варианты отпускаются каскадом.
+"""
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MediaBlob, Post
+
+
+def acquire(name):
+    """Добавляет ссылку на файл; для файлов вне учёта ничего не делает."""
+    MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + 1)
+
+
+def _decrement(name):
+    MediaBlob.objects.filter(name=name).update(
+        refcount=Greatest(F('refcount') - 1, 0)
+    )
+
+
+def release(name):
+    """Отпускает ссылку; файл без ссылок удаляется после коммита."""
+    _decrement(name)
+    transaction.on_commit(lambda: collect([name]))
+
+
+def variants(name):
+    """Сохранённые варианты файла или None, если их ещё не строили."""
+    saved = MediaBlob.objects.filter(name=name).values_list(
+        'variants', flat=True
+    ).first()
+    return json.loads(saved) if saved else None
+
+
+def attach_variants(name, data, files):
+    """
+    Запоминает варианты файла, чтобы другие посты с теми же байтами
+    брали их готовыми, и берёт ссылки на файлы вариантов.
+    """
+    data = dict(data, files=list(files))
+    with transaction.atomic():
+        updated = MediaBlob.objects.filter(name=name, variants='').update(
+            variants=json.dumps(data)
+        )
+        if updated:
+            for variant in files:
+                acquire(variant)
+    return data if updated else variants(name)
+
+
+def collect(names):
+    """
+    Удаляет из names файлы без ссылок вместе с их строками
+    и отпускает их варианты. Возвращает число удалённых файлов.
+    """
+    pending = list(names)
+    removed = 0
+    while pending:
+        name = pending.pop()
+        blob = MediaBlob.objects.filter(name=name, refcount=0).values_list(
+            'pk', 'variants'
+        ).first()
+        if blob is None:
+            continue
+        pk, saved = blob
+        deleted, _ = MediaBlob.objects.filter(pk=pk, refcount=0).delete()
+        if not deleted:
+            continue
+        default_storage.delete(name)
+        removed += 1
+        if saved:
+            for variant in json.loads(saved)['files']:
+                _decrement(variant)
+                pending.append(variant)
+    return removed
+
+
+def collect_unreferenced(grace):
+    """
+    Удаляет файлы без ссылок старше grace: например, загруженные,
+    но так и не попавшие в пост из-за ошибки.
+    """
+    names = MediaBlob.objects.filter(
+        refcount=0, created__lt=timezone.now() - timedelta(seconds=grace)
+    ).values_list('name', flat=True)
+    return collect(list(names.iterator()))
+
+
+def recount():
+    """Пересчитывает ссылки по постам и вариантам."""
+    counts = Counter(
+        Post.objects.exclude(image='').exclude(image__isnull=True)
+        .values_list('image', flat=True).iterator()
+    )
+    for saved in MediaBlob.objects.exclude(variants='').values_list(
+        'variants', flat=True
+    ).iterator():
+        counts.update(json.loads(saved)['files'])
+    fixed = 0
+    blobs = MediaBlob.objects.values_list('pk', 'name', 'refcount')
+    for pk, name, refcount in blobs.iterator():
+        if counts[name] != refcount:
+            MediaBlob.objects.filter(pk=pk).update(refcount=counts[name])
+            fixed += 1
+    return fixed
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE posts_search USING fts5(
+        text,
+        kind UNINDEXED,
+        post_id UNINDEXED,
+        author_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO posts_search (rowid, text, kind, post_id, author_id)
+    SELECT id * 2, text, 'post', id, author_id FROM posts_post
+    """,
+    """
+    INSERT INTO posts_search (rowid, text, kind, post_id, author_id)
+    SELECT id * 2 + 1, text, 'comment', post_id, author_id
+    FROM posts_comment
+    """,
+]
+
+DROP_SQL = [
+    'DROP TABLE IF EXISTS posts_search',
+]
+
+
+def run_sqlite(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, unique=True, verbose_name='scope')),
+                ('ranking', models.TextField(verbose_name='ranking')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='date updated')),
+            ],
+            options={
+                'verbose_name': 'Снимок трендов',
+                'verbose_name_plural': 'Снимки трендов',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_trending_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_srcset',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='image srcset'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_srcset_webp',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='image srcset in webp'),
+        ),
+    ]
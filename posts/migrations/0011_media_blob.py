@@ -0,0 +1,29 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image_srcset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='sha256')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='storage name')),
+                ('size', models.PositiveIntegerField(verbose_name='size')),
+                ('refcount', models.PositiveIntegerField(db_index=True, default=0, verbose_name='references')),
+                ('variants', models.TextField(blank=True, default='', verbose_name='variants')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='date created')),
+            ],
+            options={
+                'verbose_name': 'Файл медиа',
+                'verbose_name_plural': 'Файлы медиа',
+            },
+        ),
+    ]
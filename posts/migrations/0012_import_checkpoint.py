@@ -0,0 +1,28 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_media_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='source')),
+                ('position', models.PositiveIntegerField(default=0, verbose_name='records processed')),
+                ('inserted', models.PositiveIntegerField(default=0, verbose_name='rows inserted')),
+                ('rejected', models.PositiveIntegerField(default=0, verbose_name='records rejected')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='date updated')),
+            ],
+            options={
+                'verbose_name': 'Точка импорта',
+                'verbose_name_plural': 'Точки импорта',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def clear_fresh(apps, schema_editor):
+    Profile = apps.get_model('posts', 'Profile')
+    Profile.objects.using(schema_editor.connection.alias).filter(
+        suggestions_stale=False
+    ).update(
+        suggestions_stale_since=None
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='suggestions_stale_since',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, null=True, verbose_name='suggestions stale since'),
+        ),
+        migrations.RunPython(clear_fresh, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='suggestions_stale',
+        ),
+    ]
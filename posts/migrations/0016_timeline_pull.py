@@ -0,0 +1,29 @@
+# Generated by Django 2.2.6 on 2026-10-18 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pull_authors(apps, schema_editor):
+    Profile = apps.get_model('posts', 'Profile')
+    Profile.objects.using(schema_editor.connection.alias).filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(
+        timeline_pull=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_import_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='timeline_pull',
+            field=models.BooleanField(default=False, editable=False, verbose_name='timeline pull'),
+        ),
+        migrations.RunPython(mark_pull_authors, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import F, ForeignKey, Q
+from django.db.models import (BooleanField, Case, Exists, F, ForeignKey,
+                              OuterRef, Q, Value, When)
+from django.utils import timezone
+
+from .rows import CommentRow, CommentRowIterable, FeedRow, FeedRowIterable
 
 User = get_user_model()
 
@@ -21,12 +25,57 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    FEED_FIELDS = (
+        'text', 'pub_date', 'image', 'thumbnail', 'image_srcset',
+        'image_srcset_webp', 'comments_count', 'author', 'author__username',
+        'group', 'group__slug', 'group__title',
+    )
+
+    def for_feed(self, viewer=None):
+        """
+        Посты для карточек ленты: автор и сообщество одним запросом,
+        только показываемые колонки и флаги отношения зрителя к посту.
+        """
+        queryset = self.select_related('author', 'group').only(
+            *self.FEED_FIELDS
+        )
+        if viewer is None or not viewer.is_authenticated:
+            return queryset.annotate(
+                is_own=Value(False, output_field=BooleanField()),
+                author_followed=Value(False, output_field=BooleanField()),
+            )
+        return queryset.annotate(
+            is_own=Case(
+                When(author_id=viewer.pk, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            ),
+            author_followed=Exists(
+                Follow.objects.filter(
+                    user_id=viewer.pk, author_id=OuterRef('author_id')
+                )
+            ),
+        )
+
+    def as_rows(self):
+        """Тот же запрос, но вместо экземпляров Post отдаёт FeedRow."""
+        queryset = self.values(*FeedRow.FIELDS)
+        queryset._iterable_class = FeedRowIterable
+        return queryset
+
+
 class Post(models.Model):
     """
     Модель для объекта Post.
     """
     text = models.TextField('Posts text')
-    pub_date = models.DateTimeField('date published', auto_now_add=True)
+    # не auto_now_add: импорт передаёт даты источника в bulk_create
+    pub_date = models.DateTimeField(
+        'date published',
+        default=timezone.now,
+        editable=False
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -40,16 +89,65 @@ class Post(models.Model):
         related_name='posts'
     )
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    thumbnail = models.CharField(
+        'thumbnail url',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+    image_srcset = models.TextField(
+        'image srcset',
+        blank=True,
+        default='',
+        editable=False
+    )
+    image_srcset_webp = models.TextField(
+        'image srcset in webp',
+        blank=True,
+        default='',
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'comments count',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        # под ключ курсора FEED_ORDERING: лента идёт по индексу
+        # без сортировки во временном B-дереве
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
+class CommentQuerySet(models.QuerySet):
+    def as_rows(self):
+        """Комментарии с авторами в виде CommentRow."""
+        queryset = self.values(*CommentRow.FIELDS)
+        queryset._iterable_class = CommentRowIterable
+        return queryset
+
+
 class Comment(models.Model):
     """Модель для объекта Комментарий."""
     post = models.ForeignKey(
@@ -63,12 +161,24 @@ class Comment(models.Model):
         related_name='comments'
     )
     text = models.TextField('Comment text')
-    created = models.DateTimeField('date created', auto_now_add=True)
+    created = models.DateTimeField(
+        'date created',
+        default=timezone.now,
+        editable=False
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_thread_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -98,6 +208,186 @@ class Follow(models.Model):
                 name='self_following'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Пользователь {self.user} подписан на {self.author}'
+
+
+class Profile(models.Model):
+    """Денормализованные счётчики активности пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile'
+    )
+    posts_count = models.PositiveIntegerField('posts count', default=0)
+    followers_count = models.PositiveIntegerField(
+        'followers count',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'following count',
+        default=0
+    )
+    # автор хоть раз превысил TIMELINE_FANOUT_LIMIT: его посты больше
+    # не раскладываются по лентам и читаются при запросе, даже если
+    # подписчиков снова стало меньше
+    timeline_pull = models.BooleanField(
+        'timeline pull',
+        default=False,
+        editable=False
+    )
+    # когда рекомендации устарели в последний раз; None — актуальны
+    suggestions_stale_since = models.DateTimeField(
+        'suggestions stale since',
+        null=True,
+        default=timezone.now,
+        db_index=True,
+        editable=False
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return f'Профиль {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField('date published')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class Suggestion(models.Model):
+    """Предрассчитанная рекомендация «на кого подписаться»."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions'
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField('score')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'suggested'],
+                name='unique_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.suggested} для {self.user}'
+
+
+class TrendingSnapshot(models.Model):
+    """Сохранённый рейтинг области трендов: id и логарифмы счётов."""
+    scope = models.CharField('scope', max_length=64, unique=True)
+    ranking = models.TextField('ranking')
+    updated = models.DateTimeField('date updated', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Снимок трендов'
+        verbose_name_plural = 'Снимки трендов'
+
+    def __str__(self):
+        return self.scope
+
+
+class MediaBlob(models.Model):
+    """
+    Файл медиа, хранящийся один раз под хэшем своего содержимого.
+    refcount — сколько постов и других блобов на него ссылается.
+    """
+    digest = models.CharField('sha256', max_length=64, unique=True)
+    name = models.CharField('storage name', max_length=255, unique=True)
+    size = models.PositiveIntegerField('size')
+    refcount = models.PositiveIntegerField(
+        'references',
+        default=0,
+        db_index=True
+    )
+    variants = models.TextField('variants', blank=True, default='')
+    created = models.DateTimeField('date created', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Файл медиа'
+        verbose_name_plural = 'Файлы медиа'
+
+    def __str__(self):
+        return self.name
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника импорта уже обработано."""
+    source = models.CharField('source', max_length=255, unique=True)
+    position = models.PositiveIntegerField('records processed', default=0)
+    inserted = models.PositiveIntegerField('rows inserted', default=0)
+    rejected = models.PositiveIntegerField('records rejected', default=0)
+    updated = models.DateTimeField('date updated', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Точка импорта'
+        verbose_name_plural = 'Точки импорта'
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
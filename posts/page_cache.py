@@ -0,0 +1,199 @@
+"""
+Кэш целых страниц для анонимных читателей.
+
+Ответ помечается суррогатными ключами: post:<id>, author:<id>,
+group:<slug>, feed:index. Страницы списков получают и ключи всех
+показанных постов, поэтому правка поста или новый комментарий
+сбрасывают каждую страницу, где пост виден. Для каждого ключа
+в кэше лежит множество страниц с этим ключом; запись в Post,
+Comment и Follow сбрасывает по нему ровно затронутые страницы.
+
+Те же ключи уходят в заголовке Surrogate-Key, чтобы их мог
+использовать внешний кэш перед приложением. Сброс выполняют
+очистители из PAGE_CACHE_PURGERS: CachePurger чистит кэш
+приложения, UpstreamPurger шлёт PURGE на PAGE_CACHE_UPSTREAMS.
+Индекс ключей обновляется без блокировок, поэтому в редкой гонке
+страница может не попасть в индекс и прожить до PAGE_CACHE_TIMEOUT.
+"""
+import hashlib
+import urllib.request
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.utils.module_loading import import_string
+from yatube.routers import reads_replica
+
+from .models import Group
+
+FEED_INDEX = 'feed:index'
+PAGE_KEY = 'page:{digest}'
+INDEX_KEY = 'surrogate:{key}'
+HEADER = 'Surrogate-Key'
+PURGE_METHOD = 'PURGE'
+
+
+def post_key(post_id):
+    return f'post:{post_id}'
+
+
+def author_key(author_id):
+    return f'author:{author_id}'
+
+
+def group_key(slug):
+    return f'group:{slug}'
+
+
+def group_keys(*group_ids):
+    """Ключи страниц сообществ по их id."""
+    ids = {group_id for group_id in group_ids if group_id is not None}
+    if not ids:
+        return []
+    return [
+        group_key(slug) for slug in
+        Group.objects.filter(pk__in=ids).values_list('slug', flat=True)
+    ]
+
+
+def listing_keys(author_id, group_id):
+    """Ключи списков, в которые попадает новый пост."""
+    return [FEED_INDEX, author_key(author_id), *group_keys(group_id)]
+
+
+def tag(request, *keys, posts=()):
+    """
+    Помечает ответ на request ключами keys и ключами постов posts.
+    posts перебираются, только если страница сохраняется в кэш.
+    """
+    request.surrogate_keys = [*getattr(request, 'surrogate_keys', ()), *keys]
+    request.surrogate_posts = posts
+
+
+def _response_keys(request, posts=True):
+    """
+    Ключи ответа. Без posts — только ключи самой страницы: перебор
+    постов выполнил бы запрос ленты, которую скрыл кэш фрагментов.
+    """
+    keys = dict.fromkeys(getattr(request, 'surrogate_keys', ()))
+    if not posts:
+        return list(keys)
+    keys.update(
+        (post_key(post.pk), None)
+        for post in getattr(request, 'surrogate_posts', ())
+    )
+    return list(keys)
+
+
+def _page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(digest=digest)
+
+
+def _index_key(key):
+    return INDEX_KEY.format(key=key)
+
+
+def _store(page_key, response, keys):
+    timeout = settings.PAGE_CACHE_TIMEOUT
+    cache.set(
+        page_key,
+        (response.status_code, list(response.items()), response.content),
+        timeout
+    )
+    index_keys = [_index_key(key) for key in keys]
+    indexes = cache.get_many(index_keys)
+    cache.set_many({
+        index_key: indexes.get(index_key, set()) | {page_key}
+        for index_key in index_keys
+    }, timeout)
+
+
+def _restore(cached):
+    status, headers, content = cached
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def anonymous_page(view):
+    """
+    Отдаёт анонимным GET и HEAD сохранённую страницу, а при промахе
+    сохраняет ответ с ключами, которыми его пометило представление.
+    Ставится снаружи conditional_page: валидаторы берутся из
+    сохранённого ответа, и попадание не обращается к базе.
+    Ответы, прочитанные с реплики, не сохраняются.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            response = view(request, *args, **kwargs)
+            keys = _response_keys(request, posts=False)
+            if keys:
+                response[HEADER] = ' '.join(keys)
+            return response
+        page_key = _page_key(request)
+        cached = cache.get(page_key)
+        if cached is not None:
+            response = _restore(cached)
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')
+                ),
+                response=response
+            )
+        response = view(request, *args, **kwargs)
+        keys = _response_keys(request)
+        if not keys:
+            return response
+        response[HEADER] = ' '.join(keys)
+        if (response.status_code == 200 and not response.cookies
+                and not reads_replica()):
+            response['Surrogate-Control'] = (
+                f'max-age={settings.PAGE_CACHE_TIMEOUT}'
+            )
+            _store(page_key, response, keys)
+        return response
+    return wrapper
+
+
+class CachePurger:
+    """Сбрасывает страницы из кэша приложения по индексу ключей."""
+
+    def purge(self, keys):
+        index_keys = [_index_key(key) for key in keys]
+        pages = set().union(*cache.get_many(index_keys).values())
+        cache.delete_many([*pages, *index_keys])
+
+
+class UpstreamPurger:
+    """Шлёт PURGE с заголовком Surrogate-Key на PAGE_CACHE_UPSTREAMS."""
+
+    def purge(self, keys):
+        for url in settings.PAGE_CACHE_UPSTREAMS:
+            request = urllib.request.Request(
+                url, method=PURGE_METHOD, headers={HEADER: ' '.join(keys)}
+            )
+            try:
+                urllib.request.urlopen(
+                    request, timeout=settings.PAGE_CACHE_PURGE_TIMEOUT
+                ).close()
+            except OSError:
+                # внешний кэш сам забудет страницу по Surrogate-Control
+                pass
+
+
+def purge(*keys):
+    """Сбрасывает страницы с любым из ключей всеми очистителями."""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    for path in settings.PAGE_CACHE_PURGERS:
+        import_string(path)().purge(keys)
@@ -0,0 +1,224 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DIRECTION_NEXT = 'n'
+DIRECTION_PREVIOUS = 'p'
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('-created', '-id')
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и значения ключа в непрозрачный токен."""
+    raw = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    payload = json.dumps({'d': direction, 'k': raw}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Распаковывает токен курсора.
+    Для пустого или испорченного токена возвращает (None, None).
+    """
+    if not token:
+        return None, None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, values = payload['d'], payload['k']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None, None
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREVIOUS):
+        return None, None
+    if not isinstance(values, list):
+        return None, None
+    return direction, values
+
+
+class CursorPage:
+    """
+    Страница выдачи курсорного паджинатора.
+
+    Запрос выполняется при первом обращении к содержимому страницы,
+    поэтому страница, отрисованная из кэша, не обращается к базе.
+    """
+    is_cursor = True
+
+    def __init__(self, paginator, cursor=None):
+        self.paginator = paginator
+        self.cursor = cursor
+        self._object_list = None
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def _load(self):
+        if self._object_list is None:
+            (
+                self._object_list, self._next_cursor, self._previous_cursor
+            ) = self.paginator.load(self.cursor)
+
+    @property
+    def object_list(self):
+        self._load()
+        return self._object_list
+
+    @property
+    def next_cursor(self):
+        self._load()
+        return self._next_cursor
+
+    @property
+    def previous_cursor(self):
+        self._load()
+        return self._previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Паджинатор по ключу (keyset pagination).
+
+    Вместо OFFSET страница выбирается условием на значения ключа
+    сортировки последней показанной записи, поэтому стоимость запроса
+    не зависит от глубины страницы, а COUNT(*) не выполняется вовсе.
+    Последнее поле ordering должно быть уникальным (обычно id).
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING,
+                 transform=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.transform = transform
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering
+        ]
+
+    def _reversed_ordering(self):
+        return tuple(
+            name if descending else f'-{name}'
+            for name, descending in self.fields
+        )
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name, _ in self.fields]
+
+    def _parse_values(self, values):
+        if len(values) != len(self.fields):
+            raise ValidationError('Неверная длина ключа курсора')
+        model = self.object_list.model
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(self.fields, values)
+        ]
+
+    def _seek(self, values, forward):
+        """Условие «строго после ключа» в заданном направлении обхода."""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _fetch(self, queryset):
+        return list(queryset[:self.per_page + 1])
+
+    def _decode(self, cursor):
+        direction, values = decode_cursor(cursor)
+        if direction is not None:
+            try:
+                values = self._parse_values(values)
+            except (ValidationError, TypeError, ValueError):
+                return None, None
+        return direction, values
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу, соответствующую токену курсора."""
+        return CursorPage(self, cursor)
+
+    def window_key(self, cursor=None):
+        """
+        Ключ самой новой строки страницы без выборки самих строк:
+        читаются только колонки сортировки. None для пустой страницы.
+        """
+        direction, values = self._decode(cursor)
+        names = [name for name, _ in self.fields]
+        if direction == DIRECTION_PREVIOUS:
+            keys = list(
+                self.object_list
+                .order_by(*self._reversed_ordering())
+                .filter(self._seek(values, False))
+                .values_list(*names)[:self.per_page]
+            )
+            if not keys:
+                return self.window_key(None)
+            return keys[-1]
+        queryset = self.object_list.order_by(*self.ordering)
+        if direction == DIRECTION_NEXT:
+            queryset = queryset.filter(self._seek(values, True))
+        return queryset.values_list(*names).first()
+
+    def load(self, cursor=None):
+        """
+        Выбирает строки страницы.
+        Возвращает (строки, курсор следующей, курсор предыдущей).
+        """
+        direction, values = self._decode(cursor)
+        queryset = self.object_list.order_by(*self.ordering)
+
+        if direction is None:
+            rows = self._fetch(queryset)
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+        elif direction == DIRECTION_NEXT:
+            rows = self._fetch(queryset.filter(self._seek(values, True)))
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+        else:
+            rows = self._fetch(
+                self.object_list
+                .order_by(*self._reversed_ordering())
+                .filter(self._seek(values, False))
+            )
+            if not rows:
+                return self.load(None)
+            has_next, has_previous = True, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(DIRECTION_NEXT, self._key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(
+                DIRECTION_PREVIOUS, self._key(rows[0])
+            )
+        if self.transform is not None:
+            rows = self.transform(rows)
+        return rows, next_cursor, previous_cursor
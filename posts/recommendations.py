@@ -0,0 +1,197 @@
+"""
+Рекомендации «на кого подписаться».
+
+Граф подписок загружается в разреженную матрицу F (F[u, a] = 1,
+если u подписан на a). Для пачки пользователей U считаются:
+
+* друзья друзей — F[U] @ F, число путей длины два до кандидата;
+* совместные подписки — пользователи, чьи подписки пересекаются
+  с подписками u (F[U] @ F.T, не больше SIMILAR_USERS самых похожих),
+  голосуют за своих авторов.
+
+Итоговый счёт — сумма путей и нормированных голосов с весом
+CO_FOLLOW_WEIGHT. Уже отслеживаемые авторы и сам пользователь
+исключаются, недостающие места добирают самые популярные авторы.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from . import versions
+from .models import Follow, Profile, Suggestion
+
+CO_FOLLOW_WEIGHT = 0.5
+POPULAR_WEIGHT = 0.01
+SIMILAR_USERS = 50
+LOAD_CHUNK_SIZE = 100000
+
+
+class FollowGraph:
+    """Граф подписок: матрица смежности и соответствие id строкам."""
+
+    def __init__(self, user_ids, author_ids):
+        self.ids = np.unique(np.concatenate([user_ids, author_ids]))
+        rows = np.searchsorted(self.ids, user_ids)
+        columns = np.searchsorted(self.ids, author_ids)
+        size = len(self.ids)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(size, size)
+        )
+        self.transposed = self.matrix.T.tocsr()
+        followers = np.asarray(self.matrix.sum(axis=0)).ravel()
+        self.popular = np.argsort(-followers, kind='stable')
+        self.followers = followers
+        self.loaded_at = timezone.now()
+
+    @classmethod
+    def load(cls):
+        """
+        Читает таблицу Follow потоком в массивы numpy. loaded_at —
+        момент до начала чтения: отметки позже него граф мог не учесть.
+        """
+        loaded_at = timezone.now()
+        user_ids, author_ids = [], []
+        pairs = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in pairs.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            user_ids.append(user_id)
+            author_ids.append(author_id)
+        graph = cls(
+            np.array(user_ids, dtype=np.int64),
+            np.array(author_ids, dtype=np.int64)
+        )
+        graph.loaded_at = loaded_at
+        return graph
+
+    def rows_for(self, user_ids):
+        """Строки матрицы для user_ids; -1 для отсутствующих в графе."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(user_ids), -1)
+        rows = np.searchsorted(self.ids, user_ids)
+        rows = np.minimum(rows, len(self.ids) - 1)
+        return np.where(self.ids[rows] == user_ids, rows, -1)
+
+
+def _keep_top(matrix, count):
+    """Оставляет в каждой строке csr-матрицы count наибольших значений."""
+    matrix = matrix.tocsr()
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if end - start > count:
+            data = matrix.data[start:end]
+            data[np.argpartition(data, -count)[:-count]] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def _row_max(matrix):
+    peak = matrix.max(axis=1).toarray().ravel()
+    peak[peak == 0] = 1
+    return sparse.diags(1 / peak)
+
+
+def score(graph, rows):
+    """Матрица счётов кандидатов для строк rows графа (все rows >= 0)."""
+    batch = graph.matrix[rows]
+    own = sparse.csr_matrix(
+        (np.ones(len(rows)), (np.arange(len(rows)), rows)),
+        shape=batch.shape
+    )
+    friends_of_friends = batch @ graph.matrix
+
+    overlap = batch @ graph.transposed
+    overlap = overlap - overlap.multiply(own)
+    overlap = _keep_top(overlap, SIMILAR_USERS)
+    co_follow = overlap @ graph.matrix
+    co_follow = _row_max(co_follow) @ co_follow
+
+    result = (friends_of_friends + CO_FOLLOW_WEIGHT * co_follow).tocsr()
+    excluded = (batch + own).astype(bool)
+    result = result - result.multiply(excluded)
+    result.eliminate_zeros()
+    return result.tocsr()
+
+
+def _top(graph, scores, row, user_id, top_n):
+    """Лучшие top_n (id, счёт) для одной строки, с добором популярных."""
+    suggestions = []
+    if scores is not None:
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        data, columns = scores.data[start:end], scores.indices[start:end]
+        if len(data) > top_n:
+            best = np.argpartition(data, -top_n)[-top_n:]
+            data, columns = data[best], columns[best]
+        order = np.argsort(-data, kind='stable')
+        suggestions = [
+            (int(graph.ids[column]), float(value))
+            for column, value in zip(columns[order], data[order])
+        ]
+    if len(suggestions) < top_n:
+        taken = {suggested for suggested, _ in suggestions}
+        taken.add(user_id)
+        graph_row = graph.rows_for([user_id])[0]
+        if graph_row >= 0:
+            start = graph.matrix.indptr[graph_row]
+            end = graph.matrix.indptr[graph_row + 1]
+            taken.update(
+                int(graph.ids[column])
+                for column in graph.matrix.indices[start:end]
+            )
+        peak = graph.followers.max() if len(graph.followers) else 1
+        for column in graph.popular:
+            if len(suggestions) >= top_n or not graph.followers[column]:
+                break
+            suggested = int(graph.ids[column])
+            if suggested not in taken:
+                suggestions.append((
+                    suggested,
+                    POPULAR_WEIGHT * float(graph.followers[column] / peak)
+                ))
+    return suggestions
+
+
+def recompute(graph, user_ids, top_n):
+    """
+    Пересчитывает и сохраняет рекомендации пачки пользователей
+    и в той же транзакции снимает с них отметку пересчёта, если она
+    поставлена до загрузки графа. Подписка во время расчёта ставит
+    отметку позже, и пользователь попадёт в следующий запуск; если
+    расчёт упадёт, отметки останутся.
+    """
+    rows = graph.rows_for(user_ids)
+    known = rows >= 0
+    scores = score(graph, rows[known]) if known.any() else None
+    positions = np.cumsum(known) - 1
+    objects = []
+    for index, user_id in enumerate(user_ids):
+        row = positions[index] if known[index] else None
+        for suggested, value in _top(
+            graph, scores if row is not None else None, row, user_id, top_n
+        ):
+            objects.append(Suggestion(
+                user_id=user_id, suggested_id=suggested, score=value
+            ))
+    with transaction.atomic():
+        Suggestion.objects.filter(user_id__in=user_ids).delete()
+        Suggestion.objects.bulk_create(objects)
+        Profile.objects.filter(
+            user_id__in=user_ids,
+            suggestions_stale_since__lte=graph.loaded_at
+        ).update(suggestions_stale_since=None)
+    versions.bump(*[versions.viewer_scope(user_id) for user_id in user_ids])
+    return len(objects)
+
+
+def stale_users(limit=None):
+    """
+    Пользователи, которым нужен пересчёт. Отметка не снимается:
+    это делает recompute после записи рекомендаций.
+    """
+    user_ids = Profile.objects.filter(
+        suggestions_stale_since__isnull=False
+    ).order_by('user_id').values_list('user_id', flat=True)
+    if limit is not None:
+        user_ids = user_ids[:limit]
+    return list(user_ids)
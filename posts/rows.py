@@ -0,0 +1,138 @@
+from django.db.models.query import ValuesIterable
+
+
+class FeedAuthor:
+    """Автор в лёгкой строке ленты."""
+    __slots__ = ('pk', 'username')
+
+    def __init__(self, pk, username):
+        self.pk = pk
+        self.username = username
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class FeedGroup:
+    """Сообщество в лёгкой строке ленты."""
+    __slots__ = ('pk', 'slug', 'title')
+
+    def __init__(self, pk, slug, title):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.title
+
+
+class FeedRow:
+    """
+    Лёгкая строка ленты вместо экземпляра Post: только поля,
+    которые показывает карточка поста, без состояния модели.
+    """
+    __slots__ = (
+        'pk', 'text', 'pub_date', 'image', 'thumbnail', 'image_srcset',
+        'image_srcset_webp', 'comments_count', 'author', 'group', 'is_own',
+        'author_followed',
+    )
+
+    FIELDS = (
+        'id', 'text', 'pub_date', 'image', 'thumbnail', 'image_srcset',
+        'image_srcset_webp', 'comments_count', 'author_id',
+        'author__username', 'group_id', 'group__slug', 'group__title',
+        'is_own', 'author_followed',
+    )
+
+    def __init__(self, values):
+        self.pk = values['id']
+        self.text = values['text']
+        self.pub_date = values['pub_date']
+        self.image = values['image']
+        self.thumbnail = values['thumbnail']
+        self.image_srcset = values['image_srcset']
+        self.image_srcset_webp = values['image_srcset_webp']
+        self.comments_count = values['comments_count']
+        self.author = FeedAuthor(
+            values['author_id'], values['author__username']
+        )
+        self.group = None
+        if values['group_id'] is not None:
+            self.group = FeedGroup(
+                values['group_id'],
+                values['group__slug'],
+                values['group__title']
+            )
+        self.is_own = values['is_own']
+        self.author_followed = values['author_followed']
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __repr__(self):
+        return f'<FeedRow {self.pk}>'
+
+    def __str__(self):
+        return self.text[:15]
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class CommentRow:
+    """Лёгкая строка комментария с автором."""
+    __slots__ = ('pk', 'post_id', 'text', 'created', 'author')
+
+    FIELDS = (
+        'id', 'post_id', 'text', 'created', 'author_id', 'author__username',
+    )
+
+    def __init__(self, values):
+        self.pk = values['id']
+        self.post_id = values['post_id']
+        self.text = values['text']
+        self.created = values['created']
+        self.author = FeedAuthor(
+            values['author_id'], values['author__username']
+        )
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __repr__(self):
+        return f'<CommentRow {self.pk}>'
+
+
+class FeedRowIterable(ValuesIterable):
+    """Итерирует values()-queryset ленты, отдавая FeedRow."""
+
+    def __iter__(self):
+        for values in super().__iter__():
+            yield FeedRow(values)
+
+
+class CommentRowIterable(ValuesIterable):
+    """Итерирует values()-queryset комментариев, отдавая CommentRow."""
+
+    def __iter__(self):
+        for values in super().__iter__():
+            yield CommentRow(values)
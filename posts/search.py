@@ -0,0 +1,242 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginator import (DIRECTION_NEXT, DIRECTION_PREVIOUS, CursorPage,
+                        decode_cursor, encode_cursor)
+
+SEARCH_TABLE = 'posts_search'
+KIND_POST = 'post'
+KIND_COMMENT = 'comment'
+TERM_PATTERN = re.compile(r'\w+\*?')
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+SNIPPET_TOKENS = 24
+
+
+def is_available():
+    """Полнотекстовый индекс построен только на SQLite (FTS5)."""
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """
+    Превращает пользовательский запрос в выражение FTS5 MATCH.
+    Слова соединяются по И, слово со звёздочкой ищется как префикс.
+    """
+    terms = []
+    for term in TERM_PATTERN.findall(query or ''):
+        if term.endswith('*'):
+            terms.append(f'"{term[:-1]}"*')
+        else:
+            terms.append(f'"{term}"')
+    return ' '.join(terms)
+
+
+def _rowid(kind, object_id):
+    return object_id * 2 + (kind == KIND_COMMENT)
+
+
+def index(kind, object_id, text, post_id, author_id):
+    """Добавляет или обновляет документ в индексе."""
+    if not is_available():
+        return
+    rowid = _rowid(kind, object_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, text, kind, post_id, author_id) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            [rowid, text, kind, post_id, author_id]
+        )
+
+
+def unindex(kind, object_id):
+    """Удаляет документ из индекса."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [_rowid(kind, object_id)]
+        )
+
+
+def rebuild(posts, comments, chunk_size):
+    """
+    Перестраивает индекс, читая таблицы потоком по chunk_size строк.
+    Возвращает число проиндексированных документов.
+    """
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        sources = (
+            (KIND_POST, posts.values_list('pk', 'text', 'pk', 'author_id')),
+            (KIND_COMMENT, comments.values_list(
+                'pk', 'text', 'post_id', 'author_id'
+            )),
+        )
+        for kind, rows in sources:
+            chunk = []
+            for pk, text, post_id, author_id in rows.iterator(
+                chunk_size=chunk_size
+            ):
+                chunk.append(
+                    [_rowid(kind, pk), text, kind, post_id, author_id]
+                )
+                if len(chunk) >= chunk_size:
+                    total += _insert_chunk(cursor, chunk)
+                    chunk = []
+            total += _insert_chunk(cursor, chunk)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+    return total
+
+
+def _insert_chunk(cursor, chunk):
+    if chunk:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, text, kind, post_id, author_id) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            chunk
+        )
+    return len(chunk)
+
+
+def matching(query, kind):
+    """
+    Подзапрос с id объектов kind, подходящих под запрос,
+    для фильтрации queryset через pk__in.
+    """
+    column = 'post_id' if kind == KIND_POST else 'rowid / 2'
+    return RawSQL(
+        f'SELECT {column} FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %s AND kind = %s',
+        [build_match(query), kind]
+    )
+
+
+class SearchHit:
+    """Найденный пост или комментарий со сниппетом совпадения."""
+    __slots__ = ('rowid', 'score', 'kind', 'post_id', 'post', 'snippet')
+
+    def __init__(self, rowid, score, kind, post_id, snippet):
+        self.rowid = rowid
+        self.score = score
+        self.kind = kind
+        self.post_id = post_id
+        self.post = None
+        self.snippet = mark_safe(
+            escape(snippet)
+            .replace(SNIPPET_START, '<mark>')
+            .replace(SNIPPET_END, '</mark>')
+        )
+
+    @property
+    def is_comment(self):
+        return self.kind == KIND_COMMENT
+
+
+class SearchPaginator:
+    """
+    Курсорный паджинатор по релевантности (bm25, rowid).
+    Отдаёт такие же CursorPage, как и CursorPaginator лент.
+    """
+
+    def __init__(self, query, per_page, group=None, author=None):
+        self.match = build_match(query)
+        self.per_page = int(per_page)
+        self.group = group
+        self.author = author
+
+    def get_page(self, cursor=None):
+        return CursorPage(self, cursor)
+
+    def _select(self, seek=None, forward=True):
+        score = f'bm25({SEARCH_TABLE})'
+        sql = [
+            f'SELECT {SEARCH_TABLE}.rowid, {score} AS score, kind, '
+            f"post_id, snippet({SEARCH_TABLE}, 0, %s, %s, '…', %s) "
+            f'FROM {SEARCH_TABLE}'
+        ]
+        params = [SNIPPET_START, SNIPPET_END, SNIPPET_TOKENS]
+        if self.group is not None:
+            sql.append(
+                f'JOIN {Post._meta.db_table} AS post '
+                f'ON post.id = {SEARCH_TABLE}.post_id'
+            )
+        sql.append(f'WHERE {SEARCH_TABLE} MATCH %s')
+        params.append(self.match)
+        if self.group is not None:
+            sql.append('AND post.group_id = %s')
+            params.append(self.group.pk)
+        if self.author is not None:
+            sql.append(f'AND {SEARCH_TABLE}.author_id = %s')
+            params.append(self.author.pk)
+        if seek is not None:
+            sign = '>' if forward else '<'
+            sql.append(
+                f'AND ({score} {sign} %s OR ({score} = %s '
+                f'AND {SEARCH_TABLE}.rowid {sign} %s))'
+            )
+            params.extend([seek[0], seek[0], seek[1]])
+        order = '' if forward else ' DESC'
+        sql.append(
+            f'ORDER BY score{order}, {SEARCH_TABLE}.rowid{order} LIMIT %s'
+        )
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            return [SearchHit(*row) for row in cursor.fetchall()]
+
+    def load(self, cursor=None):
+        if not self.match or not is_available():
+            return [], None, None
+        direction, values = decode_cursor(cursor)
+        if direction is not None:
+            try:
+                score, rowid = values
+                values = [float(score), int(rowid)]
+            except (TypeError, ValueError):
+                direction = None
+        if direction is None:
+            hits = self._select()
+            has_next, has_previous = len(hits) > self.per_page, False
+            hits = hits[:self.per_page]
+        elif direction == DIRECTION_NEXT:
+            hits = self._select(values, forward=True)
+            has_next, has_previous = len(hits) > self.per_page, True
+            hits = hits[:self.per_page]
+        else:
+            hits = self._select(values, forward=False)
+            if not hits:
+                return self.load(None)
+            has_next, has_previous = True, len(hits) > self.per_page
+            hits = hits[:self.per_page][::-1]
+
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            {hit.post_id for hit in hits}
+        )
+        for hit in hits:
+            hit.post = posts.get(hit.post_id)
+        next_cursor = previous_cursor = None
+        if hits and has_next:
+            last = hits[-1]
+            next_cursor = encode_cursor(
+                DIRECTION_NEXT, [last.score, last.rowid]
+            )
+        if hits and has_previous:
+            first = hits[0]
+            previous_cursor = encode_cursor(
+                DIRECTION_PREVIOUS, [first.score, first.rowid]
+            )
+        return [hit for hit in hits if hit.post], next_cursor, previous_cursor
@@ -0,0 +1,226 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import (counters, graph, media, page_cache, search, tasks,
+               thumbnails, timeline, versions)
+from .models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+def bump_post_scopes(post_id, author_id=None, group_id=None):
+    if author_id is None:
+        post = Post.objects.filter(pk=post_id).values(
+            'author_id', 'group_id'
+        ).first()
+        if post is None:
+            return
+        author_id, group_id = post['author_id'], post['group_id']
+    versions.bump(*versions.post_scopes(post_id, author_id, group_id))
+
+
+def bump_comment_scopes(comment):
+    if Comment.post.is_cached(comment):
+        post = comment.post
+        bump_post_scopes(post.pk, post.author_id, post.group_id)
+    else:
+        bump_post_scopes(comment.post_id)
+    page_cache.purge(page_cache.post_key(comment.post_id))
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._image_changed = bool(instance.image)
+    instance._group_changed = False
+    if instance.pk is None:
+        return
+    old = Post.objects.filter(pk=instance.pk).values(
+        'group_id', 'image'
+    ).first()
+    if old is None:
+        return
+    if old['group_id'] is not None and old['group_id'] != instance.group_id:
+        old_group = versions.group_scope(old['group_id'])
+        versions.bump(old_group, versions.syndication_scope(old_group))
+    instance._group_changed = old['group_id'] != instance.group_id
+    instance._image_changed = old['image'] != (instance.image.name or '')
+    instance._old_image = old['image']
+    if instance._image_changed:
+        instance.thumbnail = ''
+        instance.image_srcset = ''
+        instance.image_srcset_webp = ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.update_profile(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+    if getattr(instance, '_image_changed', False):
+        if getattr(instance, '_old_image', None):
+            media.release(instance._old_image)
+        if instance.image:
+            media.acquire(instance.image.name)
+            post_id = instance.pk
+            transaction.on_commit(
+                lambda: tasks.submit(
+                    thumbnails.process_image,
+                    post_id,
+                    callback=thumbnails.image_processed
+                )
+            )
+    search.index(
+        search.KIND_POST,
+        instance.pk,
+        instance.text,
+        instance.pk,
+        instance.author_id
+    )
+    bump_post_scopes(instance.pk, instance.author_id, instance.group_id)
+    versions.bump(
+        *versions.syndication_scopes(instance.author_id, instance.group_id)
+    )
+    # списки с постом помечены его ключом; новый пост появляется
+    # в списках, а перенесённый — в списке нового сообщества
+    keys = [page_cache.post_key(instance.pk)]
+    if created:
+        keys += page_cache.listing_keys(instance.author_id, instance.group_id)
+    elif getattr(instance, '_group_changed', False):
+        keys += page_cache.group_keys(instance.group_id)
+    page_cache.purge(*keys)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    """
+    Обработка картинки меняет её имя в базе через update(), поэтому
+    имя файла для сборки мусора берётся из базы, а не из экземпляра.
+    """
+    instance._stored_image = Post.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True
+    ).first()
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.unindex(search.KIND_POST, instance.pk)
+    image = getattr(instance, '_stored_image', instance.image.name)
+    if image:
+        media.release(image)
+    bump_post_scopes(instance.pk, instance.author_id, instance.group_id)
+    versions.bump(
+        *versions.syndication_scopes(instance.author_id, instance.group_id)
+    )
+    counters.increment(
+        Profile.objects.filter(user_id=instance.author_id), posts_count=-1
+    )
+    page_cache.purge(
+        page_cache.post_key(instance.pk),
+        page_cache.author_key(instance.author_id)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.increment(
+            Post.objects.filter(pk=instance.post_id), comments_count=1
+        )
+    search.index(
+        search.KIND_COMMENT,
+        instance.pk,
+        instance.text,
+        instance.post_id,
+        instance.author_id
+    )
+    bump_comment_scopes(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    search.unindex(search.KIND_COMMENT, instance.pk)
+    counters.increment(
+        Post.objects.filter(pk=instance.post_id), comments_count=-1
+    )
+    bump_comment_scopes(instance)
+
+
+def mark_suggestions_stale(user_id):
+    """
+    Подписка меняет окрестность пользователя и его подписчиков:
+    через него проходят их пути «друг друга».
+    """
+    followers = Follow.objects.filter(author_id=user_id).values('user_id')
+    Profile.objects.filter(
+        Q(user_id=user_id) | Q(user_id__in=followers)
+    ).update(suggestions_stale_since=timezone.now())
+
+
+def bump_follow_scopes(follow):
+    """Подписка меняет ленту подписчика и счётчики на обоих профилях."""
+    versions.bump(
+        versions.viewer_scope(follow.user_id),
+        versions.author_scope(follow.user_id),
+        versions.author_scope(follow.author_id)
+    )
+    page_cache.purge(
+        page_cache.author_key(follow.user_id),
+        page_cache.author_key(follow.author_id)
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.update_profile(instance.user_id, following_count=1)
+        counters.update_profile(instance.author_id, followers_count=1)
+        graph.edge_changed(instance.user_id, instance.author_id)
+        timeline.backfill(instance.user_id, instance.author_id)
+        mark_suggestions_stale(instance.user_id)
+        bump_follow_scopes(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.increment(
+        Profile.objects.filter(user_id=instance.user_id), following_count=-1
+    )
+    counters.increment(
+        Profile.objects.filter(user_id=instance.author_id),
+        followers_count=-1
+    )
+    graph.edge_changed(instance.user_id, instance.author_id)
+    timeline.prune(instance.user_id, instance.author_id)
+    mark_suggestions_stale(instance.user_id)
+    bump_follow_scopes(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        page_cache.purge(page_cache.group_key(instance.slug))
+
+
+@receiver(user_logged_in)
+@receiver(user_logged_out)
+def viewer_changed(sender, request, user, **kwargs):
+    if user is not None:
+        versions.bump(versions.viewer_scope(user.pk))
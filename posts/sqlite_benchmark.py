@@ -0,0 +1,132 @@
+"""
+Пропускная способность SQLite под конкурентными потоками.
+
+Каждый поток изображает поток запросов: чтение — последние
+комментарии поста, запись — как при сохранении комментария через
+ORM: INSERT комментария и UPDATE счётчика поста из сигнала, каждый
+в своём автокоммите, без atomic(). После каждой
+операции соединение закрывается, если его срок по CONN_MAX_AGE
+истёк, как в конце запроса. Один и тот же прогон выполняется
+на стандартном бэкенде со свежим соединением на запрос и на
+yatube.sqlite_backend с постоянными соединениями, каждый в своём
+временном файле.
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.db import connections
+from django.db.utils import OperationalError
+
+BACKENDS = {
+    'stock': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0},
+    'tuned': {'ENGINE': 'yatube.sqlite_backend', 'CONN_MAX_AGE': None},
+}
+ALIAS = 'sqlite_benchmark_{label}'
+SCHEMA = (
+    'CREATE TABLE bench_post ('
+    'id INTEGER PRIMARY KEY, comments_count INTEGER NOT NULL)',
+    'CREATE TABLE bench_comment ('
+    'id INTEGER PRIMARY KEY, post_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, created REAL NOT NULL)',
+    'CREATE INDEX bench_comment_post ON bench_comment (post_id, id)',
+)
+READ_SQL = (
+    'SELECT id, text FROM bench_comment WHERE post_id = %s '
+    'ORDER BY id DESC LIMIT 20'
+)
+COMMENT_TEXT = 'Комментарий для замера ' * 4
+
+
+def _prepare(alias, posts):
+    with connections[alias].cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        cursor.executemany(
+            'INSERT INTO bench_post (id, comments_count) VALUES (%s, 0)',
+            [(post_id,) for post_id in range(1, posts + 1)]
+        )
+
+
+def _read(alias, post_id):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(READ_SQL, [post_id])
+        cursor.fetchall()
+
+
+def _write(alias, post_id):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO bench_comment (post_id, text, created) '
+            'VALUES (%s, %s, %s)',
+            [post_id, COMMENT_TEXT, time.time()]
+        )
+        cursor.execute(
+            'UPDATE bench_post SET comments_count = comments_count + 1 '
+            'WHERE id = %s',
+            [post_id]
+        )
+
+
+def _worker(alias, operations, write_share, posts, seed, totals, guard):
+    rng = random.Random(seed)
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    try:
+        for _ in range(operations):
+            post_id = rng.randint(1, posts)
+            writing = rng.random() < write_share
+            try:
+                (_write if writing else _read)(alias, post_id)
+                counts['writes' if writing else 'reads'] += 1
+            except OperationalError:
+                counts['errors'] += 1
+            connections[alias].close_if_unusable_or_obsolete()
+    finally:
+        connections[alias].close()
+    with guard:
+        for key, value in counts.items():
+            totals[key] += value
+
+
+def run(label, threads=8, operations=500, write_share=0.2, posts=100,
+        seed=0):
+    """
+    Прогон на бэкенде label из BACKENDS: число операций каждого
+    вида в секунду и число ошибок «database is locked».
+    """
+    alias = ALIAS.format(label=label)
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    connections.databases[alias] = {**BACKENDS[label], 'NAME': path}
+    try:
+        _prepare(alias, posts)
+        connections[alias].close()
+        totals = {'reads': 0, 'writes': 0, 'errors': 0}
+        guard = threading.Lock()
+        workers = [
+            threading.Thread(target=_worker, args=(
+                alias, operations, write_share, posts, seed + index,
+                totals, guard
+            ))
+            for index in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        connections[alias].close()
+        del connections.databases[alias]
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return {
+        'seconds': round(elapsed, 3),
+        'reads_per_second': round(totals['reads'] / elapsed, 1),
+        'writes_per_second': round(totals['writes'] / elapsed, 1),
+        'errors': totals['errors'],
+    }
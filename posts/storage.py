@@ -0,0 +1,73 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+UPLOAD_PREFIX = '.upload-'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, в котором имя файла — sha256 содержимого.
+
+    Хэш считается во время записи потока во временный файл, после
+    чего файл переносится на место одним rename. Повторная загрузка
+    тех же байтов возвращает имя уже сохранённого файла. Ссылки
+    на файлы и удаление ненужных ведёт posts.media.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _spool(self, content):
+        """Пишет поток во временный файл, считая хэш и размер."""
+        os.makedirs(self.location, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.location, prefix=UPLOAD_PREFIX
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(descriptor, 'wb') as target:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    target.write(chunk)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return digest.hexdigest(), size, temporary
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        digest, size, temporary = self._spool(content)
+        try:
+            stored = MediaBlob.objects.filter(digest=digest).values_list(
+                'name', flat=True
+            ).first()
+            if stored is not None and self.exists(stored):
+                return stored
+            if stored is None:
+                directory, filename = os.path.split(name)
+                extension = os.path.splitext(filename)[1].lower()
+                stored = '/'.join(
+                    part for part in (
+                        directory, digest[:2], digest + extension
+                    ) if part
+                )
+            path = self.path(stored)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary, path)
+            temporary = None
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+            MediaBlob.objects.bulk_create(
+                [MediaBlob(digest=digest, name=stored, size=size)],
+                ignore_conflicts=True
+            )
+            return stored
+        finally:
+            if temporary is not None:
+                os.remove(temporary)
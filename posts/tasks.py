@@ -0,0 +1,83 @@
+"""
+Пул процессов для тяжёлой обработки медиа вне потока запроса.
+
+Инициализатор пула настраивает Django до распаковки задач,
+поэтому модули с задачами импортируют модели как обычно.
+"""
+import atexit
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _init_worker():
+    import django
+    django.setup()
+    from django.db import connections
+    connections.close_all()
+
+
+def get_executor(workers=None):
+    """Общий пул процессов, создаётся при первом обращении."""
+    global _executor
+    if workers is not None:
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker
+        )
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.MEDIA_WORKERS, initializer=_init_worker
+        )
+        atexit.register(_executor.shutdown, wait=False)
+    return _executor
+
+
+def _describe(func, args):
+    return f'{func.__name__}({", ".join(map(repr, args))})'
+
+
+def _call_back(func, args, callback, future):
+    """
+    Передаёт результат задачи в callback. Сбой задачи или callback
+    пишется в лог с аргументами задачи, например с id поста.
+    """
+    error = future.exception()
+    if error is not None:
+        logger.exception(
+            'Задача %s завершилась ошибкой', _describe(func, args),
+            exc_info=error
+        )
+        return
+    if callback is None:
+        return
+    try:
+        callback(future.result())
+    except Exception:
+        logger.exception(
+            'Не удалось обработать результат задачи %s',
+            _describe(func, args)
+        )
+
+
+def submit(func, *args, callback=None):
+    """
+    Выполняет задачу в пуле. При MEDIA_WORKERS = 0 задача
+    выполняется сразу в текущем процессе. callback(результат)
+    вызывается после успешной задачи в текущем процессе, то есть
+    там, где обслуживаются запросы. Ошибки задач из пула пишутся
+    в лог posts.tasks.
+    """
+    if not settings.MEDIA_WORKERS:
+        result = func(*args)
+        if callback is not None:
+            callback(result)
+        return result
+    future = get_executor().submit(func, *args)
+    future.add_done_callback(partial(_call_back, func, args, callback))
+    return future
@@ -0,0 +1,122 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+URL_API_INDEX = reverse('api_index')
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {index}',
+                author=cls.author,
+                group=None if index % 2 else cls.group
+            )
+            for index in range(settings.ITEMS_ON_PAGE + 3)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(b''.join(response.streaming_content))
+
+    def test_feed_pages_through_all_posts(self):
+        """Лента API листается курсором без пропусков и повторов."""
+        response, data = self.get_json(URL_API_INDEX)
+        first = [item['id'] for item in data['results']]
+        self.assertEqual(len(first), settings.ITEMS_ON_PAGE)
+        self.assertIsNone(data['previous'])
+        second = json.loads(b''.join(
+            self.client.get(data['next']).streaming_content
+        ))
+        ids = first + [item['id'] for item in second['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+        self.assertIsNone(second['next'])
+
+    def test_post_fields(self):
+        """Пост сериализуется с автором, сообществом и комментариями."""
+        response = self.client.get(reverse('api_post', args=[self.post.pk]))
+        data = json.loads(response.content)
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['author']['username'], self.author.username)
+        self.assertEqual(data['group']['slug'], self.group.slug)
+        self.assertEqual(data['comments_count'], 1)
+
+    def test_group_profile_and_comments(self):
+        """Лента сообщества, профиля и комментарии поста."""
+        _, data = self.get_json(reverse('api_group', args=[self.group.slug]))
+        self.assertTrue(all(
+            item['group']['slug'] == self.group.slug
+            for item in data['results']
+        ))
+        _, data = self.get_json(
+            reverse('api_profile', args=[self.author.username])
+        )
+        self.assertEqual(len(data['results']), settings.ITEMS_ON_PAGE)
+        _, data = self.get_json(reverse('api_comments', args=[self.post.pk]))
+        self.assertEqual(
+            [item['text'] for item in data['results']], ['Комментарий']
+        )
+
+    def test_comments_of_missing_post(self):
+        """Комментарии несуществующего поста отдают 404."""
+        response = self.client.get(reverse('api_comments', args=[10 ** 6]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_matching_etag_returns_304_without_rows(self):
+        """Совпавший If-None-Match отдаёт 304, не выбирая строки."""
+        etag = self.client.get(URL_API_INDEX)['ETag']
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                URL_API_INDEX, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_content(self):
+        """Новый пост, правка и комментарий меняют ETag."""
+        url_post = reverse('api_post', args=[self.post.pk])
+        url_comments = reverse('api_comments', args=[self.post.pk])
+        before = {
+            url: self.client.get(url)['ETag']
+            for url in (URL_API_INDEX, url_post, url_comments)
+        }
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Ещё комментарий'
+        )
+        for url, etag in before.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_etag_is_checked_before_query(self):
+        """Для поста 304 отдаётся вообще без запросов к базе."""
+        url = reverse('api_post', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,59 @@
+from django.contrib.auth import HASH_SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+AUTH_TABLES = ('"django_session"', '"auth_user"')
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='secret-password'
+        )
+        self.client = Client()
+        self.client.login(username='reader', password='secret-password')
+        self.path = reverse('new_post')
+
+    def test_warm_request_skips_auth_queries(self):
+        """С тёплым кэшем сессия и пользователь не читаются из базы."""
+        self.client.get(self.path)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual([
+            query['sql'] for query in queries
+            if any(table in query['sql'] for table in AUTH_TABLES)
+        ], [])
+
+    def test_user_save_invalidates(self):
+        """После сохранения пользователя запрос видит новые данные."""
+        self.client.get(self.path)
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        response = self.client.get(self.path)
+        self.assertEqual(response.wsgi_request.user.first_name, 'Новое имя')
+
+    def test_password_change_logs_out(self):
+        """Смена пароля завершает сессии с прежним хэшем."""
+        self.client.get(self.path)
+        self.user.set_password('another-password')
+        self.user.save()
+        response = self.client.get(self.path)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+        self.assertEqual(response.status_code, 302)
+
+    def test_stale_cached_user_is_checked(self):
+        """Пользователь из кэша проходит проверку хэша пароля в сессии."""
+        self.client.get(self.path)
+        session = self.client.session
+        session[HASH_SESSION_KEY] = 'forged'
+        session.save()
+        response = self.client.get(self.path)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
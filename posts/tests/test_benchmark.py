@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts import benchmark, urls
+from posts.models import Follow, Post
+
+SCALE = 0.0001
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.report_path = os.path.join(self.workdir, 'report.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def run_benchmark(self, **options):
+        call_command(
+            'benchmark',
+            in_place=True,
+            scale=SCALE,
+            repeat=2,
+            output=self.report_path,
+            stdout=StringIO(),
+            **options
+        )
+        with open(self.report_path, encoding='utf-8') as report_file:
+            return json.load(report_file)
+
+    def test_every_url_is_classified(self):
+        """Каждый маршрут явно помечен как читающий или меняющий данные."""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(
+            names,
+            set(benchmark.READ_ONLY_URLS) | set(benchmark.MUTATING_URLS)
+        )
+        self.assertFalse(
+            set(benchmark.READ_ONLY_URLS) & set(benchmark.MUTATING_URLS)
+        )
+
+    def test_report_covers_read_only_urls(self):
+        """На рабочей базе замеряются только читающие маршруты."""
+        report = self.run_benchmark()
+        volumes = benchmark.scaled_volumes(SCALE)
+        self.assertEqual(Post.objects.count(), volumes['posts'])
+        self.assertTrue(Follow.objects.exists())
+        names = {name for name, _ in benchmark.benchmark_urls()}
+        self.assertEqual(set(report['urls']), set(benchmark.READ_ONLY_URLS))
+        self.assertEqual(set(report['urls']), names)
+        for name, result in report['urls'].items():
+            with self.subTest(url=name):
+                self.assertLess(result['status'], 400)
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_shared_cache_is_left_alone(self):
+        """Замер чистит свой кэш, а не общий кэш сервера."""
+        cache.set('benchmark-sentinel', 'kept')
+        self.run_benchmark()
+        self.assertEqual(cache.get('benchmark-sentinel'), 'kept')
+        cache.delete('benchmark-sentinel')
+
+    def test_query_regression_fails_loudly(self):
+        """Рост числа запросов относительно эталона роняет команду."""
+        baseline = self.run_benchmark()
+        baseline['urls']['index']['queries'] -= 1
+        baseline_path = os.path.join(self.workdir, 'baseline.json')
+        benchmark.dump(baseline, baseline_path)
+        with self.assertRaisesMessage(CommandError, 'index: запросов'):
+            call_command(
+                'benchmark',
+                in_place=True,
+                no_seed=True,
+                repeat=2,
+                baseline=baseline_path,
+                tolerance=100,
+                stdout=StringIO()
+            )
+
+    def test_compare_uses_tolerance(self):
+        """Время и память сравниваются с допуском."""
+        base = {'queries': 3, 'p95_ms': 10.0, 'peak_kb': 100.0}
+        baseline = {'urls': {'index': base}}
+        report = {'urls': {'index': dict(base, p95_ms=11.0)}}
+        self.assertEqual(benchmark.compare(baseline, report, 0.2), [])
+        report['urls']['index']['p95_ms'] = 13.0
+        self.assertEqual(len(benchmark.compare(baseline, report, 0.2)), 1)
@@ -1,12 +1,22 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 
+from posts import versions
 from posts.forms import PostForm
-from posts.models import Post
+from posts.models import Follow, Post
 
 URL_HOMEPAGE = reverse('index')
 URL_NEW_POST = reverse('new_post')
+URL_FOLLOW_INDEX = reverse('follow_index')
 
 User = get_user_model()
 
@@ -25,21 +35,103 @@ class CacheTests(TestCase):
         cls.form = PostForm()
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.user = CacheTests.user
         self.authorized_client.force_login(self.user)
 
     def test_cache_index_page(self):
-        """Проверка кэширования главной страницы."""
+        """Изменения поста сразу видны на закэшированной главной."""
         form_data = {
             'text': 'TEST_TEST_TEST',
         }
-        self.authorized_client.post(
+        response = self.authorized_client.post(
             URL_NEW_POST,
             data=form_data,
             follow=True
         )
+        self.assertContains(response, form_data['text'])
         Post.objects.filter(text=form_data['text']).delete()
         response = self.authorized_client.get(URL_HOMEPAGE)
-        self.assertFalse(Post.objects.filter(text=form_data['text']).exists())
-        self.assertContains(response, form_data['text'])
+        self.assertNotContains(response, form_data['text'])
+
+    def test_cached_fragment_is_reused(self):
+        """Без записей в области страница отдаётся из кэша."""
+        post = Post.objects.create(text='Исходный текст', author=self.user)
+        self.authorized_client.get(URL_HOMEPAGE)
+        Post.objects.filter(pk=post.pk).update(text='Тихая правка')
+        response = self.authorized_client.get(URL_HOMEPAGE)
+        self.assertContains(response, 'Исходный текст')
+
+    def test_pages_are_cached_separately(self):
+        """У каждой страницы ленты свой фрагмент кэша."""
+        Post.objects.bulk_create([
+            Post(text=f'Пост номер {index:02}', author=self.user)
+            for index in range(settings.ITEMS_ON_PAGE + 1)
+        ])
+        first = self.authorized_client.get(URL_HOMEPAGE)
+        cursor = first.context['page'].next_cursor
+        second = self.authorized_client.get(URL_HOMEPAGE, {'cursor': cursor})
+        self.assertContains(first, 'Пост номер 10')
+        self.assertNotContains(second, 'Пост номер 10')
+        self.assertContains(second, 'Пост номер 00')
+
+    def test_follow_page_is_cached_per_user(self):
+        """Лента подписок кэшируется отдельно для каждого пользователя."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        Post.objects.create(text='Пост для подписчиков', author=author)
+        reader_client = Client()
+        reader_client.force_login(reader)
+        response = reader_client.get(URL_FOLLOW_INDEX)
+        self.assertContains(response, 'Пост для подписчиков')
+        response = self.authorized_client.get(URL_FOLLOW_INDEX)
+        self.assertNotContains(response, 'Пост для подписчиков')
+
+        Post.objects.create(text='Свежий пост', author=author)
+        response = reader_client.get(URL_FOLLOW_INDEX)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_scopes_bumped_together_do_not_share_fragment(self):
+        """Профили, сдвинутые одной записью, кэшируются раздельно."""
+        author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост автора', author=author)
+        Post.objects.create(text='Пост подписчика', author=self.user)
+        Follow.objects.create(user=self.user, author=author)
+        self.authorized_client.get(reverse('profile', args=['author']))
+        response = self.authorized_client.get(
+            reverse('profile', args=[self.user.username])
+        )
+        self.assertContains(response, 'Пост подписчика')
+        self.assertNotContains(response, 'Пост автора')
+
+
+class SharedCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_bump_is_visible_to_other_processes(self):
+        """Поколение, сдвинутое другим процессом, видно этому."""
+        file_cache = {
+            'default': {
+                'BACKEND': 'yatube.metrics.InstrumentedCache',
+                'WRAPPED_BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self.directory,
+            }
+        }
+        with override_settings(CACHES=file_cache):
+            before, = versions.get_versions(versions.INDEX)
+            subprocess.run(
+                [sys.executable, 'manage.py', 'shell', '-c',
+                 'from posts import versions; '
+                 'versions.bump(versions.INDEX)'],
+                cwd=settings.BASE_DIR,
+                env={**os.environ, 'MEMCACHED_LOCATION': '',
+                     'CACHE_DIR': self.directory},
+                check=True
+            )
+            after, = versions.get_versions(versions.INDEX)
+        self.assertGreater(after, before)
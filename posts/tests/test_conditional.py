@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+URL_HOMEPAGE = reverse('index')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.urls = [
+            URL_HOMEPAGE,
+            reverse('group_posts', args=[cls.group.slug]),
+            reverse('profile', args=[cls.author.username]),
+            reverse('post', args=[cls.author.username, cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(ConditionalGetTests.author)
+
+    def revalidate(self, client, url, response):
+        return client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+
+    def test_unchanged_pages_return_304(self):
+        """Неизменившиеся страницы отдают 304 без отрисовки шаблона."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again.templates, [])
+
+    def test_last_modified_alone_is_enough(self):
+        """Клиент с одним If-Modified-Since тоже получает 304."""
+        response = self.guest_client.get(URL_HOMEPAGE)
+        again = self.guest_client.get(
+            URL_HOMEPAGE, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_writes_invalidate_their_scopes(self):
+        """Правка поста и комментарий обновляют связанные страницы."""
+        responses = {url: self.guest_client.get(url) for url in self.urls}
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 200)
+
+    def test_unrelated_write_keeps_group_fresh(self):
+        """Пост вне сообщества не сбрасывает страницу сообщества."""
+        url = reverse('group_posts', args=[self.group.slug])
+        response = self.guest_client.get(url)
+        Post.objects.create(text='Вне сообщества', author=self.reader)
+        again = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(again.status_code, 304)
+
+    def test_personalized_pages_do_not_leak(self):
+        """Страница автора не подходит анониму и помечена private."""
+        response = self.author_client.get(URL_HOMEPAGE)
+        self.assertContains(response, 'Редактировать')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        again = self.guest_client.get(
+            URL_HOMEPAGE, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(again.status_code, 200)
+        self.assertNotContains(again, 'Редактировать')
+        self.assertIn('public', again['Cache-Control'])
+
+    def test_follow_refreshes_viewer_pages(self):
+        """Подписка меняет страницу профиля для подписчика."""
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        url = reverse('profile', args=[self.author.username])
+        response = reader_client.get(url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        again = self.revalidate(reader_client, url, response)
+        self.assertEqual(again.status_code, 200)
+
+    def test_login_refreshes_pages(self):
+        """Повторный вход пользователя сбрасывает валидаторы страниц."""
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(URL_HOMEPAGE)
+        client.force_login(self.reader)
+        again = self.revalidate(client, URL_HOMEPAGE, response)
+        self.assertEqual(again.status_code, 200)
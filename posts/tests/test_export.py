@@ -0,0 +1,84 @@
+import json
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+small_gif = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {index}',
+                author=cls.user,
+                image=SimpleUploadedFile('small.gif', small_gif)
+            )
+            for index in range(3)
+        ]
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Свой комментарий'
+        )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.other, text='Чужой комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_anonymous_is_redirected(self):
+        """Выгрузка доступна только авторизованным."""
+        response = Client().get(reverse('export_data'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_archive(self):
+        """Архив отдаётся потоком и содержит только данные автора."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('export_data'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        archive = zipfile.ZipFile(BytesIO(b''.join(chunks)))
+        self.assertIsNone(archive.testzip())
+        posts = [
+            json.loads(line)
+            for line in archive.read('posts.jsonl').splitlines()
+        ]
+        self.assertEqual(
+            [post['text'] for post in posts], ['Пост 0', 'Пост 1', 'Пост 2']
+        )
+        comments = archive.read('comments.jsonl').decode().splitlines()
+        self.assertEqual(len(comments), 1)
+        self.assertIn('Свой комментарий', comments[0])
+        images = {post['image'] for post in posts}
+        self.assertEqual(len(images), 1)
+        self.assertEqual(archive.read(images.pop()), small_gif)
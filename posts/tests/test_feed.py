@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.rows import FeedRow
+
+User = get_user_model()
+
+URL_HOMEPAGE = reverse('index')
+URL_FOLLOW_INDEX = reverse('follow_index')
+
+
+class FeedQuerySetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'author_{index}')
+            for index in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        for index in range(settings.ITEMS_ON_PAGE):
+            Post.objects.create(
+                text=f'Пост {index}',
+                author=cls.authors[index % len(cls.authors)],
+                group=cls.group if index % 2 else None
+            )
+        cls.own_post = Post.objects.create(
+            text='Свой пост', author=cls.reader, group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.own_post, author=cls.authors[0], text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FeedQuerySetTests.reader)
+
+    def test_flags_are_annotated(self):
+        """for_feed отмечает свои посты и посты отслеживаемых авторов."""
+        posts = {
+            post.pk: post for post in Post.objects.for_feed(self.reader)
+        }
+        own = posts[self.own_post.pk]
+        self.assertTrue(own.is_own)
+        self.assertEqual(own.comments_count, 1)
+        for post in posts.values():
+            self.assertEqual(post.is_own, post.author_id == self.reader.pk)
+            self.assertEqual(
+                post.author_followed, post.author_id == self.authors[0].pk
+            )
+
+    def test_anonymous_viewer_has_no_flags(self):
+        """Для анонима флаги отношения всегда ложны."""
+        for post in Post.objects.for_feed(None):
+            self.assertFalse(post.is_own)
+            self.assertFalse(post.author_followed)
+
+    def test_card_fields_need_no_extra_queries(self):
+        """Поля карточки поста читаются без дополнительных запросов."""
+        posts = list(Post.objects.for_feed(self.reader))
+        with self.assertNumQueries(0):
+            for post in posts:
+                str(post.author)
+                post.author.username
+                post.group and post.group.slug
+
+    def test_rows_match_instances(self):
+        """as_rows отдаёт FeedRow с теми же данными, что и модели."""
+        posts = list(Post.objects.for_feed(self.reader))
+        rows = list(Post.objects.for_feed(self.reader).as_rows())
+        self.assertTrue(all(isinstance(row, FeedRow) for row in rows))
+        self.assertEqual(
+            [(post.pk, post.author.username, post.is_own) for post in posts],
+            [(row.pk, row.author.username, row.is_own) for row in rows]
+        )
+        row = next(row for row in rows if row.pk == self.own_post.pk)
+        self.assertEqual(row.group.slug, self.group.slug)
+        self.assertEqual(row.author, self.reader)
+
+    def test_feed_page_query_count_is_constant(self):
+        """Главная: сессия, пользователь и один запрос ленты."""
+        self.client.get(URL_HOMEPAGE)
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(URL_HOMEPAGE)
+
+    @override_settings(FEED_ROW_OBJECTS=True)
+    def test_feeds_render_rows(self):
+        """Все ленты отрисовываются из FeedRow."""
+        urls = [
+            URL_HOMEPAGE,
+            URL_FOLLOW_INDEX,
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.reader.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                page = list(response.context['page'])
+                self.assertTrue(page)
+                self.assertIsInstance(page[0], FeedRow)
+        response = self.client.get(URL_HOMEPAGE)
+        self.assertContains(response, 'Редактировать', count=1)
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -22,7 +23,6 @@ URL_POST = reverse(
     'post',
     kwargs={'username': 'test_user', 'post_id': 1}
 )
-URL_IMAGE = f'posts/{IMAGE_NAME}'
 
 small_gif = (
     b'\x47\x49\x46\x38\x39\x61\x01\x00'
@@ -31,6 +31,8 @@ small_gif = (
     b'\x00\x00\x01\x00\x01\x00\x00\x02'
     b'\x02\x4c\x01\x00\x3b'
 )
+IMAGE_DIGEST = hashlib.sha256(small_gif).hexdigest()
+URL_IMAGE = f'posts/{IMAGE_DIGEST[:2]}/{IMAGE_DIGEST}.gif'
 image = SimpleUploadedFile(
     name=IMAGE_NAME,
     content=small_gif,
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import graph
+from posts.models import Follow, Post, Profile, TimelineEntry
+
+User = get_user_model()
+
+
+class GraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{index}')
+            for index in range(3)
+        ]
+        Post.objects.create(text='Пост автора', author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(GraphTests.reader)
+
+    def test_follow_is_single_idempotent_statement(self):
+        """Повторная подписка — один запрос и никаких дублей."""
+        author = self.authors[0]
+        self.assertTrue(graph.follow(self.reader.pk, author.pk))
+        with self.assertNumQueries(1):
+            self.assertFalse(graph.follow(self.reader.pk, author.pk))
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader, author=author).count(), 1
+        )
+
+    def test_follow_and_unfollow_fire_signals(self):
+        """Подписка и отписка обновляют счётчики и ленту."""
+        author = self.authors[0]
+        graph.follow(self.reader.pk, author.pk)
+        self.assertEqual(
+            Profile.objects.get(user=author).followers_count, 1
+        )
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader))
+        self.assertTrue(graph.unfollow(self.reader.pk, author.pk))
+        self.assertFalse(graph.unfollow(self.reader.pk, author.pk))
+        self.assertEqual(
+            Profile.objects.get(user=author).followers_count, 0
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    def test_cached_sets_follow_writes(self):
+        """Подписка сбрасывает массивы, они собираются одним запросом."""
+        first, second, third = self.authors
+        graph.follow(self.reader.pk, first.pk)
+        self.assertTrue(graph.is_following(self.reader.pk, first.pk))
+        self.assertEqual(list(graph.followers(first.pk)), [self.reader.pk])
+        graph.follow(self.reader.pk, third.pk)
+        with self.assertNumQueries(1):
+            graph.following(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                graph.followed_among(
+                    self.reader.pk, [first.pk, second.pk, third.pk]
+                ),
+                {first.pk, third.pk}
+            )
+        graph.unfollow(self.reader.pk, first.pk)
+        self.assertFalse(graph.is_following(self.reader.pk, first.pk))
+        self.assertEqual(list(graph.followers(first.pk)), [])
+        self.assertEqual(list(graph.following(self.reader.pk)), [third.pk])
+
+    def test_follow_views(self):
+        """Подписка через страницу — без повторной выборки зрителя."""
+        author = self.authors[1]
+        url_profile = reverse('profile', args=[author.username])
+        self.client.get(reverse('profile_follow', args=[author.username]))
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=author).exists()
+        )
+        response = self.client.get(url_profile)
+        self.assertContains(response, 'Отписаться')
+        self.client.get(reverse('profile_unfollow', args=[author.username]))
+        response = self.client.get(url_profile)
+        self.assertContains(response, 'Подписаться')
+
+    def test_cannot_follow_self(self):
+        """Подписка на себя игнорируется."""
+        self.client.get(
+            reverse('profile_follow', args=[self.reader.username])
+        )
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import graph
+from posts.models import (Comment, Follow, Group, ImportCheckpoint, Post,
+                          Profile, TimelineEntry)
+from posts.search import SearchPaginator
+
+User = get_user_model()
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as target:
+            target.write(content)
+        return path
+
+    def jsonl(self, name, records):
+        return self.write(
+            name, ''.join(json.dumps(record) + '\n' for record in records)
+        )
+
+    def import_data(self, path, kind, **options):
+        errors = StringIO()
+        call_command(
+            'import_data', path, kind=kind, batch_size=2,
+            stdout=StringIO(), stderr=errors, **options
+        )
+        return errors.getvalue()
+
+    def test_posts_are_validated_and_resolved(self):
+        """Посты проверяются правилами формы, ссылки — по словарям."""
+        path = self.jsonl('posts.jsonl', [
+            {'author': 'author', 'text': 'Первый', 'group': 'group',
+             'pub_date': '2019-05-01T10:00:00'},
+            {'author': 'author', 'text': ''},
+            {'author': 'nobody', 'text': 'Чужой'},
+            {'author': 'author', 'text': 'Без группы', 'group': 'missing'},
+            {'author': 'author', 'text': 'Второй'},
+        ])
+        errors = self.import_data(path, 'posts')
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Первый', 'Второй']
+        )
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.pub_date.year, 2019)
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, 2
+        )
+        self.assertIn('Запись 2', errors)
+        self.assertIn('Запись 3', errors)
+        self.assertIn('Запись 4', errors)
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertEqual(
+            (checkpoint.position, checkpoint.inserted, checkpoint.rejected),
+            (5, 2, 3)
+        )
+
+    def test_broken_lines_are_rejected_one_by_one(self):
+        """Битый JSON и не объект отклоняют только свою запись."""
+        path = self.write(
+            'broken.jsonl',
+            '{"author": "author", "text": "Первый"}\n'
+            '{"author": "author", "text": \n'
+            '["author", "Массив"]\n'
+            '{"author": ["author"], "text": "Список"}\n'
+            '{"author": "author", "text": "Второй", "pub_date": 5}\n'
+            '{"author": "author", "text": "Третий"}\n'
+        )
+        errors = self.import_data(path, 'posts')
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Первый', 'Третий']
+        )
+        for number in range(2, 6):
+            self.assertIn(f'Запись {number}', errors)
+        self.assertEqual(ImportCheckpoint.objects.get().rejected, 4)
+
+    def test_refresh_touches_only_imported_rows(self):
+        """Счётчики, ленты и индекс пересчитываются для вставленного."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Profile.objects.filter(user=self.reader).update(posts_count=7)
+        path = self.jsonl('refresh.jsonl', [
+            {'author': 'author', 'text': 'Импортированный пост'},
+        ])
+        self.import_data(path, 'posts')
+        post = Post.objects.get()
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertEqual(
+            Profile.objects.get(user=self.reader).posts_count, 7
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        hits = list(SearchPaginator('Импортированный', 10).get_page())
+        self.assertEqual([hit.post_id for hit in hits], [post.pk])
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск продолжает с первой необработанной записи."""
+        records = [
+            {'author': 'author', 'text': f'Пост {index}'}
+            for index in range(3)
+        ]
+        path = self.jsonl('resume.jsonl', records)
+        self.import_data(path, 'posts', no_rebuild=True)
+        self.import_data(path, 'posts', no_rebuild=True)
+        self.assertEqual(Post.objects.count(), 3)
+        records.append({'author': 'author', 'text': 'Дописанный'})
+        self.jsonl('resume.jsonl', records)
+        self.import_data(path, 'posts', no_rebuild=True)
+        self.assertEqual(Post.objects.count(), 4)
+        self.import_data(path, 'posts', no_rebuild=True, restart=True)
+        self.assertEqual(Post.objects.count(), 8)
+
+    def test_comments_from_csv(self):
+        """Комментарии к несуществующим постам отклоняются."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        path = self.write(
+            'comments.csv',
+            'post,author,text,created\n'
+            f'{post.pk},reader,"Многострочный\nкомментарий",'
+            '2019-05-01 10:00:00\n'
+            f'{post.pk + 100},reader,Потерянный,\n'
+        )
+        errors = self.import_data(path, 'comments')
+        comment = Comment.objects.get()
+        self.assertEqual(comment.text, 'Многострочный\nкомментарий')
+        self.assertEqual(comment.created.year, 2019)
+        self.assertIn('Запись 2', errors)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_follows(self):
+        """Подписки на себя отклоняются, повторы пропускаются."""
+        self.assertFalse(graph.is_following(self.reader.pk, self.author.pk))
+        path = self.jsonl('follows.jsonl', [
+            {'user': 'reader', 'author': 'author'},
+            {'user': 'reader', 'author': 'author'},
+            {'user': 'author', 'author': 'author'},
+        ])
+        errors = self.import_data(path, 'follows')
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertIn('Запись 3', errors)
+        self.assertTrue(graph.is_following(self.reader.pk, self.author.pk))
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import MediaBlob, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_WORKERS=0)
+class MediaStorageTests(TransactionTestCase):
+    """
+    TransactionTestCase: файлы без ссылок удаляются в on_commit,
+    а обработка картинок запускается после коммита.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(username='author')
+
+    def create_post(self, content, name='meme.png'):
+        return Post.objects.create(
+            text='Мем',
+            author=self.user,
+            image=SimpleUploadedFile(name=name, content=content)
+        )
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(path, name), TEMP_MEDIA_ROOT)
+            for path, _, names in os.walk(TEMP_MEDIA_ROOT)
+            for name in names
+        )
+
+    def test_same_image_is_stored_once(self):
+        """Повторная загрузка тех же байтов не создаёт новых файлов."""
+        first = self.create_post(png('red'))
+        files = self.stored_files()
+        second = self.create_post(png('red'), name='copy.png')
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_srcset, second.image_srcset)
+        self.assertEqual(self.stored_files(), files)
+        self.assertEqual(
+            MediaBlob.objects.get(name=first.image.name).refcount, 2
+        )
+
+    def test_deleting_last_reference_collects_files(self):
+        """Файл и его варианты удаляются вместе с последним постом."""
+        first = self.create_post(png('red'))
+        second = self.create_post(png('red'))
+        first.delete()
+        self.assertTrue(self.stored_files())
+        second.delete()
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_edit_releases_replaced_image(self):
+        """Замена картинки в post_edit удаляет ненужный старый файл."""
+        post = self.create_post(png('red'))
+        kept = self.create_post(png('green'))
+        kept.refresh_from_db()
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('edit_post', args=[self.user.username, post.pk]),
+            {
+                'text': 'Другой мем',
+                'image': SimpleUploadedFile('blue.png', png('blue')),
+            }
+        )
+        post.refresh_from_db()
+        names = set(MediaBlob.objects.values_list('name', flat=True))
+        self.assertIn(post.image.name, names)
+        self.assertIn(kept.image.name, names)
+        self.assertEqual(MediaBlob.objects.exclude(variants='').count(), 2)
+        self.assertFalse(MediaBlob.objects.filter(refcount=0))
+
+    def test_collect_media_command(self):
+        """Команда удаляет загрузки без ссылок и чинит счётчики."""
+        orphan = default_storage.save('posts/orphan.txt', ContentFile(b'x'))
+        post = self.create_post(png('red'))
+        post.refresh_from_db()
+        MediaBlob.objects.filter(name=post.image.name).update(refcount=0)
+        call_command(
+            'collect_media', grace=0, recount=True, stdout=StringIO()
+        )
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertEqual(
+            MediaBlob.objects.get(name=post.image.name).refcount, 1
+        )
+
+    def test_sorl_thumbnails_are_not_collected(self):
+        """Миниатюры sorl не попадают в учёт ссылок и не удаляются."""
+        cache.clear()
+        post = self.create_post(png('red'))
+        post.refresh_from_db()
+        thumbnail = get_thumbnail(post.image, '960x339', crop='center')
+        self.assertFalse(MediaBlob.objects.filter(name=thumbnail.name))
+        call_command('collect_media', grace=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(thumbnail.name))
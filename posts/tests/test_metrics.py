@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import metrics
+
+User = get_user_model()
+
+URL_HOMEPAGE = reverse('index')
+URL_METRICS = reverse('metrics')
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост для метрик', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+
+    def server_timing(self, response):
+        return dict(
+            part.strip().split(';', 1)
+            for part in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_header(self):
+        """Ответ содержит SQL, шаблоны, кэш и общее время."""
+        response = self.client.get(URL_HOMEPAGE)
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'sql', 'tpl', 'cache', 'total'})
+        self.assertRegex(timing['sql'], r'desc="[1-9]\d* queries"')
+        self.assertIn('hits', timing['cache'])
+
+    def test_cache_hits_and_misses_are_counted(self):
+        """Повторный запрос берёт фрагмент ленты из кэша."""
+        first = self.server_timing(self.client.get(URL_HOMEPAGE))
+        second = self.server_timing(self.client.get(URL_HOMEPAGE))
+        self.assertNotIn(' 0 misses', first['cache'])
+        self.assertIn(' 0 misses', second['cache'])
+        self.assertNotIn('"0 hits', second['cache'])
+
+    def test_metrics_endpoint_exposes_histograms(self):
+        """Эндпоинт отдаёт гистограммы по имени представления."""
+        self.client.get(URL_HOMEPAGE)
+        response = self.client.get(URL_METRICS)
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="index"} 1', body
+        )
+        self.assertIn('yatube_sql_queries_bucket{view="index",le="+Inf"} 1',
+                      body)
+        self.assertIn('yatube_response_size_bytes_sum{view="index"}', body)
+        self.assertIn(
+            'yatube_cache_requests_total{result="miss",view="index"}', body
+        )
+
+    def test_metrics_endpoint_names_process(self):
+        """Ответ помечен процессом: метрики у каждого воркера свои."""
+        body = self.client.get(URL_METRICS).content.decode()
+        self.assertTrue(
+            body.startswith(f'# Метрики только процесса {os.getpid()}.\n')
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_metrics_endpoint_is_restricted(self):
+        """Посторонним адресам метрики не отдаются."""
+        response = self.client.get(URL_METRICS)
+        self.assertEqual(response.status_code, 403)
+
+    def test_any_backend_is_instrumented(self):
+        """Обёртка считает обращения к любому бэкенду, не только locmem."""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        backend = metrics.InstrumentedCache(location, {
+            'WRAPPED_BACKEND':
+                'django.core.cache.backends.filebased.FileBasedCache',
+        })
+        self.assertIsInstance(backend.wrapped, FileBasedCache)
+        stats = metrics._local.stats = metrics.RequestStats()
+        try:
+            backend.set('key', 'value')
+            self.assertEqual(backend.get('key'), 'value')
+            self.assertIsNone(backend.get('missing'))
+            self.assertEqual(
+                backend.get_many(['key', 'missing']), {'key': 'value'}
+            )
+            self.assertIn('key', backend)
+        finally:
+            metrics._local.stats = None
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 2))
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Comment, Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post, Profile
 
 User = get_user_model()
 test_user = {
@@ -93,3 +96,58 @@ class FollowModelTest(TestCase):
             f'Пользователь {following.user} подписан на {following.author}'
         )
         self.assertEqual(str(following), expected)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(**test_user)
+        cls.author = User.objects.create(**test_user_2)
+
+    def assertProfile(self, user, **expected):
+        profile = Profile.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(profile, field), value)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text=COMMENT_TEXT
+        )
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertProfile(self.author, posts_count=1, followers_count=1)
+        self.assertProfile(self.user, following_count=1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertProfile(self.author, followers_count=0)
+        self.assertProfile(self.user, following_count=0)
+        post.delete()
+        self.assertProfile(self.author, posts_count=0)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения."""
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.user, text=COMMENT_TEXT)
+            for _ in range(3)
+        ])
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.author)
+        ])
+        Profile.objects.filter(user=self.author).update(posts_count=42)
+        Profile.objects.filter(user=self.user).delete()
+
+        call_command('recount_counters', batch_size=1, stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 3)
+        self.assertProfile(self.author, posts_count=1, followers_count=1)
+        self.assertProfile(self.user, posts_count=0, following_count=1)
@@ -0,0 +1,200 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import page_cache
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class UpstreamStandIn(BaseHTTPRequestHandler):
+    """Внешний кэш: запоминает ключи из PURGE-запросов."""
+    purged = []
+
+    def do_PURGE(self):
+        self.purged.append(self.headers[page_cache.HEADER])
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.urls = {
+            'index': reverse('index'),
+            'group': reverse('group_posts', args=[self.group.slug]),
+            'other': reverse('group_posts', args=[self.other_group.slug]),
+            'profile': reverse('profile', args=[self.author.username]),
+            'post': reverse('post', args=[self.author.username, self.post.pk]),
+        }
+
+    def warm(self):
+        for url in self.urls.values():
+            self.client.get(url)
+
+    def cached(self):
+        """Страницы, которые отдаются из кэша без запросов к базе."""
+        pages = set()
+        for name, url in self.urls.items():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            if not queries:
+                pages.add(name)
+        return pages
+
+    def test_surrogate_keys(self):
+        """Ответы помечены ключами страницы и показанных постов."""
+        post_key = page_cache.post_key(self.post.pk)
+        author_key = page_cache.author_key(self.author.pk)
+        cases = {
+            'index': {page_cache.FEED_INDEX, post_key},
+            'group': {page_cache.group_key('group'), post_key},
+            'profile': {author_key, post_key},
+            'post': {author_key, post_key},
+        }
+        for name, keys in cases.items():
+            with self.subTest(name=name):
+                response = self.client.get(self.urls[name])
+                self.assertEqual(
+                    set(response[page_cache.HEADER].split()), keys
+                )
+                self.assertIn('Surrogate-Control', response)
+
+    def test_hit_skips_database(self):
+        """Повторный анонимный запрос не обращается к базе."""
+        self.warm()
+        self.assertEqual(self.cached(), set(self.urls))
+
+    def test_hit_answers_conditional_get(self):
+        """Сохранённая страница отвечает 304 на совпавший ETag."""
+        etag = self.client.get(self.urls['index'])['ETag']
+        response = self.client.get(
+            self.urls['index'], HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_purges_listings(self):
+        """Новый пост сбрасывает главную, страницы автора и сообщества."""
+        self.warm()
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        self.assertEqual(self.cached(), {'other'})
+        self.assertContains(self.client.get(self.urls['index']), 'Новый пост')
+
+    def test_comment_purges_pages_with_post(self):
+        """Комментарий сбрасывает все страницы, где виден пост."""
+        self.warm()
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertEqual(self.cached(), {'other'})
+        self.assertContains(self.client.get(self.urls['post']), 'Комментарий')
+
+    def test_follow_purges_profiles(self):
+        """Подписка сбрасывает страницы обоих пользователей."""
+        self.warm()
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.cached(), {'index', 'group', 'other'})
+
+    def test_group_move_purges_new_group(self):
+        """Перенос поста сбрасывает страницу нового сообщества."""
+        self.warm()
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertEqual(self.cached(), set())
+
+    def test_authenticated_not_cached(self):
+        """Страницы авторизованных не сохраняются, но несут ключи."""
+        self.client.force_login(self.reader)
+        response = self.client.get(self.urls['index'])
+        self.assertIn(page_cache.FEED_INDEX, response[page_cache.HEADER])
+        self.assertNotIn('Surrogate-Control', response)
+        with CaptureQueriesContext(connection) as queries:
+            Client().get(self.urls['index'])
+        self.assertTrue(queries)
+
+    def test_authenticated_hit_skips_feed_query(self):
+        """Ключи для авторизованных не требуют выборки ленты."""
+        self.client.force_login(self.reader)
+        self.client.get(self.urls['index'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.urls['index'])
+        self.assertEqual(
+            response[page_cache.HEADER], page_cache.FEED_INDEX
+        )
+        self.assertFalse([
+            query for query in queries
+            if 'FROM "posts_post"' in query['sql']
+        ])
+
+
+class UpstreamPurgeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), UpstreamStandIn)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+        cls.upstream = f'http://127.0.0.1:{cls.server.server_port}/'
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        super().tearDownClass()
+
+    def setUp(self):
+        UpstreamStandIn.purged.clear()
+
+    def test_purge_reaches_upstream(self):
+        """Внешний кэш получает PURGE с теми же ключами."""
+        purgers = [
+            'posts.page_cache.CachePurger', 'posts.page_cache.UpstreamPurger'
+        ]
+        with override_settings(
+            PAGE_CACHE_PURGERS=purgers, PAGE_CACHE_UPSTREAMS=[self.upstream]
+        ):
+            post = Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(UpstreamStandIn.purged, [' '.join(sorted([
+            page_cache.FEED_INDEX,
+            page_cache.author_key(self.author.pk),
+            page_cache.post_key(post.pk),
+        ]))])
+
+    @override_settings(
+        PAGE_CACHE_PURGERS=['posts.page_cache.UpstreamPurger'],
+        PAGE_CACHE_UPSTREAMS=['http://127.0.0.1:9/'],
+        PAGE_CACHE_PURGE_TIMEOUT=0.5
+    )
+    def test_unreachable_upstream_is_ignored(self):
+        """Недоступный внешний кэш не ломает запись."""
+        Post.objects.create(text='Пост', author=self.author)
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.models import Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+PER_PAGE = 4
+POSTS_LEN = 10
+
+test_user = {
+    'username': 'test_user',
+    'email': 'test@ttesst.ru',
+    'password': 'Test2password'
+}
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(**test_user)
+        Post.objects.bulk_create([
+            Post(text=f'Пост {index}', author=cls.user)
+            for index in range(POSTS_LEN)
+        ])
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+
+    def test_walk_forward_and_back(self):
+        """Проход вперёд и назад возвращает те же страницы."""
+        forward = [self.paginator.get_page()]
+        while forward[-1].has_next():
+            forward.append(
+                self.paginator.get_page(forward[-1].next_cursor)
+            )
+        self.assertEqual(
+            [post for page in forward for post in page], self.expected
+        )
+        page = forward[-1]
+        for expected_page in reversed(forward[:-1]):
+            page = self.paginator.get_page(page.previous_cursor)
+            self.assertEqual(list(page), list(expected_page))
+        self.assertFalse(page.has_previous())
+
+    def test_page_without_count_query(self):
+        """Страница выбирается одним запросом, без COUNT(*)."""
+        cursor = self.paginator.get_page().next_cursor
+        with self.assertNumQueries(1):
+            page = self.paginator.get_page(cursor)
+            list(page)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный токен даёт первую страницу."""
+        for cursor in ('garbage', 'e30', '!!!', ''):
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_page(cursor)
+                self.assertEqual(list(page), self.expected[:PER_PAGE])
@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import benchmark
+
+SCALE = 0.0001
+# справочник сообществ целиком нужен для выбора в форме поста
+ALLOWED_SCANS = {'SCAN posts_group'}
+# выдача поиска упорядочена по bm25, который считается по совпадениям
+FTS_TABLE = 'posts_search'
+
+
+def plan_problems(sql):
+    """Полные просмотры таблиц и сортировки в плане запроса sql."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    return [
+        detail for detail in details
+        if detail not in ALLOWED_SCANS and (
+            detail.startswith('SCAN') and ' USING ' not in detail
+            or 'TEMP B-TREE' in detail
+        )
+    ]
+
+
+class QueryPlanTests(TestCase):
+    """Запросы каждого маршрута posts/urls.py идут по индексам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmark.seed(SCALE)
+
+    def setUp(self):
+        self.viewer, self.values = benchmark._fixtures()
+        self.client = Client()
+        self.client.force_login(self.viewer)
+
+    def get(self, path, data):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, data)
+        return response, [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and FTS_TABLE not in query['sql']
+        ]
+
+    def route_queries(self, name, params):
+        """SQL первой страницы маршрута и соседних по курсорам."""
+        path = reverse(
+            name, kwargs={key: self.values[key] for key in params}
+        )
+        data = benchmark.URL_PARAMS.get(name, {})
+        response, queries = self.get(path, data)
+        page = response.context and response.context.get('page')
+        if getattr(page, 'is_cursor', False) and page.has_next():
+            response, more = self.get(
+                path, {**data, 'cursor': page.next_cursor}
+            )
+            queries += more
+            page = response.context['page']
+            _, more = self.get(
+                path, {**data, 'cursor': page.previous_cursor}
+            )
+            queries += more
+        return queries
+
+    def test_no_scans_or_sorts(self):
+        """Нет полных просмотров таблиц и сортировок во временном B-дереве."""
+        for name, params in benchmark.benchmark_urls():
+            for sql in self.route_queries(name, params):
+                with self.subTest(name=name, sql=sql):
+                    self.assertEqual(plan_problems(sql), [])
+
+    def test_missing_index_is_caught(self):
+        """Без индекса ленты автора профиль сортирует во временном B-дереве."""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX post_author_feed_idx')
+        problems = [
+            problem
+            for sql in self.route_queries('profile', ['username'])
+            for problem in plan_problems(sql)
+        ]
+        self.assertIn('USE TEMP B-TREE FOR ORDER BY', problems)
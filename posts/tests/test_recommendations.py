@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import graph, recommendations
+from posts.models import Profile, Suggestion
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'first', 'second', 'common', 'other',
+                         'twin', 'liked')
+        }
+        edges = (
+            ('reader', 'first'), ('reader', 'second'),
+            ('first', 'common'), ('second', 'common'), ('first', 'other'),
+            ('twin', 'first'), ('twin', 'second'), ('twin', 'liked'),
+        )
+        for user, author in edges:
+            graph.follow(cls.users[user].pk, cls.users[author].pk)
+
+    def setUp(self):
+        cache.clear()
+
+    def suggested(self, name):
+        return list(
+            Suggestion.objects
+            .filter(user=self.users[name])
+            .values_list('suggested__username', flat=True)
+        )
+
+    def test_ranking(self):
+        """Два пути «друга друга» важнее одного, затем похожие читатели."""
+        call_command('recommend_follows', stdout=StringIO())
+        suggested = self.suggested('reader')
+        self.assertEqual(suggested[:3], ['common', 'other', 'liked'])
+        self.assertNotIn('reader', suggested)
+        self.assertNotIn('first', suggested)
+        self.assertNotIn('second', suggested)
+
+    def test_follow_marks_neighbourhood_stale(self):
+        """Подписка помечает пользователя и его подписчиков."""
+        Profile.objects.update(suggestions_stale_since=None)
+        graph.follow(self.users['first'].pk, self.users['liked'].pk)
+        stale = set(
+            Profile.objects
+            .filter(suggestions_stale_since__isnull=False)
+            .values_list('user__username', flat=True)
+        )
+        self.assertEqual(stale, {'first', 'reader', 'twin'})
+
+    def test_command_processes_only_stale(self):
+        """Без --all пересчитываются только помеченные пользователи."""
+        call_command('recommend_follows', stdout=StringIO())
+        Profile.objects.update(suggestions_stale_since=None)
+        Profile.objects.filter(user=self.users['reader']).update(
+            suggestions_stale_since=timezone.now()
+        )
+        Suggestion.objects.all().delete()
+        call_command('recommend_follows', stdout=StringIO())
+        self.assertEqual(
+            set(Suggestion.objects.values_list('user__username', flat=True)),
+            {'reader'}
+        )
+        self.assertEqual(recommendations.stale_users(), [])
+
+    def test_flags_are_cleared_with_written_suggestions(self):
+        """Отметка снимается только с пересчитанных пользователей."""
+        user_ids = recommendations.stale_users()
+        self.assertEqual(len(user_ids), len(self.users))
+        reader = self.users['reader'].pk
+        recommendations.recompute(
+            recommendations.FollowGraph.load(), [reader], 3
+        )
+        self.assertTrue(Suggestion.objects.filter(user_id=reader))
+        self.assertEqual(
+            set(recommendations.stale_users()), set(user_ids) - {reader}
+        )
+
+    def test_follow_during_run_keeps_user_stale(self):
+        """Подписка после загрузки графа не теряется при пересчёте."""
+        graph_before = recommendations.FollowGraph.load()
+        graph.follow(self.users['reader'].pk, self.users['liked'].pk)
+        recommendations.recompute(
+            graph_before, recommendations.stale_users(), 3
+        )
+        self.assertIn(self.users['reader'].pk, recommendations.stale_users())
+        self.assertNotIn(self.users['other'].pk, recommendations.stale_users())
+
+    def test_sidecard_shows_suggestions(self):
+        """Виджет показывает рекомендации, кроме уже отслеживаемых."""
+        call_command('recommend_follows', stdout=StringIO())
+        graph.follow(self.users['reader'].pk, self.users['other'].pk)
+        client = Client()
+        client.force_login(self.users['reader'])
+        response = client.get(
+            reverse('profile', args=[self.users['reader'].username])
+        )
+        suggestions = [
+            suggestion.suggested.username
+            for suggestion in response.context['suggestions']
+        ]
+        self.assertIn('common', suggestions)
+        self.assertNotIn('other', suggestions)
@@ -0,0 +1,122 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import graph
+from posts.models import Post
+from yatube.routers import PIN_COOKIE, ReplicaMiddleware
+
+User = get_user_model()
+
+REPLICA = 'replica_test'
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRoutingTests(TestCase):
+    """Реплика — отдельный файл SQLite, который не получает записей."""
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_file = tempfile.mkstemp(suffix='.sqlite3')[1]
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica_file,
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        Post.objects.create(text='Пост из основной базы', author=cls.user)
+        User.objects.using(REPLICA).bulk_create(
+            [User(
+                pk=cls.user.pk,
+                username=cls.user.username,
+                password=cls.user.password
+            )]
+        )
+        Post.objects.using(REPLICA).bulk_create(
+            [Post(text='Пост из реплики', author_id=cls.user.pk)]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        os.remove(cls.replica_file)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_read_only_views_read_replica(self):
+        """Главная и профиль читаются с реплики."""
+        for url in (reverse('index'), reverse('profile', args=['reader'])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Пост из реплики')
+                self.assertNotContains(response, 'Пост из основной базы')
+
+    def test_other_views_read_primary(self):
+        """Остальные представления читают из основной базы."""
+        response = self.client.get(reverse('api_index'))
+        self.assertContains(response, 'Пост из основной базы')
+        self.assertNotContains(response, 'Пост из реплики')
+
+    def test_write_pins_reads_to_primary(self):
+        """После записи клиент читает из основной базы."""
+        response = self.client.post(
+            reverse('new_post'), {'text': 'Только что написал'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Только что написал')
+        self.assertContains(response, 'Пост из основной базы')
+        self.assertNotContains(response, 'Пост из реплики')
+
+    def test_reads_do_not_pin(self):
+        """Чтение не закрепляет клиента за основной базой."""
+        response = self.client.get(reverse('index'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_raw_sql_write_pins(self):
+        """Запись сырым SQL в обход ORM тоже закрепляет клиента."""
+        def view(request):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {Post._meta.db_table} SET text = text'
+                )
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_follow_pins(self):
+        """Подписка через graph.follow закрепляет клиента."""
+        author = User.objects.create_user(username='author')
+        response = self.client.get(
+            reverse('profile_follow', args=['author'])
+        )
+        self.assertTrue(graph.is_following(self.user.pk, author.pk))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_replica_reads_are_not_cached(self):
+        """Прочитанное с реплики не попадает в общие кэши."""
+        anonymous = Client()
+        for client in (self.client, anonymous):
+            with self.subTest(client=client):
+                response = client.get(reverse('index'))
+                self.assertContains(response, 'Пост из реплики')
+                self.assertNotIn('ETag', response)
+                client.cookies[PIN_COOKIE] = '1'
+                response = client.get(reverse('index'))
+                self.assertContains(response, 'Пост из основной базы')
+                self.assertNotContains(response, 'Пост из реплики')
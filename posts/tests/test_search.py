@@ -0,0 +1,135 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+from posts.search import SearchPaginator
+
+User = get_user_model()
+
+URL_SEARCH = reverse('search')
+
+test_group = {
+    'title': 'Тестовая группа',
+    'description': 'Группа созданная в тестах',
+    'slug': 'test_slug'
+}
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(**test_group)
+        cls.post_python = Post.objects.create(
+            text='Пишем парсер на Python, python везде',
+            author=cls.author,
+            group=cls.group
+        )
+        cls.post_django = Post.objects.create(
+            text='Django и немного python',
+            author=cls.reader
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post_django,
+            author=cls.author,
+            text='Отличный фреймворк'
+        )
+
+    def find(self, query, **kwargs):
+        return list(SearchPaginator(query, 10, **kwargs).get_page())
+
+    def test_ranked_results(self):
+        """Более релевантный пост идёт первым."""
+        hits = self.find('python')
+        self.assertEqual(
+            [hit.post for hit in hits],
+            [self.post_python, self.post_django]
+        )
+        self.assertIn('<mark>', hits[0].snippet)
+
+    def test_prefix_and_comment_hits(self):
+        """Префиксный запрос находит и комментарии."""
+        hits = self.find('фрейм*')
+        self.assertEqual(len(hits), 1)
+        self.assertTrue(hits[0].is_comment)
+        self.assertEqual(hits[0].post, self.post_django)
+
+    def test_group_and_author_filters(self):
+        """Фильтры по сообществу и автору сужают выдачу."""
+        by_group = self.find('python', group=self.group)
+        by_author = self.find('python', author=self.reader)
+        self.assertEqual([hit.post for hit in by_group], [self.post_python])
+        self.assertEqual([hit.post for hit in by_author], [self.post_django])
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при изменении и удалении постов."""
+        post = Post.objects.create(text='Уникальноеслово', author=self.author)
+        self.assertEqual(len(self.find('Уникальноеслово')), 1)
+        post.text = 'Другой текст'
+        post.save()
+        self.assertEqual(self.find('Уникальноеслово'), [])
+        post.delete()
+        self.assertEqual(self.find('Другой'), [])
+
+    def test_cursor_pages(self):
+        """Выдача листается курсором без повторов."""
+        paginator = SearchPaginator('python', 1)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(
+            [first[0].post, second[0].post],
+            [self.post_python, self.post_django]
+        )
+        self.assertFalse(second.has_next())
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(back[0].post, self.post_python)
+
+    def test_rebuild_command(self):
+        """Команда перестраивает индекс, включая bulk_create записи."""
+        Post.objects.bulk_create([
+            Post(text='Массовый импорт', author=self.author)
+        ])
+        self.assertEqual(self.find('Массовый'), [])
+        call_command('rebuild_search_index', chunk_size=2, stdout=StringIO())
+        self.assertEqual(len(self.find('Массовый')), 1)
+        self.assertEqual(len(self.find('python')), 2)
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты."""
+        response = Client().get(URL_SEARCH, {'q': 'django'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertContains(response, '<mark>Django</mark>')
+
+    def test_admin_uses_index(self):
+        """Поиск в админке использует полнотекстовый индекс."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@ttesst.ru', 'Test2password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'django'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post_django]
+        )
+
+    def test_admin_search_without_terms(self):
+        """Запрос без слов не ломает поиск в админке."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@ttesst.ru', 'Test2password'
+        )
+        client = Client()
+        client.force_login(admin)
+        for name in ('posts_post', 'posts_comment'):
+            with self.subTest(name=name):
+                response = client.get(
+                    reverse(f'admin:{name}_changelist'), {'q': '!!'}
+                )
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import threading
+
+from django.db import connections, transaction
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+from posts import sqlite_benchmark
+from yatube.sqlite_backend import base
+
+DATABASE = 'sqlite_backend_test'
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    databases = {DATABASE}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases[DATABASE] = {
+            'ENGINE': 'yatube.sqlite_backend',
+            'NAME': cls.path,
+            'PRAGMAS': {'busy_timeout': 100},
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[DATABASE].close()
+        del connections.databases[DATABASE]
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(cls.path + suffix):
+                os.remove(cls.path + suffix)
+
+    def pragma(self, name):
+        with connections[DATABASE].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """Соединение получает PRAGMA бэкенда и переопределения."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma('busy_timeout'), 100)
+
+    def test_writers_wait_for_lock(self):
+        """Пока одна транзакция открыта, другая не начинается."""
+        errors = []
+
+        def write():
+            try:
+                with transaction.atomic(using=DATABASE):
+                    pass
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connections[DATABASE].close()
+
+        with transaction.atomic(using=DATABASE):
+            writer = threading.Thread(target=write)
+            writer.start()
+            writer.join()
+        self.assertEqual(len(errors), 1)
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join()
+        self.assertEqual(len(errors), 1)
+
+    def test_autocommit_writes_wait_for_lock(self):
+        """Запись без atomic() встаёт в ту же очередь, чтение — нет."""
+        with connections[DATABASE].cursor() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS queue (id INTEGER)')
+        errors = []
+
+        def run(sql):
+            try:
+                with connections[DATABASE].cursor() as cursor:
+                    cursor.execute(sql)
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connections[DATABASE].close()
+
+        with base.write_lock(self.path):
+            for sql in ('SELECT * FROM queue', 'INSERT INTO queue VALUES (1)'):
+                worker = threading.Thread(target=run, args=(sql,))
+                worker.start()
+                worker.join()
+        self.assertEqual(
+            [str(error) for error in errors], [base.LOCKED]
+        )
+
+
+class SQLiteBenchmarkTests(SimpleTestCase):
+    def test_run(self):
+        """Прогон считает операции и не оставляет файлов и соединений."""
+        for label in sqlite_benchmark.BACKENDS:
+            with self.subTest(label=label):
+                result = sqlite_benchmark.run(
+                    label, threads=2, operations=20, posts=5
+                )
+                self.assertGreater(result['reads_per_second'], 0)
+                self.assertGreater(result['writes_per_second'], 0)
+                self.assertNotIn(
+                    sqlite_benchmark.ALIAS.format(label=label),
+                    connections.databases
+                )
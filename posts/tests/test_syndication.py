@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group
+        )
+        Post.objects.create(text='Пост другого автора', author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds(self):
+        """Ленты отдают записи своей области в RSS и Atom."""
+        cases = (
+            ('feed_index_rss', [], 'application/rss+xml', 2),
+            ('feed_index_atom', [], 'application/atom+xml', 2),
+            ('feed_group_rss', [self.group.slug], 'application/rss+xml', 1),
+            ('feed_profile_atom', [self.other.username],
+             'application/atom+xml', 1),
+        )
+        for name, args, content_type, count in cases:
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                tag = b'<item>' if 'rss' in content_type else b'<entry>'
+                self.assertEqual(response.content.count(tag), count)
+
+    def test_unknown_group(self):
+        """Лента несуществующего сообщества — 404."""
+        response = self.client.get(reverse('feed_group_rss', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(SYNDICATION_ITEMS=1)
+    def test_items_are_bounded(self):
+        """В ленте не больше SYNDICATION_ITEMS записей."""
+        response = self.client.get(reverse('feed_index_rss'))
+        self.assertEqual(response.content.count(b'<item>'), 1)
+
+    def test_cached_snapshot_and_conditional_get(self):
+        """
+        Повтор отдаётся из кэша без запросов, совпавший ETag — 304.
+        Комментарий ленту не меняет, новый пост — меняет.
+        """
+        url = reverse('feed_index_rss')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(post=self.post, author=self.other, text='К')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
@@ -0,0 +1,171 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import tasks, thumbnails
+from posts.models import MediaBlob, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+small_gif = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name='small.gif', content=small_gif):
+        return Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile(name=name, content=content)
+        )
+
+    def photo(self, size, orientation):
+        """JPEG как с телефона: EXIF с ориентацией и координатами."""
+        image = Image.new('RGB', size, 'red')
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        exif[0x010f] = 'Phone'
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif.tobytes())
+        return buffer.getvalue()
+
+    def test_render_thumbnail_stores_url(self):
+        """Миниатюра строится заранее, её адрес сохраняется в посте."""
+        post = self.create_post()
+        url = thumbnails.process_image(post.pk)['thumbnail']
+        post.refresh_from_db()
+        self.assertTrue(url)
+        self.assertEqual(post.thumbnail, url)
+        response = Client().get(
+            reverse('post', args=(self.user.username, post.pk))
+        )
+        self.assertContains(response, f'src="{url}"')
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_processed_image_refreshes_cached_pages(self):
+        """После обработки страницы с постом перестраиваются."""
+        cache.clear()
+        post = self.create_post()
+        path = reverse('post', args=(self.user.username, post.pk))
+        self.assertNotContains(Client().get(path), 'srcset=')
+        tasks.submit(
+            thumbnails.process_image,
+            post.pk,
+            callback=thumbnails.image_processed
+        )
+        self.assertContains(Client().get(path), 'srcset=')
+
+    def test_photo_is_normalized(self):
+        """Поворот из EXIF применён, метаданные удалены, размер ограничен."""
+        post = self.create_post(
+            'photo.jpg', self.photo((4096, 1024), orientation=6)
+        )
+        original = post.image.name
+        thumbnails.process_image(post.pk)
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, original)
+        self.assertEqual(MediaBlob.objects.get(name=original).refcount, 0)
+        with post.image.open('rb') as stored:
+            image = Image.open(stored)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(
+                image.size, (thumbnails.IMAGE_MAX_SIDE // 4,
+                             thumbnails.IMAGE_MAX_SIDE)
+            )
+            self.assertFalse(image.getexif())
+
+    def test_variants_for_srcset(self):
+        """Варианты карточки не шире картинки, в JPEG и WebP."""
+        post = self.create_post(
+            'wide.jpg', self.photo((1000, 500), orientation=1)
+        )
+        thumbnails.process_image(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(
+            [item.split()[-1] for item in post.image_srcset.split(', ')],
+            ['320w', '640w', '960w']
+        )
+        self.assertIn('.webp 960w', post.image_srcset_webp)
+        self.assertIn(f'{post.thumbnail} 960w', post.image_srcset)
+
+    def test_new_image_resets_thumbnail(self):
+        """Замена картинки сбрасывает устаревшую миниатюру."""
+        post = self.create_post()
+        thumbnails.process_image(post.pk)
+        post.refresh_from_db()
+        post.image = SimpleUploadedFile(
+            name='other.gif', content=small_gif, content_type='image/gif'
+        )
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, '')
+
+    def test_backfill_command(self):
+        """Команда строит миниатюры для постов без них."""
+        posts = [self.create_post() for _ in range(3)]
+        call_command('generate_thumbnails', workers=0, stdout=StringIO())
+        for post in posts:
+            post.refresh_from_db()
+            with self.subTest(post=post.pk):
+                self.assertTrue(post.thumbnail)
+
+
+class TaskCallbackTests(TestCase):
+    @override_settings(MEDIA_WORKERS=1)
+    def test_callback_runs_in_parent(self):
+        """Результат задачи из пула обрабатывается в текущем процессе."""
+        done = threading.Event()
+        results = []
+
+        def callback(pid):
+            results.append((pid, os.getpid()))
+            done.set()
+
+        tasks.submit(os.getpid, callback=callback)
+        self.assertTrue(done.wait(30))
+        (child, parent), = results
+        self.assertEqual(parent, os.getpid())
+        self.assertNotEqual(child, parent)
+
+    @override_settings(MEDIA_WORKERS=1)
+    def test_failed_task_is_logged(self):
+        """Сбой задачи в пуле пишется в лог вместе с её аргументами."""
+        with self.assertLogs('posts.tasks', 'ERROR') as logs:
+            future = tasks.submit(int, 'не число', callback=print)
+            self.assertIsInstance(future.exception(30), ValueError)
+            for _ in range(100):
+                if logs.records:
+                    break
+                time.sleep(0.1)
+        self.assertIn("int('не число')", logs.output[0])
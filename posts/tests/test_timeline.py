@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+URL_FOLLOW_INDEX = reverse('follow_index')
+
+POST_TEXT = 'Пост {index} автора {author}'
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(TimelineTests.reader)
+
+    def publish(self, author, count=1):
+        return [
+            Post.objects.create(
+                text=POST_TEXT.format(index=index, author=author),
+                author=author
+            )
+            for index in range(count)
+        ]
+
+    def feed(self):
+        response = self.client.get(URL_FOLLOW_INDEX)
+        return list(response.context['page'])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post, = self.publish(self.author)
+        self.publish(self.stranger)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет прошлые посты, отписка их убирает."""
+        posts = self.publish(self.author, count=3)
+        self.client.get(
+            reverse('profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(
+            set(self.feed()), set(posts)
+        )
+        self.client.get(
+            reverse('profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled_at_read(self):
+        """Посты авторов выше порога читаются без раскладки по лентам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post, = self.publish(self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_stays_pulled_below_limit(self):
+        """Автор, раз превысивший порог, не пропадает из лент."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.stranger, author=self.author)
+        pulled, = self.publish(self.author)
+        Follow.objects.filter(user=self.stranger).delete()
+        self.assertEqual(self.feed(), [pulled])
+        fresh, = self.publish(self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [fresh, pulled])
+
+    def test_timeline_pages(self):
+        """Лента подписок листается курсором без пропусков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = self.publish(self.author, count=settings.ITEMS_ON_PAGE + 3)
+        response = self.client.get(URL_FOLLOW_INDEX)
+        first_page = response.context['page']
+        response = self.client.get(
+            URL_FOLLOW_INDEX, {'cursor': first_page.next_cursor}
+        )
+        second_page = response.context['page']
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            list(first_page) + list(second_page),
+            sorted(posts, key=lambda post: (post.pub_date, post.pk),
+                   reverse=True)
+        )
@@ -0,0 +1,164 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Group, Post, TrendingSnapshot
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.quiet_group = Group.objects.create(
+            title='Тихая', slug='quiet', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def create_post(self, group=None):
+        return Post.objects.create(
+            text='Текст', author=self.author, group=group
+        )
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.author, text='К')
+
+    def test_decay(self):
+        """Вклад события вдвое меньше через период полураспада."""
+        now = time.time()
+        half_life = settings.TRENDING_HALF_LIFE
+        old = trending.log_weight(1, now - half_life)
+        fresh = trending.log_weight(1, now)
+        self.assertAlmostEqual(trending.decayed(old, now), 0.5)
+        self.assertAlmostEqual(
+            trending.decayed(trending.logaddexp(old, fresh), now), 1.5
+        )
+
+    def test_comments_raise_post(self):
+        """Обсуждаемый пост обгоняет более новый."""
+        discussed = self.create_post(self.group)
+        newer = self.create_post(self.group)
+        self.comment(discussed, 2)
+        trending.update()
+        self.assertEqual(
+            trending.top(trending.POSTS, 2), [discussed.pk, newer.pk]
+        )
+        self.assertEqual(
+            trending.top(trending.group_scope(self.group.pk), 2),
+            [discussed.pk, newer.pk]
+        )
+        self.assertEqual(trending.top(trending.GROUPS, 2), [self.group.pk])
+
+    @override_settings(TRENDING_CAPACITY=2)
+    def test_ranking_is_bounded(self):
+        """В рейтинге не больше TRENDING_CAPACITY элементов."""
+        now = time.time()
+        posts = []
+        for age in (3, 1, 2):
+            post = self.create_post()
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(hours=age)
+            )
+            posts.append(post.pk)
+        trending.update(now)
+        self.assertEqual(
+            trending.ranking(trending.POSTS).keys(), set(posts[1:])
+        )
+
+    def test_deleted_post_leaves_ranking(self):
+        """Удалённый пост освобождает место в рейтингах."""
+        post = self.create_post(self.group)
+        kept = self.create_post(self.group)
+        trending.update()
+        post.delete()
+        self.comment(kept)
+        trending.update()
+        self.assertEqual(trending.top(trending.POSTS, 10), [kept.pk])
+        self.assertEqual(
+            trending.top(trending.group_scope(self.group.pk), 10), [kept.pk]
+        )
+
+    def test_persisted_ranking_survives_cache_loss(self):
+        """После потери кэша рейтинг поднимается из снимка."""
+        first = self.create_post(self.group)
+        second = self.create_post()
+        self.comment(first)
+        call_command('persist_trending', stdout=StringIO())
+        self.assertTrue(TrendingSnapshot.objects.filter(scope='posts'))
+        cache.clear()
+        self.assertEqual(
+            trending.top(trending.POSTS, 10), [first.pk, second.pk]
+        )
+
+    def test_requests_do_not_write_rankings(self):
+        """События не трогают рейтинги: их вливает только команда."""
+        first = self.create_post()
+        call_command('persist_trending', stdout=StringIO())
+        second = self.create_post()
+        self.comment(second, 2)
+        self.assertEqual(trending.top(trending.POSTS, 10), [first.pk])
+        call_command('persist_trending', stdout=StringIO())
+        self.assertEqual(
+            trending.top(trending.POSTS, 10), [second.pk, first.pk]
+        )
+
+    def test_concurrent_run_is_discarded(self):
+        """Запуск, чью позицию уже сдвинул другой, ничего не пишет."""
+        self.create_post()
+        trending.update()
+        self.assertFalse(trending._save({trending.POSTS: {}}, [0, 0], [0, 0]))
+        self.assertTrue(trending.top(trending.POSTS, 10))
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчёт с нуля даёт тот же порядок, что и события."""
+        posts = [self.create_post(self.group) for _ in range(3)]
+        trending.update()
+        self.comment(posts[0], 3)
+        trending.update()
+        self.comment(posts[2], 1)
+        trending.update()
+        incremental = trending.top(trending.POSTS, 10)
+        cache.clear()
+        TrendingSnapshot.objects.all().delete()
+        trending.rebuild()
+        self.assertEqual(trending.top(trending.POSTS, 10), incremental)
+        self.assertEqual(
+            trending.top(trending.group_scope(self.quiet_group.pk), 10), []
+        )
+
+    def test_pages(self):
+        """Страницы трендов показывают посты в порядке рейтинга."""
+        first = self.create_post(self.group)
+        second = self.create_post()
+        self.comment(first, 2)
+        trending.update()
+        response = self.client.get(reverse('trending'))
+        self.assertEqual(
+            [post.pk for post in response.context['posts']],
+            [first.pk, second.pk]
+        )
+        self.assertEqual(list(response.context['groups']), [self.group])
+        response = self.client.get(
+            reverse('group_trending', args=[self.group.slug])
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['posts']], [first.pk]
+        )
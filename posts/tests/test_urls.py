@@ -3,8 +3,10 @@ from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
+from django.urls import URLResolver, get_resolver
 
 from posts.models import Comment, Group, Post
+from users.forms import RESERVED_USERNAMES, CreationForm
 
 URL_HOMEPAGE = '/'
 URL_GROUP_PAGE = '/group/test_slug/'
@@ -153,3 +155,33 @@ class URLTest(TestCase):
             with self.subTest(url=url):
                 response = self.guest_client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+def first_segments(patterns, prefix=''):
+    """Постоянные первые сегменты адресов, без параметров."""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern).lstrip('^')
+        if isinstance(pattern, URLResolver) and not route:
+            yield from first_segments(pattern.url_patterns, route)
+        elif route and '<' not in route.split('/')[0]:
+            yield route.split('/')[0]
+
+
+class ReservedUsernameTests(TestCase):
+    def test_routes_are_reserved(self):
+        """Имена, совпадающие с адресами сайта, зарезервированы."""
+        segments = set(first_segments(get_resolver().url_patterns))
+        self.assertTrue(segments)
+        self.assertLessEqual(segments, RESERVED_USERNAMES)
+
+    def test_signup_rejects_reserved_username(self):
+        """Регистрация с зарезервированным именем не проходит."""
+        for username in ('search', 'API'):
+            with self.subTest(username=username):
+                form = CreationForm(data={
+                    'username': username,
+                    'email': 'test@ttesst.ru',
+                    'password1': 'Test2password',
+                    'password2': 'Test2password',
+                })
+                self.assertIn('username', form.errors)
@@ -252,14 +252,106 @@ class PaginatorViewsTest(TestCase):
     def test_index_page_get_correct_number_of_posts_and_pages(self):
         """Проверка корректной работы паджинатора."""
         response = self.authorized_client.get(URL_HOMEPAGE)
-        result = response.context['page']
-        page_number = result.paginator.num_pages
-        expected_pages = (
-            (PAGINATOR_TEST_LEN // settings.ITEMS_ON_PAGE) + 1
-            if PAGINATOR_TEST_LEN % settings.ITEMS_ON_PAGE != 0
-            else PAGINATOR_TEST_LEN / settings.ITEMS_ON_PAGE
+        first_page = response.context['page']
+        self.assertEqual(len(first_page.object_list), settings.ITEMS_ON_PAGE)
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+        response = self.authorized_client.get(
+            URL_HOMEPAGE, {'cursor': first_page.next_cursor}
         )
-        item_number = len(result.object_list)
-        expected_item = settings.ITEMS_ON_PAGE
-        self.assertEqual(page_number, expected_pages)
-        self.assertEqual(item_number, expected_item)
+        last_page = response.context['page']
+        self.assertEqual(
+            len(last_page.object_list),
+            PAGINATOR_TEST_LEN - settings.ITEMS_ON_PAGE
+        )
+        self.assertFalse(last_page.has_next())
+        self.assertTrue(last_page.has_previous())
+
+    def test_pages_do_not_overlap(self):
+        """Курсорные страницы не пересекаются и идут по убыванию даты."""
+        response = self.authorized_client.get(URL_HOMEPAGE)
+        first_page = response.context['page']
+        response = self.authorized_client.get(
+            URL_HOMEPAGE, {'cursor': first_page.next_cursor}
+        )
+        posts = list(first_page) + list(response.context['page'])
+        self.assertEqual(len({post.pk for post in posts}), PAGINATOR_TEST_LEN)
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        self.assertEqual(posts, expected)
+
+
+@override_settings(COMMENTS_ON_PAGE=5)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(**test_user)
+        cls.post = Post.objects.create(text='Пост с веткой', author=cls.user)
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post,
+                author=User.objects.create_user(username=f'reader_{index}'),
+                text=COMMENT_TEXT.format(index=index),
+            )
+            for index in range(12)
+        ])
+        cls.url_post = reverse('post', args=[cls.user.username, cls.post.pk])
+        cls.url_comments = reverse(
+            'post_comments', args=[cls.user.username, cls.post.pk]
+        )
+        cls.url_add_comment = reverse(
+            'add_comment', args=[cls.user.username, cls.post.pk]
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CommentThreadTests.user)
+
+    def test_post_page_shows_first_chunk(self):
+        """Страница поста показывает только первую порцию комментариев."""
+        response = self.authorized_client.get(self.url_post)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 5)
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'js-more-comments')
+
+    def test_chunks_cover_thread_without_overlap(self):
+        """Порции «Показать ещё» проходят всю ветку без повторов."""
+        seen = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            response = self.authorized_client.get(self.url_comments, params)
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html'
+            )
+            comments = response.context['comments']
+            seen.extend(comment.pk for comment in comments)
+            if not comments.has_next():
+                break
+            cursor = comments.next_cursor
+        self.assertEqual(
+            seen,
+            list(
+                self.post.comments.order_by('-created', '-id')
+                .values_list('pk', flat=True)
+            )
+        )
+
+    def test_chunk_authors_are_selected_together(self):
+        """Порция комментариев не делает запрос на каждого автора."""
+        with self.assertNumQueries(2):
+            Client().get(self.url_comments)
+
+    def test_ajax_comment_returns_only_new_comment(self):
+        """AJAX-комментарий возвращает разметку одного комментария."""
+        response = self.authorized_client.post(
+            self.url_add_comment,
+            {'text': 'Свежий комментарий'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'posts/includes/comment_item.html')
+        self.assertTemplateNotUsed(response, 'posts/post.html')
+        self.assertContains(response, 'Свежий комментарий')
+        self.assertNotContains(response, COMMENT_TEXT.format(index=0))
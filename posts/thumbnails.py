@@ -0,0 +1,155 @@
+"""
+Обработка загруженных картинок постов вне потока запроса.
+
+Оригинал декодируется один раз: применяется поворот из EXIF,
+картинка уменьшается до IMAGE_MAX_SIDE и перекодируется в JPEG без
+метаданных, заменяя загруженный файл. Из неё нарезаются варианты
+карточки ширинами VARIANT_WIDTHS в JPEG и WebP для srcset.
+
+Хранилище адресует файлы по содержимому, поэтому одинаковые
+картинки и их варианты хранятся один раз и общие для всех постов.
+"""
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from . import media, page_cache, versions
+from .models import Post
+
+CARD_WIDTH, CARD_HEIGHT = 960, 339
+IMAGE_MAX_SIDE = 2048
+VARIANT_WIDTHS = (320, 640, 960, 1280)
+JPEG_OPTIONS = {'quality': 82, 'optimize': True, 'progressive': True}
+WEBP_OPTIONS = {'quality': 78, 'method': 4}
+VARIANTS_DIR = 'posts/variants'
+NORMALIZED_NAME = 'image.jpg'
+
+
+def _save(storage, name, image, image_format, options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def _decode(field):
+    """Картинка в RGB с учётом ориентации, не больше IMAGE_MAX_SIDE."""
+    with field.open('rb') as source:
+        image = Image.open(source)
+        image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, 'white')
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+    image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+    return image
+
+
+def _variants(storage, image):
+    """
+    Варианты карточки для srcset: ширины не больше исходной,
+    но хотя бы одна. Возвращает поля поста и имена файлов.
+    """
+    widths = [
+        width for width in VARIANT_WIDTHS if width <= image.width
+    ] or VARIANT_WIDTHS[:1]
+    formats = [('jpg', 'JPEG', JPEG_OPTIONS)]
+    if features.check('webp'):
+        formats.append(('webp', 'WEBP', WEBP_OPTIONS))
+    srcsets = {extension: [] for extension, _, _ in formats}
+    files = []
+    for width in widths:
+        height = round(width * CARD_HEIGHT / CARD_WIDTH)
+        card = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        for extension, image_format, options in formats:
+            name = _save(
+                storage,
+                f'{VARIANTS_DIR}/{width}.{extension}',
+                card,
+                image_format,
+                options
+            )
+            files.append(name)
+            srcsets[extension].append((width, storage.url(name)))
+    jpeg = srcsets['jpg']
+    data = {
+        'thumbnail': next(
+            (url for width, url in reversed(jpeg) if width <= CARD_WIDTH),
+            jpeg[0][1]
+        ),
+        'image_srcset': _srcset(jpeg),
+        'image_srcset_webp': _srcset(srcsets.get('webp', ())),
+    }
+    return data, files
+
+
+def _srcset(variants):
+    return ', '.join(f'{url} {width}w' for width, url in variants)
+
+
+def process_image(post_id):
+    """
+    Нормализует картинку поста и строит варианты для srcset.
+    Выполняется в процессе пула.
+    Картинки с теми же байтами уже обработаны, если у их файла
+    есть варианты: тогда пост получает готовые без декодирования.
+    Результат сохраняется, только если картинку не заменили
+    во время обработки. Возвращает словарь для image_processed
+    или None, если сохранять было нечего.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return None
+    original = normalized = post.image.name
+    saved = media.variants(original)
+    if saved is None:
+        image = _decode(post.image)
+        normalized = _save(
+            default_storage,
+            post.image.field.generate_filename(post, NORMALIZED_NAME),
+            image,
+            'JPEG',
+            JPEG_OPTIONS
+        )
+        saved = media.variants(normalized)
+        if saved is None:
+            data, files = _variants(default_storage, image)
+            saved = media.attach_variants(normalized, data, files) or data
+    updated = Post.objects.filter(pk=post_id, image=original).update(
+        image=normalized,
+        thumbnail=saved['thumbnail'],
+        image_srcset=saved['image_srcset'],
+        image_srcset_webp=saved['image_srcset_webp']
+    )
+    if normalized != original:
+        if updated:
+            media.acquire(normalized)
+            media.release(original)
+        else:
+            media.collect([normalized])
+    if not updated:
+        return None
+    return {
+        'post_id': post_id,
+        'author_id': post.author_id,
+        'group_id': post.group_id,
+        'thumbnail': saved['thumbnail'],
+    }
+
+
+def image_processed(result):
+    """
+    Сбрасывает кэши страниц поста после process_image. Вызывается
+    в процессе, который обслуживает запросы, а не в процессе пула.
+    """
+    if result is None:
+        return
+    versions.bump(*versions.post_scopes(
+        result['post_id'], result['author_id'], result['group_id']
+    ))
+    page_cache.purge(page_cache.post_key(result['post_id']))
@@ -0,0 +1,130 @@
+from functools import partial
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Follow, Post, Profile, TimelineEntry
+from .paginator import CursorPaginator
+
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+
+
+def is_pull_author(author_id):
+    """
+    Автор с числом подписчиков выше TIMELINE_FANOUT_LIMIT
+    не раскладывается по лентам, его посты читаются при запросе.
+    Превысив порог, автор помечается timeline_pull и остаётся в этом
+    режиме: пропущенных раскладкой постов в лентах нет, и вернуть
+    его к раскладке значило бы потерять их из лент.
+    """
+    profiles = Profile.objects.filter(user_id=author_id)
+    if profiles.filter(timeline_pull=True).exists():
+        return True
+    return bool(profiles.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(timeline_pull=True))
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_pull_author(post.author_id):
+        return
+    follower_ids = (
+        Follow.objects
+        .filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    )
+    batch = []
+    for user_id in follower_ids:
+        batch.append(TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date
+        ))
+        if len(batch) >= settings.TIMELINE_BATCH_SIZE:
+            _insert(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    if is_pull_author(author_id):
+        return
+    recent = (
+        Post.objects
+        .filter(author_id=author_id)
+        .order_by('-pub_date', '-id')
+        .values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_SIZE]
+    )
+    _insert([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date
+        )
+        for post_id, pub_date in recent
+    ])
+
+
+def prune(user_id, author_id):
+    """Удаляет посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def _feed_posts(user, rows):
+    posts = Post.objects.for_feed(user)
+    return posts.as_rows() if rows else posts
+
+
+def _entries_to_posts(posts, entries):
+    posts = posts.in_bulk([entry.post_id for entry in entries])
+    return [
+        posts[entry.post_id] for entry in entries if entry.post_id in posts
+    ]
+
+
+def get_page(user, cursor=None, rows=False):
+    """
+    Страница ленты подписок.
+
+    Обычно это один проход по индексу (user, -pub_date) таблицы
+    TimelineEntry и выборка постов по первичному ключу. Если
+    пользователь подписан на авторов, которые не раскладываются
+    по лентам (см. is_pull_author), их посты подмешиваются запросом
+    к Post при чтении. С rows=True
+    страница состоит из FeedRow вместо экземпляров Post.
+    """
+    pull_ids = list(
+        Follow.objects
+        .filter(user=user, author__profile__timeline_pull=True)
+        .values_list('author_id', flat=True)
+    )
+    if pull_ids:
+        entries = TimelineEntry.objects.filter(user=user).values('post_id')
+        post_list = _feed_posts(user, rows).filter(
+            Q(pk__in=entries) | Q(author_id__in=pull_ids)
+        )
+        paginator = CursorPaginator(post_list, settings.ITEMS_ON_PAGE)
+        return paginator.get_page(cursor)
+
+    entries = TimelineEntry.objects.filter(user=user).only('post', 'pub_date')
+    paginator = CursorPaginator(
+        entries,
+        settings.ITEMS_ON_PAGE,
+        ordering=TIMELINE_ORDERING,
+        transform=partial(_entries_to_posts, _feed_posts(user, rows))
+    )
+    return paginator.get_page(cursor)
@@ -0,0 +1,284 @@
+"""
+Трендовые посты и сообщества.
+
+Счёт — сумма весов событий (новый пост, комментарий), затухающая
+экспоненциально с периодом полураспада TRENDING_HALF_LIFE. Затухание
+не пересчитывается: хранится логарифм счёта относительно общей эпохи,
+log Σ w·exp(λ(t − EPOCH)), и новое событие прибавляется через
+logaddexp. Порядок по такому числу в любой момент совпадает
+с порядком по затухшему счёту.
+
+Для каждой области (все посты, посты сообщества, сообщества) хранится
+словарь не больше TRENDING_CAPACITY лучших id с их счётами, поэтому
+страница трендов — одно чтение кэша и выборка постов по id.
+
+Рейтинги меняет только команда persist_trending, которая запускается
+периодически, например раз в минуту из cron: она забирает посты
+и комментарии, появившиеся после прошлого запуска, заново считает
+по базе счёты затронутых постов и сообществ за горизонт затухания
+и вливает их в словари. Запросы рейтинги не пишут, поэтому воркеры
+не затирают изменения друг друга в общем кэше, а тренды отстают
+от событий на период запуска команды. Словари и позиция последнего
+запуска хранятся в TrendingSnapshot, в кэш они попадают на
+TRENDING_CACHE_TIMEOUT, так что годится и кэш процесса.
+"""
+import heapq
+import json
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Group, Post, TrendingSnapshot
+
+EPOCH = 1577836800
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+# после стольких периодов полураспада вклад события меньше 0.1%
+HORIZON_HALF_LIVES = 10
+
+POSTS = 'posts'
+GROUPS = 'groups'
+# снимок с последними учтёнными id поста и комментария
+CURSOR = 'cursor'
+TOP_KEY = 'trending:top:{scope}'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def _rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def _horizon():
+    return HORIZON_HALF_LIVES * settings.TRENDING_HALF_LIFE
+
+
+def log_weight(weight, at):
+    """Логарифм вклада события веса weight в момент at."""
+    return math.log(weight) + _rate() * (at - EPOCH)
+
+
+def logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def decayed(value, now=None):
+    """Затухший к моменту now счёт по его логарифму."""
+    now = time.time() if now is None else now
+    return math.exp(value - _rate() * (now - EPOCH))
+
+
+def _top_key(scope):
+    return TOP_KEY.format(scope=scope)
+
+
+def _decode(raw):
+    return {int(item_id): value for item_id, value in json.loads(raw).items()}
+
+
+def _snapshots(scopes):
+    return {
+        scope: _decode(raw)
+        for scope, raw in TrendingSnapshot.objects.filter(
+            scope__in=scopes
+        ).values_list('scope', 'ranking')
+    }
+
+
+def ranking(scope):
+    """
+    Словарь {id: логарифм счёта} лучших элементов области.
+    При промахе кэша читается из снимка.
+    """
+    key = _top_key(scope)
+    items = cache.get(key)
+    if items is None:
+        items = _snapshots([scope]).get(scope, {})
+        # add, а не set: не затереть рейтинг, записанный командой
+        cache.add(key, items, settings.TRENDING_CACHE_TIMEOUT)
+    return items
+
+
+def top(scope, count):
+    """id лучших count элементов области по убыванию счёта."""
+    items = ranking(scope)
+    return heapq.nlargest(count, items, key=items.get)
+
+
+def _events(since, post_ids=None, group_ids=None):
+    """
+    (id поста, id сообщества, логарифм вклада) событий с момента since,
+    при post_ids или group_ids — только этих постов или сообществ.
+    """
+    posts = Post.objects.filter(pub_date__gte=since)
+    comments = Comment.objects.filter(created__gte=since)
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+        comments = comments.filter(post_id__in=post_ids)
+    if group_ids is not None:
+        posts = posts.filter(group_id__in=group_ids)
+        comments = comments.filter(post__group_id__in=group_ids)
+    sources = (
+        (POST_WEIGHT, posts.values_list('pk', 'group_id', 'pub_date')),
+        (COMMENT_WEIGHT, comments.values_list(
+            'post_id', 'post__group_id', 'created'
+        )),
+    )
+    for weight, rows in sources:
+        for post_id, group_id, at in rows.iterator():
+            yield post_id, group_id, log_weight(weight, at.timestamp())
+
+
+def _add(scores, item_id, value):
+    old = scores.get(item_id)
+    scores[item_id] = value if old is None else logaddexp(old, value)
+
+
+def _scores(events):
+    """Счёты постов, сообществ и постов по областям сообществ."""
+    posts, groups, by_group = {}, {}, defaultdict(dict)
+    for post_id, group_id, value in events:
+        _add(posts, post_id, value)
+        if group_id is not None:
+            _add(groups, group_id, value)
+            _add(by_group[group_scope(group_id)], post_id, value)
+    return posts, groups, by_group
+
+
+def _best(scores):
+    return {
+        item_id: scores[item_id]
+        for item_id in heapq.nlargest(
+            settings.TRENDING_CAPACITY, scores, key=scores.get
+        )
+    }
+
+
+def _since(now):
+    return datetime.fromtimestamp(now - _horizon(), tz=timezone.utc)
+
+
+def _group_scopes():
+    return [
+        group_scope(group_id)
+        for group_id in Group.objects.values_list('pk', flat=True).iterator()
+    ]
+
+
+def _position():
+    """Последние id поста и комментария в базе."""
+    return [
+        model.objects.order_by('-pk').values_list('pk', flat=True).first()
+        or 0
+        for model in (Post, Comment)
+    ]
+
+
+def _save(rankings, position, expected=None):
+    """
+    Сохраняет рейтинги и позицию в снимки и кладёт рейтинги в кэш.
+    Если позиция уже не expected, её сдвинул параллельный запуск:
+    тогда ничего не пишется и возвращается False.
+    """
+    with transaction.atomic():
+        saved = TrendingSnapshot.objects.select_for_update().filter(
+            scope=CURSOR
+        ).values_list('ranking', flat=True).first()
+        if expected is not None and json.loads(saved) != expected:
+            return False
+        scopes = [*rankings, CURSOR]
+        TrendingSnapshot.objects.filter(scope__in=scopes).delete()
+        TrendingSnapshot.objects.bulk_create([
+            TrendingSnapshot(scope=scope, ranking=json.dumps(items))
+            for scope, items in [*rankings.items(), (CURSOR, position)]
+        ])
+    cache.set_many(
+        {_top_key(scope): items for scope, items in rankings.items()},
+        settings.TRENDING_CACHE_TIMEOUT
+    )
+    return True
+
+
+def rebuild(now=None):
+    """
+    Пересчитывает все рейтинги по постам и комментариям за горизонт
+    затухания. Нужна при первом запуске и после импорта.
+    Возвращает число учтённых событий.
+    """
+    now = time.time() if now is None else now
+    position = _position()
+    events = list(_events(_since(now)))
+    posts, groups, by_group = _scores(events)
+    rankings = {scope: {} for scope in _group_scopes()}
+    rankings.update(
+        (scope, _best(scores)) for scope, scores in by_group.items()
+    )
+    rankings[POSTS] = _best(posts)
+    rankings[GROUPS] = _best(groups)
+    _save(rankings, position)
+    return len(events)
+
+
+def update(now=None):
+    """
+    Вливает в рейтинги посты и комментарии, появившиеся после
+    прошлого запуска: счёты затронутых постов и их сообществ
+    считаются по базе заново, поэтому повторный учёт безвреден.
+    Удалённые посты покидают рейтинги затронутых областей.
+    Возвращает число пересчитанных постов; при первом запуске
+    выполняет rebuild и возвращает её результат.
+    """
+    now = time.time() if now is None else now
+    saved = TrendingSnapshot.objects.filter(scope=CURSOR).values_list(
+        'ranking', flat=True
+    ).first()
+    if saved is None:
+        return rebuild(now)
+    last_post, last_comment = expected = json.loads(saved)
+    position = _position()
+    rows = [
+        *Post.objects.filter(
+            pk__gt=last_post, pk__lte=position[0]
+        ).values_list('pk', 'group_id'),
+        *Comment.objects.filter(
+            pk__gt=last_comment, pk__lte=position[1]
+        ).values_list('post_id', 'post__group_id'),
+    ]
+    if not rows:
+        return 0
+    post_ids = {post_id for post_id, _ in rows}
+    group_ids = {group_id for _, group_id in rows if group_id is not None}
+    since = _since(now)
+    posts, _, by_group = _scores(_events(since, post_ids=post_ids))
+    _, groups, _ = _scores(_events(since, group_ids=group_ids))
+    fresh = {POSTS: posts, GROUPS: groups, **by_group}
+    rankings = _snapshots(list(fresh))
+    for scope, scores in fresh.items():
+        rankings[scope] = {**rankings.get(scope, {}), **scores}
+    ranked = {
+        post_id
+        for scope, items in rankings.items() if scope != GROUPS
+        for post_id in items
+    }
+    existing = set(
+        Post.objects.filter(pk__in=ranked).values_list('pk', flat=True)
+    )
+    for scope, items in rankings.items():
+        if scope != GROUPS:
+            items = {
+                post_id: value for post_id, value in items.items()
+                if post_id in existing
+            }
+        rankings[scope] = _best(items)
+    if not _save(rankings, position, expected):
+        return 0
+    return len(post_ids)
@@ -1,12 +1,59 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path(
+        'group/<slug:slug>/trending/',
+        views.group_trending,
+        name='group_trending'
+    ),
     path('new/', views.new_post, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('export/', views.export_data, name='export_data'),
+    path('feeds/rss/', feeds.index_rss, name='feed_index_rss'),
+    path('feeds/atom/', feeds.index_atom, name='feed_index_atom'),
+    path(
+        'feeds/group/<slug:slug>/rss/',
+        feeds.group_rss,
+        name='feed_group_rss'
+    ),
+    path(
+        'feeds/group/<slug:slug>/atom/',
+        feeds.group_atom,
+        name='feed_group_atom'
+    ),
+    path(
+        'feeds/profile/<str:username>/rss/',
+        feeds.profile_rss,
+        name='feed_profile_rss'
+    ),
+    path(
+        'feeds/profile/<str:username>/atom/',
+        feeds.profile_atom,
+        name='feed_profile_atom'
+    ),
+    path('api/v1/posts/', api.index, name='api_index'),
+    path('api/v1/posts/<int:post_id>/', api.post_detail, name='api_post'),
+    path(
+        'api/v1/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_comments'
+    ),
+    path(
+        'api/v1/group/<slug:slug>/',
+        api.group_posts,
+        name='api_group'
+    ),
+    path(
+        'api/v1/profile/<str:username>/',
+        api.profile,
+        name='api_profile'
+    ),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
@@ -14,6 +61,11 @@ urlpatterns = [
         views.post_edit,
         name='edit_post'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<username>/<int:post_id>/comment',
         views.add_comment,
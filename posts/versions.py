@@ -0,0 +1,97 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+INDEX = 'index'
+VERSION_KEY = 'version:{scope}'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def viewer_scope(user_id):
+    return f'viewer:{user_id}'
+
+
+def account_scope(user_id):
+    """Сам пользователь в кэше аутентификации."""
+    return f'account:{user_id}'
+
+
+def syndication_scope(scope):
+    """Лента RSS/Atom области: меняется только при записи постов."""
+    return f'syndication:{scope}'
+
+
+def syndication_scopes(author_id, group_id):
+    scopes = [INDEX, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return [syndication_scope(scope) for scope in scopes]
+
+
+def post_scopes(post_id, author_id, group_id):
+    """Области, содержимое которых меняется вместе с постом."""
+    scopes = [INDEX, post_scope(post_id), author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def get_versions(*scopes):
+    """
+    Возвращает поколения областей в порядке аргументов.
+
+    Поколение — это время последней записи в области. Если значения
+    нет в кэше (ещё не было записей или ключ вытеснен), оно заводится
+    текущим временем: это лишь вызывает один лишний промах кэша.
+    """
+    keys = [VERSION_KEY.format(scope=scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Сдвигает поколения областей после записи."""
+    now = time.time()
+    cache.set_many(
+        {VERSION_KEY.format(scope=scope): now for scope in set(scopes)},
+        timeout=None
+    )
+
+
+def etag(*parts):
+    """Сильный ETag из частей, от которых зависит тело ответа."""
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def cache_key(feed, user, cursor, *scopes):
+    """
+    Ключ фрагмента ленты: тип ленты, зритель, курсор страницы,
+    сами области и их поколения. Одна запись сдвигает несколько
+    областей на одно и то же время, поэтому без имён областей
+    ленты разных авторов или сообществ получали бы один ключ.
+    """
+    viewer = user.pk if user.is_authenticated else 'anon'
+    parts = [feed, viewer, cursor or '', *scopes]
+    parts.extend(get_versions(*scopes))
+    return hashlib.md5(
+        '|'.join(str(part) for part in parts).encode()
+    ).hexdigest()
@@ -1,50 +1,249 @@
+from functools import wraps
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import (HttpResponse, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+from yatube.routers import reads_replica
 
+from . import search as search_index
+from . import export, graph, page_cache, timeline, trending, versions
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Group, Post, User
+from .paginator import COMMENT_ORDERING, CursorPaginator
 
 POST_NOT_FOUND = 'Запрошенного поста не существует'
 
 
+def feed_cache(request, feed, *scopes):
+    """
+    Контекст для кэширования фрагмента ленты по поколениям областей.
+    Фрагмент, прочитанный с реплики, не сохраняется: нулевой срок.
+    """
+    return {
+        'cache_key': versions.cache_key(
+            feed, request.user, request.GET.get('cursor'), *scopes
+        ),
+        'cache_timeout': (
+            0 if reads_replica() else settings.FEED_CACHE_TIMEOUT
+        ),
+    }
+
+
+def feed_posts(request, queryset):
+    """Посты ленты одним запросом, при FEED_ROW_OBJECTS — строками."""
+    queryset = queryset.for_feed(request.user)
+    if settings.FEED_ROW_OBJECTS:
+        return queryset.as_rows()
+    return queryset
+
+
+def conditional_page(get_scopes):
+    """
+    Условный GET по поколениям областей, которые вернёт
+    get_scopes(request, **kwargs). Last-Modified — время последней
+    записи в них, ETag дополнительно учитывает зрителя и адрес.
+    Совпадение валидаторов отдаёт 304 без вызова представления.
+    If-None-Match проверяется первым: у Last-Modified точность
+    в секунду, а ETag различает и записи внутри одной секунды.
+    Ответ, прочитанный с реплики, валидаторов не получает: иначе
+    отставшая страница подтверждалась бы 304 до следующей записи.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = list(get_scopes(request, **kwargs))
+            user = request.user
+            if user.is_authenticated:
+                scopes.append(versions.viewer_scope(user.pk))
+            stamps = versions.get_versions(*scopes)
+            last_modified = int(max(stamps))
+            etag = versions.etag(
+                user.pk, request.get_full_path(), *stamps
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            validators = True
+            if response is None:
+                response = view(request, *args, **kwargs)
+                validators = not reads_replica()
+            if response.status_code in (200, 304):
+                if validators:
+                    response.setdefault('ETag', etag)
+                    response.setdefault(
+                        'Last-Modified', http_date(last_modified)
+                    )
+                patch_vary_headers(response, ('Cookie',))
+                if user.is_authenticated:
+                    patch_cache_control(response, private=True)
+                else:
+                    patch_cache_control(response, public=True, max_age=0)
+            return response
+        return wrapper
+    return decorator
+
+
+def _group_scopes(request, slug):
+    group_id = get_object_or_404(
+        Group.objects.values_list('pk', flat=True), slug=slug
+    )
+    return [versions.group_scope(group_id)]
+
+
+def _author_id(username):
+    return get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username
+    )
+
+
+def _profile_scopes(request, username):
+    return [versions.author_scope(_author_id(username))]
+
+
+def _post_scopes(request, username, post_id):
+    return [
+        versions.post_scope(post_id),
+        versions.author_scope(_author_id(username)),
+    ]
+
+
+@page_cache.anonymous_page
+@conditional_page(lambda request: [versions.INDEX])
 def index(request):
-    post_list = Post.objects.select_related('group').all()
-    paginator = Paginator(post_list, settings.ITEMS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'posts/index.html', {'page': page})
+    post_list = feed_posts(request, Post.objects.all())
+    paginator = CursorPaginator(post_list, settings.ITEMS_ON_PAGE)
+    page = paginator.get_page(request.GET.get('cursor'))
+    page_cache.tag(request, page_cache.FEED_INDEX, posts=page)
+    context = {'page': page}
+    context.update(feed_cache(request, 'index', versions.INDEX))
+    return render(request, 'posts/index.html', context)
 
 
+@page_cache.anonymous_page
+@conditional_page(_group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts_list = group.posts.all()
-    paginator = Paginator(posts_list, settings.ITEMS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'posts/group.html',
-                  {'group': group, 'page': page})
+    posts_list = feed_posts(request, group.posts.all())
+    paginator = CursorPaginator(posts_list, settings.ITEMS_ON_PAGE)
+    page = paginator.get_page(request.GET.get('cursor'))
+    page_cache.tag(request, page_cache.group_key(group.slug), posts=page)
+    context = {'group': group, 'page': page}
+    context.update(
+        feed_cache(request, 'group', versions.group_scope(group.pk))
+    )
+    return render(request, 'posts/group.html', context)
 
 
+@page_cache.anonymous_page
+@conditional_page(_profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username
+    )
     user = request.user
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, settings.ITEMS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = feed_posts(request, author.posts.all())
+    paginator = CursorPaginator(post_list, settings.ITEMS_ON_PAGE)
+    page = paginator.get_page(request.GET.get('cursor'))
+    page_cache.tag(request, page_cache.author_key(author.pk), posts=page)
     context = {
         'user': user,
         'author': author,
         'page': page,
     }
+    context.update(
+        feed_cache(request, 'profile', versions.author_scope(author.pk))
+    )
     return render(request, 'posts/profile.html', context)
 
 
+def _ranked_posts(request, scope):
+    """Посты рейтинга трендов области в порядке рейтинга."""
+    post_ids = trending.top(scope, settings.TRENDING_ON_PAGE)
+    posts = {
+        post.pk: post
+        for post in feed_posts(request, Post.objects.filter(pk__in=post_ids))
+    }
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+def trending_posts(request):
+    group_ids = trending.top(
+        trending.GROUPS, settings.TRENDING_GROUPS_ON_PAGE
+    )
+    groups = Group.objects.only('slug', 'title').in_bulk(group_ids)
+    context = {
+        'posts': _ranked_posts(request, trending.POSTS),
+        'groups': [groups[pk] for pk in group_ids if pk in groups],
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_trending(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    context = {
+        'group': group,
+        'posts': _ranked_posts(request, trending.group_scope(group.pk)),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def comments_page(post, cursor=None):
+    """Порция комментариев поста вместе с авторами, новые сверху."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author').only(
+            'text', 'created', 'post', 'author__username'
+        ),
+        settings.COMMENTS_ON_PAGE,
+        ordering=COMMENT_ORDERING
+    )
+    return paginator.get_page(cursor)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group_slug = request.GET.get('group')
+    username = request.GET.get('author')
+    group = author = None
+    if group_slug:
+        group = get_object_or_404(Group, slug=group_slug)
+    if username:
+        author = get_object_or_404(User, username=username)
+    paginator = search_index.SearchPaginator(
+        query, settings.ITEMS_ON_PAGE, group=group, author=author
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'page': page,
+        'query_string': f'{params.urlencode()}&' if params else '',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@page_cache.anonymous_page
+@conditional_page(_post_scopes)
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username
+    )
     post = get_object_or_404(Post, author__username=username, id=post_id)
+    page_cache.tag(
+        request, page_cache.post_key(post.pk), page_cache.author_key(author.pk)
+    )
     user = request.user
     form = CommentForm(request.POST or None)
     context = {
@@ -52,6 +251,7 @@ def post_view(request, username, post_id):
         'author': author,
         'post': post,
         'form': form,
+        'comments': comments_page(post, request.GET.get('cursor')),
     }
     if request.method == 'POST' and form.is_valid():
         comment = form.save(commit=False)
@@ -62,6 +262,19 @@ def post_view(request, username, post_id):
     return render(request, 'posts/post.html', context)
 
 
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    post = get_object_or_404(
+        Post.objects.only('id'), author__username=username, id=post_id
+    )
+    context = {
+        'username': username,
+        'post': post,
+        'comments': comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
 @login_required
 def new_post(request):
     context = {'edit_post': False}
@@ -81,11 +294,9 @@ def new_post(request):
 @login_required
 def post_edit(request, username, post_id):
     context = {'edit_post': True}
-    post = get_object_or_404(Post, pk=post_id)
-    user_auth = request.user
-    author = get_object_or_404(User, username=username)
-    if user_auth != author:
-        return redirect('post', username=author.username, post_id=post.id)
+    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    if post.author_id != request.user.pk:
+        return redirect('post', username=username, post_id=post.id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -102,7 +313,10 @@ def post_edit(request, username, post_id):
 
 @login_required
 def add_comment(request, username, post_id):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username
+    )
     post = get_object_or_404(Post, author__username=username, id=post_id)
     user = request.user
     form = CommentForm(request.POST or None)
@@ -111,47 +325,67 @@ def add_comment(request, username, post_id):
         comment.post = post
         comment.author = request.user
         comment.save()
+        if request.is_ajax():
+            return HttpResponse(render_to_string(
+                'posts/includes/comment_item.html',
+                {'item': comment},
+                request=request
+            ))
         return redirect('post', username=username, post_id=post_id)
+    if request.is_ajax():
+        return HttpResponseBadRequest(form.errors.as_text())
     context = {
         'user': user,
         'author': author,
         'post': post,
         'form': form,
+        'comments': comments_page(post, request.GET.get('cursor')),
     }
     return render(request, 'posts/post.html', context)
 
 
 @login_required
 def follow_index(request):
-    username = request.user.username
-    user = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author__following__user=user)
-    paginator = Paginator(post_list, settings.ITEMS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'posts/follow.html', {'page': page})
+    page = timeline.get_page(
+        request.user,
+        request.GET.get('cursor'),
+        rows=settings.FEED_ROW_OBJECTS
+    )
+    authors = graph.following(request.user.pk)
+    context = {'page': page}
+    context.update(feed_cache(
+        request,
+        'follow',
+        versions.viewer_scope(request.user.pk),
+        *[versions.author_scope(author_id) for author_id in authors]
+    ))
+    return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    username = request.user.username
-    user = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=user, author=author).exists()
-    if author != user and not is_follower:
-        Follow.objects.create(user=user, author=author)
-    return redirect('profile', username=author.username)
+    author_id = _author_id(username)
+    if author_id != request.user.pk:
+        graph.follow(request.user.pk, author_id)
+    return redirect('profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    username = request.user.username
-    user = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=user, author=author).exists()
-    if is_follower:
-        Follow.objects.get(user=user, author=author).delete()
-    return redirect('profile', username=author.username)
+    graph.unfollow(request.user.pk, _author_id(username))
+    return redirect('profile', username=username)
+
+
+@login_required
+def export_data(request):
+    """Архив постов, комментариев и картинок пользователя потоком."""
+    response = StreamingHttpResponse(
+        export.stream_archive(request.user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube-{request.user.username}.zip"'
+    )
+    return response
 
 
 def page_not_found(request, exception):
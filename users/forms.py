@@ -1,10 +1,26 @@
+from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 
 User = get_user_model()
 
+# первые сегменты адресов сайта: профиль с таким именем был бы
+# недоступен по /<username>/
+RESERVED_USERNAMES = frozenset({
+    '__debug__', 'about', 'admin', 'api', 'auth', 'export', 'feeds',
+    'follow', 'group', 'media', 'metrics', 'new', 'search', 'static',
+    'trending',
+})
+USERNAME_RESERVED = 'Это имя занято адресом сайта, выберите другое.'
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if username.lower() in RESERVED_USERNAMES:
+            raise forms.ValidationError(USERNAME_RESERVED)
+        return username
@@ -0,0 +1,59 @@
+"""
+Аутентификация с пользователем из кэша.
+
+Стандартный AuthenticationMiddleware на каждый запрос читает
+auth_user. Здесь пользователь кэшируется под ключом с поколением
+области account_scope(id), которое сдвигается при каждом сохранении
+и удалении пользователя, в том числе при смене пароля. Вместе
+с сессиями cached_db запрос с тёплым кэшем не обращается к базе
+ради аутентификации.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from posts import versions
+from yatube.routers import reads_replica
+
+USER_KEY = 'auth:user:{user_id}:{version}'
+
+
+def get_user(request):
+    """
+    Пользователь сессии. При промахе загружается auth.get_user,
+    из кэша — с той же проверкой хэша пароля в сессии. Прочитанный
+    с реплики пользователь в кэш не кладётся.
+    """
+    session = request.session
+    try:
+        user_id = auth.get_user_model()._meta.pk.to_python(
+            session[auth.SESSION_KEY]
+        )
+        backend = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    version, = versions.get_versions(versions.account_scope(user_id))
+    key = USER_KEY.format(user_id=user_id, version=version)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated and not reads_replica():
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+    if not constant_time_compare(
+        session.get(auth.HASH_SESSION_KEY) or '',
+        user.get_session_auth_hash()
+    ):
+        session.flush()
+        return AnonymousUser()
+    user.backend = backend
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -1,4 +1,8 @@
 from django import template
+from django.conf import settings
+
+from posts import graph
+from posts.models import Suggestion
 
 register = template.Library()
 
@@ -9,7 +13,32 @@ def addclass(field, css):
 
 
 @register.filter()
-def user_in(objects, user):
+def follows(user, author):
+    """Подписан ли user на author — по графу подписок в кэше."""
     if user.is_authenticated:
-        return objects.filter(user=user).exists()
+        return graph.is_following(user.pk, author.pk)
     return False
+
+
+@register.inclusion_tag('posts/includes/suggestions.html')
+def who_to_follow(user):
+    """
+    Предрассчитанные рекомендации из таблицы Suggestion; авторы,
+    на которых пользователь подписался после расчёта, отсеиваются
+    по графу в кэше.
+    """
+    if not user.is_authenticated:
+        return {'suggestions': []}
+    suggestions = list(
+        Suggestion.objects
+        .filter(user=user)
+        .select_related('suggested')
+        .order_by('-score')[:settings.SUGGESTIONS_ON_SIDECARD]
+    )
+    followed = graph.followed_among(
+        user.pk, [suggestion.suggested_id for suggestion in suggestions]
+    )
+    return {'suggestions': [
+        suggestion for suggestion in suggestions
+        if suggestion.suggested_id not in followed
+    ]}
@@ -0,0 +1,300 @@
+"""
+Лёгкая инструментация запросов: SQL, шаблоны, кэш и размер ответа
+по имени представления. Каждый ответ получает заголовок Server-Timing,
+а значения копятся в гистограммах процесса, которые отдаёт
+metrics_view в текстовом формате Prometheus.
+
+Гистограммы и счётчики свои у каждого процесса: /metrics/ одного
+воркера показывает только его запросы. Prometheus должен опрашивать
+каждый воркер отдельно и складывать ряды сам, например sum by (view).
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates
+from django.utils.module_loading import import_string
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNRESOLVED = '<unresolved>'
+
+TIME_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(7))
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время обработки запроса.', TIME_BUCKETS
+    ),
+    'yatube_sql_queries': ('SQL-запросов за запрос.', COUNT_BUCKETS),
+    'yatube_sql_duration_seconds': (
+        'Суммарное время SQL за запрос.', TIME_BUCKETS
+    ),
+    'yatube_template_duration_seconds': (
+        'Время отрисовки шаблонов за запрос.', TIME_BUCKETS
+    ),
+    'yatube_response_size_bytes': ('Размер тела ответа.', SIZE_BUCKETS),
+}
+CACHE_COUNTER = 'yatube_cache_requests_total'
+
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+    __slots__ = (
+        'sql_count', 'sql_time', 'template_time', 'cache_hits',
+        'cache_misses',
+    )
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def current_stats():
+    """Счётчики текущего запроса или None вне запроса."""
+    return getattr(_local, 'stats', None)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def observe(name, view, value):
+    key = (name, view)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(HISTOGRAMS[name][1])
+        histogram.observe(value)
+
+
+def increment(name, labels, amount=1):
+    if not amount:
+        return
+    key = (name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def reset():
+    """Сбрасывает накопленные метрики процесса."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _labels(pairs):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Текущие метрики процесса в текстовом формате Prometheus."""
+    with _lock:
+        histograms = {
+            key: (list(item.counts), item.total, item.count)
+            for key, item in _histograms.items()
+        }
+        counters = dict(_counters)
+    lines = [f'# Метрики только процесса {os.getpid()}.']
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, view), (counts, total, count) in sorted(
+            histograms.items()
+        ):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = _labels((('view', view), ('le', bound)))
+                lines.append(f'{name}_bucket{{{labels}}} {cumulative}')
+            labels = _labels((('view', view),))
+            lines.append(f'{name}_sum{{{labels}}} {_number(total)}')
+            lines.append(f'{name}_count{{{labels}}} {count}')
+    lines.append(f'# HELP {CACHE_COUNTER} Обращения к кэшу.')
+    lines.append(f'# TYPE {CACHE_COUNTER} counter')
+    for (_, labels), value in sorted(counters.items()):
+        lines.append(f'{CACHE_COUNTER}{{{_labels(labels)}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Собирает счётчики запроса и добавляет заголовок Server-Timing.
+    Ставится первым в MIDDLEWARE, чтобы учитывать всю цепочку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _local.stats = RequestStats()
+        started = time.perf_counter()
+        wrappers = [
+            connection.execute_wrapper(self.execute)
+            for connection in connections.all()
+        ]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+            _local.stats = None
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else UNRESOLVED
+        observe('yatube_request_duration_seconds', view, duration)
+        observe('yatube_sql_queries', view, stats.sql_count)
+        observe('yatube_sql_duration_seconds', view, stats.sql_time)
+        observe(
+            'yatube_template_duration_seconds', view, stats.template_time
+        )
+        increment(CACHE_COUNTER, (('result', 'hit'), ('view', view)),
+                  stats.cache_hits)
+        increment(CACHE_COUNTER, (('result', 'miss'), ('view', view)),
+                  stats.cache_misses)
+        if not response.streaming:
+            observe('yatube_response_size_bytes', view, len(response.content))
+
+        response['Server-Timing'] = ', '.join((
+            f'sql;dur={stats.sql_time * 1000:.1f};'
+            f'desc="{stats.sql_count} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="{stats.cache_hits} hits '
+            f'{stats.cache_misses} misses"',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+        return response
+
+    @staticmethod
+    def execute(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.sql_count += 1
+                stats.sql_time += time.perf_counter() - started
+
+
+def metrics_view(request):
+    """
+    Метрики этого процесса для Prometheus, только с METRICS_ALLOWED_IPS.
+    Запросы других воркеров сюда не попадают.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+class TimedTemplate:
+    """Шаблон, время отрисовки которого идёт в счётчики запроса."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Движок DjangoTemplates с замером времени отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class InstrumentedCache:
+    """
+    Обёртка над любым бэкендом кэша, считающая попадания и промахи
+    текущего запроса. Настоящий бэкенд задаётся ключом WRAPPED_BACKEND
+    в CACHES, остальные параметры передаются ему как есть; всё, кроме
+    чтения, делегируется ему без изменений.
+    """
+    _missing = object()
+
+    def __init__(self, location, params):
+        params = dict(params)
+        backend = params.pop('WRAPPED_BACKEND')
+        self.wrapped = import_string(backend)(location, params)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def __contains__(self, key):
+        return self.wrapped.has_key(key)
+
+    def _count(self, hits, misses):
+        stats = current_stats()
+        if stats is not None:
+            stats.cache_hits += hits
+            stats.cache_misses += misses
+
+    def get(self, key, default=None, version=None):
+        value = self.wrapped.get(key, self._missing, version)
+        found = value is not self._missing
+        self._count(int(found), int(not found))
+        return value if found else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = self.wrapped.get_many(keys, version)
+        self._count(len(values), len(keys) - len(values))
+        return values
@@ -0,0 +1,95 @@
+"""
+Чтение с реплик и запись в основную базу.
+
+GET и HEAD представлений из REPLICA_VIEWS читают с одной из баз
+REPLICA_DATABASES. Любая запись за время запроса, в том числе
+сырым SQL через cursor(), ставит клиенту куку PIN_COOKIE
+на REPLICA_PIN_SECONDS: пока она жива, его запросы читают
+из основной базы и видят собственные изменения, даже если реплика
+отстаёт. Сессии всегда читаются из основной базы.
+
+Прочитанное с реплики может отставать, поэтому такие запросы
+не заполняют общие кэши: см. reads_replica.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+PRIMARY_APPS = {'sessions'}
+WRITE_STATEMENTS = {'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+_local = threading.local()
+
+
+def replica_allowed():
+    return getattr(_local, 'replica', False)
+
+
+def reads_replica():
+    """
+    Запрос читает с реплики: результат может отставать от основной
+    базы и не должен попадать в кэши, общие для всех запросов.
+    """
+    return replica_allowed() and bool(settings.REPLICA_DATABASES)
+
+
+def _mark_writes(execute, sql, params, many, context):
+    statement = sql.lstrip().split(None, 1)[:1]
+    if statement and statement[0].upper() in WRITE_STATEMENTS:
+        _local.wrote = True
+    return execute(sql, params, many, context)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_allowed() or model._meta.app_label in PRIMARY_APPS:
+            return None
+        replicas = settings.REPLICA_DATABASES
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает чтение с реплик для представлений только для чтения
+    и закрепляет клиента за основной базой после его записей.
+    Ставится сразу после MetricsMiddleware, чтобы видеть и запись
+    сессии.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.wrote = False
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(
+                _mark_writes
+            ):
+                response = self.get_response(request)
+        finally:
+            _local.replica = False
+        if _local.wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.replica = (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and PIN_COOKIE not in request.COOKIES
+        )
@@ -1,4 +1,6 @@
 import os
+import tempfile
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,7 +9,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-DEBUG = True
+# отладка и debug_toolbar включаются только явно: DEBUG=1 в окружении
+DEBUG = os.getenv('DEBUG', '').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -27,26 +30,30 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -60,25 +67,83 @@ TEMPLATES = [
     },
 ]
 
+# Кэш общий для всех процессов: поколения областей, фрагменты,
+# граф подписок, тренды и страницы пишут веб-воркеры, пул обработки
+# картинок и команды по расписанию. При нескольких процессах нужен
+# Memcached: адреса через запятую в MEMCACHED_LOCATION. Файловый кэш
+# без него годится только для разработки: он медленный, отсеивает
+# записи при вставке и не виден другим машинам. InstrumentedCache
+# считает попадания и промахи для метрик и оборачивает бэкенд из
+# WRAPPED_BACKEND. Тесты идут на своём кэше, см. yatube/test_runner.py.
+MEMCACHED_LOCATION = os.getenv('MEMCACHED_LOCATION', '')
+if MEMCACHED_LOCATION:
+    SHARED_CACHE = {
+        'WRAPPED_BACKEND':
+            'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': MEMCACHED_LOCATION.split(','),
+    }
+else:
+    SHARED_CACHE = {
+        'WRAPPED_BACKEND':
+            'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'CACHE_DIR', os.path.join(tempfile.gettempdir(), 'yatube-cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.metrics.InstrumentedCache',
+        **SHARED_CACHE,
     }
 }
 
+TEST_RUNNER = 'yatube.test_runner.LocMemCacheRunner'
+
+# сессии читаются из кэша, в базе лежит их копия
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# время жизни пользователя в кэше аутентификации;
+# актуальность обеспечивают поколения, см. users/middleware.py
+AUTH_USER_CACHE_TIMEOUT = 60 * 60 * 24
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# WAL, PRAGMA на каждое соединение и очередь записи,
+# см. yatube/sqlite_backend; соединения живут между запросами
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite_backend',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# реплики только для чтения: пути к копиям базы через запятую;
+# в тестах они подменяются основной базой
+REPLICA_FILES = os.getenv('REPLICA_DATABASE_FILES', '')
+for index, name in enumerate(filter(None, REPLICA_FILES.split(','))):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'yatube.sqlite_backend',
+        'NAME': name,
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+# представления, GET которых читает с реплик, и сколько секунд
+# после записи клиент читает из основной базы
+REPLICA_VIEWS = ('index', 'group_posts', 'profile', 'post')
+REPLICA_PIN_SECONDS = 10
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# адреса, с которых Prometheus может забирать /metrics/
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -110,6 +175,17 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# файлы медиа хранятся один раз под хэшем содержимого;
+# загрузки без ссылок старше MEDIA_GC_GRACE секунд удаляет collect_media
+DEFAULT_FILE_STORAGE = 'posts.storage.ContentAddressedStorage'
+MEDIA_GC_GRACE = 60 * 60 * 24
+# кэш миниатюр sorl живёт в обычном хранилище вне учёта ссылок,
+# иначе collect_media удалял бы его файлы
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
+# процессы для обработки картинок; 0 — обрабатывать в текущем процессе
+MEDIA_WORKERS = 2
+
 # Login
 
 LOGIN_URL = '/auth/login/'
@@ -122,3 +198,48 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 # настройка количества постов на странице
 ITEMS_ON_PAGE = 10
+
+# время жизни массивов графа подписок в кэше
+GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+
+# рекомендации «на кого подписаться»: сколько хранить и показывать
+SUGGESTIONS_COUNT = 20
+SUGGESTIONS_ON_SIDECARD = 5
+
+# сколько строк читать из базы за раз при выгрузке архива
+EXPORT_CHUNK_SIZE = 1000
+
+# число записей в лентах RSS/Atom
+SYNDICATION_ITEMS = 20
+
+# количество комментариев в одной порции ветки
+COMMENTS_ON_PAGE = 20
+
+# ленты отдают лёгкие строки FeedRow вместо экземпляров Post
+FEED_ROW_OBJECTS = False
+
+# время жизни фрагментов лент; актуальность обеспечивают поколения
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# кэш целых страниц для анонимов, см. posts/page_cache.py:
+# время жизни, очистители по суррогатным ключам и адреса внешних
+# кэшей, которым UpstreamPurger шлёт PURGE
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_CACHE_PURGERS = ['posts.page_cache.CachePurger']
+PAGE_CACHE_UPSTREAMS = []
+PAGE_CACHE_PURGE_TIMEOUT = 2
+
+# лента подписок: авторы, хоть раз превысившие порог подписчиков,
+# не раскладываются по лентам и читаются при запросе
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BATCH_SIZE = 1000
+TIMELINE_BACKFILL_SIZE = 100
+
+# тренды: период полураспада счёта, размер рейтинга области,
+# сколько секунд рейтинг живёт в кэше до перечитывания из снимка
+# и сколько из него показывать
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_CAPACITY = 100
+TRENDING_CACHE_TIMEOUT = 60
+TRENDING_ON_PAGE = 20
+TRENDING_GROUPS_ON_PAGE = 10
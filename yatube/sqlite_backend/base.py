@@ -0,0 +1,140 @@
+"""
+Бэкенд SQLite для продакшена.
+
+Каждое соединение получает PRAGMA из DEFAULT_PRAGMAS, которые можно
+переопределить ключом PRAGMAS в настройках базы: WAL, чтобы чтение
+не ждало запись, synchronous=NORMAL, mmap и кэш страниц, busy_timeout.
+Соединения живут между запросами по CONN_MAX_AGE.
+
+Транзакции начинаются BEGIN IMMEDIATE, то есть сразу берут блокировку
+записи SQLite и не упираются в неразрешимый апгрейд блокировки
+посреди транзакции. Перед этим поток берёт блокировку процесса для
+файла базы: пишущие потоки ждут в очереди, а не опрашивают файл
+в busy_timeout все разом. Заранее неизвестно, будет ли блок atomic()
+писать, поэтому очередь проходит каждый блок; чтение вне atomic()
+очереди не ждёт. Запись в автокоммите (save(), update() и сырой
+INSERT без atomic()) проходит ту же очередь на время одной команды.
+
+Очередь общая только для потоков одного процесса. Процессы, например
+несколько воркеров gunicorn, по-прежнему соперничают за файл через
+busy_timeout.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # отрицательное значение — размер в КиБ, а не в страницах
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+LOCKED = 'database is locked'
+WRITE_STATEMENTS = {'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    """Блокировка записи процесса для файла базы name."""
+    with _locks_guard:
+        return _locks.setdefault(name, threading.RLock())
+
+
+def is_write(query):
+    statement = query.lstrip().split(None, 1)[:1]
+    return bool(statement) and statement[0].upper() in WRITE_STATEMENTS
+
+
+class QueuedCursor(base.SQLiteCursorWrapper):
+    """Курсор, который ставит запись в автокоммите в очередь процесса."""
+
+    def __init__(self, connection, wrapper):
+        super().__init__(connection)
+        self.wrapper = wrapper
+
+    def execute(self, query, params=None):
+        with self.wrapper.autocommit_write(query):
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        with self.wrapper.autocommit_write(query):
+            return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.holds_write_lock = False
+
+    def pragmas(self):
+        return {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.pragmas().items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(
+            factory=lambda connection: QueuedCursor(connection, self)
+        )
+
+    def _acquire_write_lock(self):
+        lock = write_lock(self.settings_dict['NAME'])
+        timeout = self.pragmas()['busy_timeout'] / 1000
+        if not lock.acquire(timeout=timeout):
+            raise OperationalError(LOCKED)
+        self.holds_write_lock = True
+
+    @contextmanager
+    def autocommit_write(self, query):
+        """Очередь на время одной записи вне транзакции."""
+        queued = (
+            self.autocommit and not self.holds_write_lock and is_write(query)
+        )
+        if not queued:
+            yield
+            return
+        self._acquire_write_lock()
+        try:
+            yield
+        finally:
+            self._release_write_lock()
+
+    def _start_transaction_under_autocommit(self):
+        self._acquire_write_lock()
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            write_lock(self.settings_dict['NAME']).release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
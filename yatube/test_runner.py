@@ -0,0 +1,31 @@
+"""
+Тесты работают на своём кэше в памяти процесса.
+
+Общий кэш из CACHES переживает тесты и виден серверу: очистка кэша
+в тестах стирала бы его, а файловый бэкенд к тому же отсеивает
+записи при каждой вставке.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'yatube.metrics.InstrumentedCache',
+        'WRAPPED_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
+
+
+class LocMemCacheRunner(DiscoverRunner):
+    """DiscoverRunner с CACHES, подменённым на TEST_CACHES."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_caches = override_settings(CACHES=TEST_CACHES)
+        self.test_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_caches.disable()
+        super().teardown_test_environment(**kwargs)